@@ -1,8 +1,13 @@
 # agents/base_agent.py
 
 from abc import ABC, abstractmethod
+from typing import Optional, Tuple
 
 class BaseAgent(ABC):
+    # Context keys the agent reads, and the key the orchestrator stores its result under
+    inputs: Tuple[str, ...] = ()
+    output: Optional[str] = None
+
     def __init__(self, name: str):
         self.name = name
 
@@ -0,0 +1,173 @@
+from agents.base_agent import BaseAgent
+from agents.race_simulator import POINTS, WEIGHT_FLOOR, position_counts, sample_finishing_orders
+from services.jolpica_service import JolpicaService
+from typing import Dict, Iterator, List, Optional
+import numpy as np
+
+# Peak bytes per simulated car in a chunk: float32 uniforms / keys and their
+# temporaries, the int64 argsort output, and the scatter index + weights
+_BYTES_PER_CAR = 32
+
+
+class ChampionshipAgent(BaseAgent):
+    """
+    Season-level championship forecaster.
+
+    Starts from the current driver / constructor standings and simulates
+    every remaining round of the season `n_sims` times with the race
+    simulator (sprints are not modelled). Driver strength comes from a
+    FusionAgent prediction when the context carries one, otherwise from
+    current points. Simulations are vectorized over seasons and rounds and
+    processed in chunks sized to `memory_budget` bytes; `iter_run` yields a
+    partial estimate after every chunk so callers can stream progress.
+    Every estimate has the same keys; before the season's first standings
+    there is nothing to simulate and the only one has no drivers.
+    """
+
+    inputs = ("season", "prediction")
+    output = "championship"
+
+    def __init__(
+        self,
+        jolpica: JolpicaService,
+        n_sims: int = 100_000,
+        seed: Optional[int] = None,
+        memory_budget: int = 64 * 1024 * 1024,
+    ):
+        if n_sims < 1:
+            raise ValueError(f"n_sims must be at least 1, got {n_sims}")
+        super().__init__("ChampionshipAgent")
+        self.jol = jolpica
+        self.n_sims = n_sims
+        self.seed = seed
+        self.memory_budget = memory_budget
+
+    # -------- Inputs -------- #
+
+    def _standings(self, season: int) -> Optional[Dict]:
+        lists = self.jol.driver_standings(season)["MRData"]["StandingsTable"]["StandingsLists"]
+        if not lists:
+            return None
+
+        standings = lists[0]["DriverStandings"]
+        drivers = [s["Driver"]["driverId"] for s in standings]
+        driver_team = [s["Constructors"][-1]["constructorId"] for s in standings]
+
+        team_lists = self.jol.constructor_standings(season)["MRData"]["StandingsTable"]["StandingsLists"]
+        team_standings = team_lists[0]["ConstructorStandings"] if team_lists else []
+        teams = [s["Constructor"]["constructorId"] for s in team_standings]
+        teams += [t for t in dict.fromkeys(driver_team) if t not in teams]
+        team_points = {s["Constructor"]["constructorId"]: float(s["points"]) for s in team_standings}
+
+        return {
+            "round": int(lists[0]["round"]),
+            "drivers": drivers,
+            "points": np.array([float(s["points"]) for s in standings]),
+            "driver_team": np.array([teams.index(t) for t in driver_team]),
+            "teams": teams,
+            "team_points": np.array([team_points.get(t, 0.0) for t in teams]),
+        }
+
+    def _remaining_rounds(self, season: int, completed: int) -> List[int]:
+        races = self.jol.races(season)["MRData"]["RaceTable"]["Races"]
+        return [int(r["round"]) for r in races if int(r["round"]) > completed]
+
+    @staticmethod
+    def _log_weights(state: Dict, prediction: Optional[Dict]) -> np.ndarray:
+        probabilities = (prediction or {}).get("probabilities") or {}
+        if probabilities:
+            p = np.array([probabilities.get(d, 0.0) for d in state["drivers"]])
+            return np.log(np.maximum(p, WEIGHT_FLOOR))
+        # No model output: strength proportional to points scored so far
+        return np.log(state["points"] + 1.0)
+
+    # -------- Simulation -------- #
+
+    @staticmethod
+    def _summary(names: List[str], counts: np.ndarray, done: int) -> Dict[str, Dict]:
+        probabilities = counts / max(1, done)
+        return {
+            name: {
+                "title": round(float(probabilities[i, 0]), 4),
+                "positions": [round(float(p), 4) for p in probabilities[i]],
+            }
+            for i, name in enumerate(names)
+        }
+
+    def _estimate(
+        self, season: int, after_round: int, rounds: List[int], done: int, drivers: Dict, constructors: Dict
+    ) -> Dict:
+        return {
+            "season": season,
+            "after_round": after_round,
+            "remaining_rounds": rounds,
+            "completed": done,
+            "n_sims": self.n_sims,
+            "drivers": drivers,
+            "constructors": constructors,
+        }
+
+    def iter_run(self, context: dict) -> Iterator[Dict]:
+        season = context["season"]
+        state = self._standings(season)
+        if state is None:
+            yield self._estimate(season, 0, self._remaining_rounds(season, 0), 0, {}, {})
+            return
+
+        rounds = self._remaining_rounds(season, state["round"])
+        n, n_teams = len(state["drivers"]), len(state["teams"])
+
+        log_weights = np.broadcast_to(
+            self._log_weights(state, context.get("prediction")), (len(rounds), n)
+        )
+        dnf_prob = np.zeros(n)
+        scoring = min(n, len(POINTS))
+
+        # One-hot driver -> team, and a tiny bias so ties keep the current order
+        team_matrix = np.zeros((n, n_teams))
+        team_matrix[np.arange(n), state["driver_team"]] = 1.0
+        driver_bias = -np.arange(n) * 1e-6
+        team_bias = -np.arange(n_teams) * 1e-6
+
+        chunk = max(1, self.memory_budget // (_BYTES_PER_CAR * max(1, len(rounds)) * n))
+        sizes = [min(chunk, self.n_sims - s) for s in range(0, self.n_sims, chunk)]
+        seeds = np.random.SeedSequence(self.seed).spawn(len(sizes))
+
+        driver_counts = np.zeros((n, n), dtype=np.int64)
+        team_counts = np.zeros((n_teams, n_teams), dtype=np.int64)
+        done = 0
+
+        for size, child in zip(sizes, seeds):
+            rng = np.random.default_rng(child)
+            total = np.tile(state["points"], (size, 1))
+
+            if rounds:
+                # orders[sim, round, position] -> driver
+                orders = sample_finishing_orders(log_weights, dnf_prob, 1.0, size, rng)
+                scorers = orders[:, :, :scoring]
+                flat = (np.arange(size)[:, None, None] * n + scorers).ravel()
+                weights = np.broadcast_to(POINTS[:scoring], scorers.shape).ravel()
+                total += np.bincount(flat, weights=weights, minlength=size * n).reshape(size, n)
+
+            team_total = state["team_points"] + (total - state["points"]) @ team_matrix
+
+            driver_counts += position_counts(np.argsort(-(total + driver_bias), axis=1))
+            team_counts += position_counts(np.argsort(-(team_total + team_bias), axis=1))
+            done += size
+
+            yield self._estimate(
+                season,
+                state["round"],
+                rounds,
+                done,
+                self._summary(state["drivers"], driver_counts, done),
+                self._summary(state["teams"], team_counts, done),
+            )
+
+    def run(self, context: dict) -> Dict:
+        """
+        The final estimate of iter_run.
+        """
+        for result in self.iter_run(context):
+            pass
+        return result
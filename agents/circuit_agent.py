@@ -1,17 +1,34 @@
 from agents.base_agent import BaseAgent
 from services.jolpica_service import JolpicaService
-from typing import Dict
+from services.results_frame import ResultsFrame, context_frame
+from typing import Dict, List, Tuple
 import numpy as np
 
 
+# Circuit characteristics assumed when the circuit has no earlier edition
+PRIOR = {"qualifying_importance": 0.5, "overtaking_difficulty": 0.3, "safety_car_risk": 0.2}
+
+# Latest earlier editions of a circuit its characteristics are averaged over
+EDITIONS = 5
+
+
 class CircuitAgent(BaseAgent):
     """
     Data-backed Circuit Intelligence Agent
+
+    Circuit characteristics are averaged over the latest earlier races held
+    at the same circuitId (usually the previous seasons' editions), never
+    taken from the target's own result, so a prediction only uses what was
+    known before the start and rounds without results can be predicted too.
     """
 
-    def __init__(self, jolpica: JolpicaService):
+    inputs = ("season", "round", "results_frame")
+    output = "circuit"
+
+    def __init__(self, jolpica: JolpicaService, editions: int = EDITIONS):
         super().__init__("CircuitAgent")
         self.jol = jolpica
+        self.editions = editions
 
     def run(self, context: dict) -> Dict:
         season = context["season"]
@@ -27,56 +44,97 @@ class CircuitAgent(BaseAgent):
         circuit = race["Circuit"]
         circuit_name = circuit["circuitName"]
 
-        # ---- Fetch race results ----
-        results = self.jol.results(season, round_no)
-        drivers = results["MRData"]["RaceTable"]["Races"][0]["Results"]
+        # ---- Earlier editions of the circuit ----
+        frame = context_frame(context, self.jol)
+        editions = [
+            self.edition(frame, s, r)
+            for s, r in self.previous_editions(circuit["circuitId"], season, round_no)
+        ]
+        editions = [rows for rows in editions if len(rows[0])]
+        stats = self.features(editions)
 
-        # ---- Feature engineering ----
-        grid_positions = []
-        finish_positions = []
+        # ---- Lap count (ROBUST handling) ----
+        # Race distance, not an outcome: FusionAgent does not score it
+        lap_count = None
+        try:
+            # Some Jolpica races include laps at race level
+            if "laps" in race:
+                lap_count = int(race["laps"])
+            elif editions:
+                # Fallback: the winner's laps at the latest earlier edition
+                laps = int(editions[-1][3].max())
+                lap_count = laps if laps > 0 else None
+        except Exception:
+            lap_count = None
 
-        for d in drivers:
-            if d.get("grid") and d.get("position"):
-                grid_positions.append(int(d["grid"]))
-                finish_positions.append(int(d["position"]))
+        return {
+            "circuit_name": circuit_name,
+            "location": f"{circuit['Location']['locality']}, {circuit['Location']['country']}",
+            **stats,
+            "lap_count": lap_count
+        }
+
+    def previous_editions(self, circuit_id: str, season: int, round_no: int) -> List[Tuple[int, int]]:
+        """
+        (season, round) of the latest `editions` races held at the circuit
+        before (season, round_no), oldest first.
+        """
+        races = self.jol.circuit_races(circuit_id)["MRData"]["RaceTable"]["Races"]
+        held = sorted((int(r["season"]), int(r["round"])) for r in races)
+        return [race for race in held if race < (season, round_no)][-self.editions:]
 
-        grid_positions = np.array(grid_positions)
-        finish_positions = np.array(finish_positions)
+    def edition(self, frame: ResultsFrame, season: int, round_no: int) -> Tuple[np.ndarray, ...]:
+        """
+        (grid, finish, finished, laps) of one race; from the context's frame
+        when it holds the season, else from that season's own frame.
+        """
+        if not frame.has_season(season):
+            frame = ResultsFrame.from_jolpica(self.jol, season)
+        rows = frame.mask(season, [round_no])
+        return frame.grid[rows], frame.position[rows], frame.finished[rows], frame.laps[rows]
+
+    @staticmethod
+    def race_stats(grid: np.ndarray, finish: np.ndarray, finished: np.ndarray) -> Tuple[float, float, float]:
+        """
+        (qualifying importance, overtaking difficulty, safety car risk) of one race.
+        """
+        # ---- Feature engineering ----
+        paired = (grid >= 0) & (finish >= 0)
+        grid_positions = grid[paired].astype(int)
+        finish_positions = finish[paired].astype(int)
 
         # ---- Qualifying importance (grid vs finish correlation) ----
         if len(grid_positions) > 5:
-            corr = np.corrcoef(grid_positions, finish_positions)[0, 1]
-            qualifying_importance = float(abs(corr))
+            with np.errstate(invalid="ignore", divide="ignore"):
+                corr = np.corrcoef(grid_positions, finish_positions)[0, 1]
+            qualifying_importance = float(abs(corr)) if np.isfinite(corr) else 0.5
         else:
             qualifying_importance = 0.5
 
         # ---- Overtaking difficulty (lower avg change = harder) ----
-        avg_position_change = np.mean(np.abs(grid_positions - finish_positions))
-        overtaking_difficulty = float(1 / (1 + avg_position_change))
+        if len(grid_positions):
+            avg_position_change = np.mean(np.abs(grid_positions - finish_positions))
+            overtaking_difficulty = float(1 / (1 + avg_position_change))
+        else:
+            overtaking_difficulty = PRIOR["overtaking_difficulty"]
 
         # ---- Safety car / chaos proxy ----
-        dnf_count = sum(1 for d in drivers if d["status"] != "Finished")
-        safety_car_risk = min(1.0, dnf_count / len(drivers))
+        dnf_count = int(np.count_nonzero(~finished))
+        safety_car_risk = min(1.0, dnf_count / len(grid))
 
-        # ---- Lap count (ROBUST handling) ----
-        lap_count = None
-        try:
-            # Some Jolpica races include laps at race level
-            if "laps" in race:
-                lap_count = int(race["laps"])
-            else:
-                # Fallback: use winner's completed laps if present
-                winner = drivers[0]
-                if "laps" in winner:
-                    lap_count = int(winner["laps"])
-        except Exception:
-            lap_count = None
+        return qualifying_importance, overtaking_difficulty, safety_car_risk
 
+    @classmethod
+    def features(cls, editions: List[Tuple[np.ndarray, ...]]) -> Dict[str, float]:
+        """
+        Race characteristics averaged over the given editions' (grid, finish,
+        finished, ...) rows; PRIOR when there are none.
+        """
+        if not editions:
+            return dict(PRIOR)
+
+        stats = np.array([cls.race_stats(grid, finish, finished) for grid, finish, finished, *_ in editions])
         return {
-            "circuit_name": circuit_name,
-            "location": f"{circuit['Location']['locality']}, {circuit['Location']['country']}",
-            "qualifying_importance": round(qualifying_importance, 3),
-            "overtaking_difficulty": round(overtaking_difficulty, 3),
-            "safety_car_risk": round(safety_car_risk, 3),
-            "lap_count": lap_count
+            name: round(float(value), 3)
+            for name, value in zip(PRIOR, stats.mean(axis=0))
         }
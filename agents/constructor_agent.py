@@ -1,5 +1,6 @@
 from agents.base_agent import BaseAgent
 from services.jolpica_service import JolpicaService
+from services.results_frame import ResultsFrame, context_frame
 from typing import Dict
 import numpy as np
 
@@ -9,6 +10,9 @@ class ConstructorAgent(BaseAgent):
     Models constructor (car) performance and dominance
     """
 
+    inputs = ("season", "round", "results_frame")
+    output = "constructors"
+
     def __init__(self, jolpica: JolpicaService, window: int = 5):
         super().__init__("ConstructorAgent")
         self.jol = jolpica
@@ -22,55 +26,50 @@ class ConstructorAgent(BaseAgent):
         round_no = context["round"]
 
         rounds = self._recent_rounds(round_no)
-
-        teams = {}
-
-        for r in rounds:
-            results = self.jol.results(season, r)
-            race_results = results["MRData"]["RaceTable"]["Races"][0]["Results"]
-
-            for res in race_results:
-                constructor = res["Constructor"]["constructorId"]
-
-                if constructor not in teams:
-                    teams[constructor] = {
-                        "finishes": [],
-                        "points": [],
-                        "dnfs": 0
-                    }
-
-                if res.get("position"):
-                    teams[constructor]["finishes"].append(int(res["position"]))
-
-                if res.get("points"):
-                    teams[constructor]["points"].append(float(res["points"]))
-
-                if res["status"] != "Finished":
-                    teams[constructor]["dnfs"] += 1
+        frame = context_frame(context, self.jol)
+
+        return self.features(frame, frame.mask(season, rounds), len(rounds))
+
+    @staticmethod
+    def features(frame: ResultsFrame, rows: np.ndarray, n_rounds: int) -> Dict[str, Dict]:
+        """
+        Per-constructor dominance features over the frame rows selected by `rows`.
+        """
+        team = frame.constructor[rows]
+        position = frame.position[rows]
+        points = frame.points[rows]
+        not_finished = ~frame.finished[rows]
+        size = len(frame.constructors)
+
+        classified = position >= 0
+        n_finishes = np.bincount(team[classified], minlength=size)
+        avg_finish = np.bincount(
+            team[classified], weights=position[classified], minlength=size
+        ) / np.maximum(n_finishes, 1)
+
+        scored = ~np.isnan(points)
+        n_points = np.bincount(team[scored], minlength=size)
+        points_per_race = np.bincount(
+            team[scored], weights=points[scored], minlength=size
+        ) / np.maximum(n_points, 1)
+
+        dnfs = np.bincount(team, weights=not_finished, minlength=size)
+        dnf_rate = dnfs / max(1, n_rounds * 2)
+
+        dominance_score = (1 / (1 + avg_finish)) * (1 + points_per_race / 25)
 
         # ---- Compute metrics ----
         output = {}
 
-        for team, stats in teams.items():
-            finishes = np.array(stats["finishes"])
-            points = np.array(stats["points"])
-
-            if len(finishes) == 0:
+        for code in ResultsFrame.first_seen(team):
+            if n_finishes[code] == 0:
                 continue
 
-            avg_finish = float(np.mean(finishes))
-            points_per_race = float(np.mean(points)) if len(points) > 0 else 0.0
-            dnf_rate = float(stats["dnfs"] / max(1, len(rounds) * 2))
-
-            dominance_score = float(
-                (1 / (1 + avg_finish)) * (1 + points_per_race / 25)
-            )
-
-            output[team] = {
-                "avg_finish": round(avg_finish, 3),
-                "points_per_race": round(points_per_race, 3),
-                "dnf_rate": round(dnf_rate, 3),
-                "dominance_score": round(dominance_score, 3)
+            output[frame.constructors[code]] = {
+                "avg_finish": round(float(avg_finish[code]), 3),
+                "points_per_race": round(float(points_per_race[code]), 3),
+                "dnf_rate": round(float(dnf_rate[code]), 3),
+                "dominance_score": round(float(dominance_score[code]), 3)
             }
 
         return output
@@ -1,5 +1,6 @@
 from agents.base_agent import BaseAgent
 from services.jolpica_service import JolpicaService
+from services.results_frame import ResultsFrame, context_frame
 from typing import Dict, List
 import numpy as np
 
@@ -9,6 +10,9 @@ class DriverAgent(BaseAgent):
     Driver performance and form modeling agent
     """
 
+    inputs = ("season", "round", "results_frame")
+    output = "drivers"
+
     def __init__(self, jolpica: JolpicaService, window: int = 5):
         super().__init__("DriverAgent")
         self.jol = jolpica
@@ -23,66 +27,58 @@ class DriverAgent(BaseAgent):
         round_no = context["round"]
 
         recent_rounds = self._get_recent_races(season, round_no)
-
-        driver_stats = {}
-
-        for r in recent_rounds:
-            results = self.jol.results(season, r)
-            race_results = results["MRData"]["RaceTable"]["Races"][0]["Results"]
-
-            for res in race_results:
-                driver_id = res["Driver"]["driverId"]
-
-                if driver_id not in driver_stats:
-                    driver_stats[driver_id] = {
-                        "finishes": [],
-                        "grids": [],
-                        "dnfs": 0,
-                        "races":0
-                    }
-
-                # Grid & finish
-                if res.get("grid") and res.get("position"):
-                    driver_stats[driver_id]["grids"].append(int(res["grid"]))
-                    driver_stats[driver_id]["finishes"].append(int(res["position"]))
-
-                # DNF check
-                if res["status"] != "Finished":
-                    driver_stats[driver_id]["dnfs"] += 1
-                    driver_stats[driver_id]["races"] += 1
-
+        frame = context_frame(context, self.jol)
+
+        return self.features(frame, frame.mask(season, recent_rounds), len(recent_rounds))
+
+    @staticmethod
+    def features(frame: ResultsFrame, rows: np.ndarray, n_rounds: int) -> Dict[str, Dict]:
+        """
+        Per-driver form features over the frame rows selected by `rows`.
+        """
+        driver = frame.driver[rows]
+        grid = frame.grid[rows]
+        position = frame.position[rows]
+        not_finished = ~frame.finished[rows]
+        size = len(frame.drivers)
+
+        # ---- Grid & finish (only entries with both) ----
+        paired = (grid >= 0) & (position >= 0)
+        d = driver[paired]
+        finishes = position[paired].astype(float)
+
+        n = np.bincount(d, minlength=size)
+        avg_finish = np.bincount(d, weights=finishes, minlength=size) / np.maximum(n, 1)
+        dev = finishes - avg_finish[d]
+        std = np.sqrt(np.bincount(d, weights=dev * dev, minlength=size) / np.maximum(n, 1))
+        delta = np.bincount(d, weights=grid[paired] - finishes, minlength=size) / np.maximum(n, 1)
+
+        # ---- DNF tally ----
+        dnfs = np.bincount(driver, weights=not_finished, minlength=size)
+
+        consistency = 1 / (1 + std)
+        dnf_risk = dnfs / max(1, n_rounds)
+        form_score = 1 / (1 + avg_finish)
 
         # ---- Compute features ----
         output = {}
 
-        for driver_id, stats in driver_stats.items():
-            finishes = np.array(stats["finishes"])
-            grids = np.array(stats["grids"])
-
-            if len(finishes) == 0:
+        for code in ResultsFrame.first_seen(driver):
+            if n[code] == 0:
                 continue
 
-            avg_finish = float(np.mean(finishes))
-            consistency = float(1 / (1 + np.std(finishes)))
-            dnf_risk = float(stats["dnfs"] / max(1, len(recent_rounds)))
-
-            if len(grids) == len(finishes):
-                quali_delta = float(np.mean(grids - finishes))
-            else:
-                quali_delta = 0.0
-
-            # Normalized form score
-            form_score = float(1 / (1 + avg_finish))
+            driver_id = frame.drivers[code]
 
             # ✅ IMPORTANT: include driver_id explicitly
             output[driver_id] = {
                 "driver_id": driver_id,
-                "avg_finish": round(avg_finish, 3),
-                "consistency": round(consistency, 3),
-                "dnf_risk": round(dnf_risk, 3),
-                "qualifying_delta": round(quali_delta, 3),
-                "form_score": round(form_score, 3),
-                "race_count": stats["races"]
+                "avg_finish": round(float(avg_finish[code]), 3),
+                "consistency": round(float(consistency[code]), 3),
+                "dnf_risk": round(float(dnf_risk[code]), 3),
+                "qualifying_delta": round(float(delta[code]), 3),
+                "form_score": round(float(form_score[code]), 3),
+                # The race tally has only ever been bumped on non-finishes
+                "race_count": int(dnfs[code])
             }
 
         return output
@@ -8,6 +8,10 @@ class ExplainabilityAgent(BaseAgent):
     for race predictions
     """
 
+    # "pace" is optional: FastF1 features, when extracted for the weekend
+    inputs = ("circuit", "drivers", "prediction", "pace")
+    output = "explanation"
+
     def __init__(self):
         super().__init__("ExplainabilityAgent")
 
@@ -16,7 +20,9 @@ class ExplainabilityAgent(BaseAgent):
         drivers = context["drivers"]
         prediction = context["prediction"]
 
-        winner = prediction["winner"]
+        winner = prediction.get("winner")
+        if winner is None:
+            return {"winner": None, "explanations": []}
         winner_stats = drivers[winner]
 
         explanations: List[str] = []
@@ -54,6 +60,19 @@ class ExplainabilityAgent(BaseAgent):
                 "which is valuable on this circuit."
             )
 
+        # ---- FastF1 weekend pace ----
+        pace = (context.get("pace") or {}).get(winner) or {}
+        if pace.get("quali_gap") is not None and pace["quali_gap"] <= 0.1:
+            explanations.append(
+                f"{winner.capitalize()} qualified within 0.1% of pole "
+                f"(gap={pace['quali_gap']}%)."
+            )
+        if pace.get("long_run_gap") is not None and pace["long_run_gap"] <= 0.3:
+            explanations.append(
+                f"{winner.capitalize()}'s practice long-run pace was among the quickest "
+                f"({pace['long_run_gap']}% off the best over {pace['long_run_laps']} laps)."
+            )
+
         # ---- Model transparency note ----
         explanations.append(
             "Note: This prediction is based on recent race form and circuit dynamics. "
@@ -1,8 +1,20 @@
 from agents.base_agent import BaseAgent
-from typing import Dict
-import math
+from typing import Dict, List, Sequence, Tuple
 import numpy as np
 
+# Per-driver inputs, in matrix column order
+FEATURES = ("form_score", "consistency", "dnf_risk", "qualifying_delta", "race_count")
+
+# Jolpica constructor IDs -> post-standardization dominance prior
+TEAM_PRIORS = {
+    "red_bull": 0.60,
+    "ferrari": 0.25,
+    "mclaren": 0.25,
+    "mercedes": 0.10,
+}
+
+TEMPERATURE = 5.0  # calibrated for realistic F1 confidence
+
 
 class FusionAgent(BaseAgent):
     """
@@ -17,130 +29,194 @@ class FusionAgent(BaseAgent):
     - Post-standardization dominance priors (Option B)
     - Temperature-scaled softmax
     - Defensive handling for empty / invalid inputs
+
+    Scoring runs as array operations over a (drivers x features) matrix;
+    every step reduces over the last axis so it also works on stacked races.
     """
 
+    inputs = ("circuit", "drivers", "constructors", "driver_to_constructor")
+    output = "prediction"
+
     def __init__(self):
         super().__init__("FusionAgent")
 
-    def run(self, context: dict) -> Dict:
+    @staticmethod
+    def _empty() -> Dict:
+        return {"winner": None, "podium": [], "probabilities": {}}
+
+    # -----------------------------
+    # Inputs -> arrays
+    # -----------------------------
+    @staticmethod
+    def _circuit_params(context: dict) -> Tuple[float, float, float]:
         circuit = context.get("circuit") or {}
+        return (
+            float(circuit.get("qualifying_importance", 0.5)),
+            float(circuit.get("overtaking_difficulty", 0.3)),
+            float(circuit.get("safety_car_risk", 0.2)),
+        )
+
+    @staticmethod
+    def _driver_arrays(context: dict) -> Tuple[List[str], np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Returns (driver keys, features [n, F], constructor strength [n], team prior [n]).
+        """
         drivers = context.get("drivers") or {}
         constructors = context.get("constructors") or {}
         driver_to_constructor = context.get("driver_to_constructor") or {}
 
-        qi = float(circuit.get("qualifying_importance", 0.5))
-        od = float(circuit.get("overtaking_difficulty", 0.3))
-        scr = float(circuit.get("safety_car_risk", 0.2))
-
-        if not drivers:
-            return {"winner": None, "podium": [], "probabilities": {}}
-
-        raw_scores: Dict[str, float] = {}
-
-        # -----------------------------
-        # 1️⃣ Raw score computation
-        # -----------------------------
+        keys, rows, strength, prior = [], [], [], []
         for driver, stats in drivers.items():
             if not isinstance(stats, dict):
                 continue
 
-            driver_id = stats.get("driver_id", driver)
-            team = driver_to_constructor.get(driver_id)
-
-            constructor_strength = float(
-                constructors.get(team, {}).get("dominance_score", 0.1)
-            )
-
-            # Constructor strength gating
-            if constructor_strength < 0.20:
-                constructor_penalty = 0.85
-            elif constructor_strength < 0.28:
-                constructor_penalty = 0.94
-            else:
-                constructor_penalty = 1.0
-
-            # Experience regularization
-            race_count = float(stats.get("race_count", 0.0))
-            experience_factor = min(1.0, race_count / 5.0)
-
-            form_score = float(stats.get("form_score", 0.0))
-            consistency = float(stats.get("consistency", 0.0))
-            dnf_risk = float(stats.get("dnf_risk", 0.0))
-            qualifying_delta = float(stats.get("qualifying_delta", 0.0))
-
-            score = (
-                (form_score * 0.30)
-                + (consistency * (0.18 + od))
-                + (constructor_strength * 0.30)
-                - (dnf_risk * (0.20 + scr))
-                - (abs(qualifying_delta) * qi * 0.04)
-            )
-
-            score *= experience_factor
-            score *= constructor_penalty
-
-            if math.isfinite(score):
-                raw_scores[driver] = score
-
-        if not raw_scores:
-            return {"winner": None, "podium": [], "probabilities": {}}
-
-        # -----------------------------
-        # 2️⃣ Z-score standardization
-        # -----------------------------
-        values = np.array(list(raw_scores.values()), dtype=float)
-        mean = float(values.mean())
-        std = float(values.std() + 1e-9)
-
-        standardized_scores = {
-            k: (v - mean) / std for k, v in raw_scores.items()
-        }
-
-        # -----------------------------
-        # 3️⃣ OPTION B — Dominance priors
-        #     (applied AFTER standardization)
-        # -----------------------------
-        for driver, stats in drivers.items():
-            if driver not in standardized_scores:
-                continue
-
-            driver_id = stats.get("driver_id", driver)
-            team = driver_to_constructor.get(driver_id)
+            team = driver_to_constructor.get(stats.get("driver_id", driver))
+
+            keys.append(driver)
+            rows.append([float(stats.get(f, 0.0)) for f in FEATURES])
+            strength.append(float(constructors.get(team, {}).get("dominance_score", 0.1)))
+            prior.append(TEAM_PRIORS.get(team, 0.0))
+
+        return (
+            keys,
+            np.array(rows, dtype=float).reshape(len(keys), len(FEATURES)),
+            np.array(strength, dtype=float),
+            np.array(prior, dtype=float),
+        )
+
+    # -----------------------------
+    # Scoring pipeline
+    # -----------------------------
+    @staticmethod
+    def _probabilities(
+        features: np.ndarray,
+        strength: np.ndarray,
+        prior: np.ndarray,
+        circuit: np.ndarray,
+        mask: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        features [..., n, F], strength / prior / mask [..., n], circuit [..., 3]
+        (qi, od, scr). Returns (probabilities [..., n], valid mask [..., n]).
+        """
+        form, consistency, dnf_risk, qualifying_delta, race_count = np.moveaxis(features, -1, 0)
+        qi, od, scr = (c[..., None] for c in np.moveaxis(circuit, -1, 0))
+
+        # 1️⃣ Raw score
+        score = (
+            (form * 0.30)
+            + (consistency * (0.18 + od))
+            + (strength * 0.30)
+            - (dnf_risk * (0.20 + scr))
+            - (np.abs(qualifying_delta) * qi * 0.04)
+        )
+
+        # Experience regularization (fmin keeps min(1.0, nan) == 1.0)
+        score = score * np.fmin(1.0, race_count / 5.0)
+
+        # Constructor strength gating
+        score = score * np.where(strength < 0.20, 0.85, np.where(strength < 0.28, 0.94, 1.0))
+
+        valid = mask & np.isfinite(score)
+        count = valid.sum(axis=-1, keepdims=True)
+
+        # 2️⃣ Z-score standardization over valid drivers
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(valid, score, 0.0).sum(axis=-1, keepdims=True) / count
+            dev = np.where(valid, score - mean, 0.0)
+            std = np.sqrt((dev * dev).sum(axis=-1, keepdims=True) / count) + 1e-9
+            standardized = (score - mean) / std
+
+        # 3️⃣ OPTION B — Dominance priors (applied AFTER standardization)
+        standardized = standardized + prior
 
-            # Jolpica constructor IDs
-            if team == "red_bull":
-                standardized_scores[driver] += 0.60
-            elif team in ("ferrari", "mclaren"):
-                standardized_scores[driver] += 0.25
-            elif team == "mercedes":
-                standardized_scores[driver] += 0.10
-
-        # -----------------------------
         # 4️⃣ Temperature-scaled softmax
-        # -----------------------------
-        TEMPERATURE = 5.0 # calibrated for realistic F1 confidence
-
-        max_score = max(standardized_scores.values())
-        exp_scores = {
-            k: math.exp((v - max_score) * TEMPERATURE)
-            for k, v in standardized_scores.items()
-        }
-
-        total = sum(exp_scores.values())
-        if total <= 0 or not math.isfinite(total):
-            return {"winner": None, "podium": [], "probabilities": {}}
-
-        probabilities = {
-            k: round(exp_scores[k] / total, 3)
-            for k in exp_scores
-        }
-
-        ranking = sorted(probabilities.items(), key=lambda x: x[1], reverse=True)
-        if not ranking:
-            return {"winner": None, "podium": [], "probabilities": {}}
+        z = np.where(valid, standardized, -np.inf)
+        max_score = z.max(axis=-1, keepdims=True)
+        with np.errstate(invalid="ignore"):
+            exp_scores = np.where(valid, np.exp((z - max_score) * TEMPERATURE), 0.0)
+            probabilities = exp_scores / exp_scores.sum(axis=-1, keepdims=True)
+
+        return probabilities, valid
+
+    @staticmethod
+    def _ranking(rounded: np.ndarray, k: int = 3) -> np.ndarray:
+        """
+        Indices of the top-k probabilities, highest first, earlier index on ties
+        (same order as a stable descending sort).
+        """
+        n = len(rounded)
+        if n <= k:
+            candidates = np.arange(n)
+        else:
+            kth = np.partition(rounded, n - k)[n - k]
+            candidates = np.flatnonzero(rounded >= kth)
+        order = np.lexsort((candidates, -rounded[candidates]))
+        return candidates[order[:k]]
+
+    def _result(self, keys: List[str], probabilities: np.ndarray, valid: np.ndarray) -> Dict:
+        idx = np.flatnonzero(valid)
+        if len(idx) == 0 or not np.all(np.isfinite(probabilities[idx])):
+            return self._empty()
+
+        names = [keys[i] for i in idx]
+        rounded = [round(float(p), 3) for p in probabilities[idx]]
+        top = self._ranking(np.array(rounded))
 
         return {
-            "winner": ranking[0][0],
-            "podium": [r[0] for r in ranking[:3]],
-            "probabilities": probabilities,
+            "winner": names[top[0]],
+            "podium": [names[i] for i in top],
+            "probabilities": dict(zip(names, rounded)),
         }
+
+    def run(self, context: dict) -> Dict:
+        if not (context.get("drivers") or {}):
+            return self._empty()
+
+        keys, features, strength, prior = self._driver_arrays(context)
+        if not keys:
+            return self._empty()
+
+        probabilities, valid = self._probabilities(
+            features,
+            strength,
+            prior,
+            np.array(self._circuit_params(context)),
+            np.ones(len(keys), dtype=bool),
+        )
+        return self._result(keys, probabilities, valid)
+
+    def run_batch(self, contexts: Sequence[dict]) -> List[Dict]:
+        """
+        Scores many races in one vectorized pass.
+
+        Each context has the same shape as for `run`. Races are padded to the
+        largest grid and stacked into [races, drivers, features] tensors;
+        returns one prediction dict per context, in order.
+        """
+        arrays = [self._driver_arrays(c) for c in contexts]
+        width = max((len(keys) for keys, *_ in arrays), default=0)
+        if width == 0:
+            return [self._empty() for _ in contexts]
+
+        n_races = len(contexts)
+        features = np.zeros((n_races, width, len(FEATURES)))
+        strength = np.zeros((n_races, width))
+        prior = np.zeros((n_races, width))
+        mask = np.zeros((n_races, width), dtype=bool)
+        circuit = np.array([self._circuit_params(c) for c in contexts]).reshape(n_races, 3)
+
+        for i, (keys, f, s, p) in enumerate(arrays):
+            n = len(keys)
+            features[i, :n] = f
+            strength[i, :n] = s
+            prior[i, :n] = p
+            mask[i, :n] = True
+
+        probabilities, valid = self._probabilities(features, strength, prior, circuit, mask)
+
+        return [
+            self._result(keys, probabilities[i, :len(keys)], valid[i, :len(keys)])
+            if keys else self._empty()
+            for i, (keys, *_) in enumerate(arrays)
+        ]
@@ -0,0 +1,49 @@
+from pathlib import Path
+import hashlib
+
+# Source files whose logic determines a prediction
+_MODEL_SOURCES = (
+    "agents/circuit_agent.py",
+    "agents/driver_agent.py",
+    "agents/constructor_agent.py",
+    "agents/explanation_agent.py",
+    "agents/fusion_agent.py",
+    "agents/pipeline.py",
+    "agents/rolling.py",
+    "services/pace_features.py",
+    "services/results_frame.py",
+)
+
+# Source files whose logic determines the stored agent features
+_FEATURE_SOURCES = (
+    "agents/circuit_agent.py",
+    "agents/driver_agent.py",
+    "agents/constructor_agent.py",
+    "agents/pipeline.py",
+    "agents/rolling.py",
+    "services/results_frame.py",
+    "services/feature_store.py",
+)
+
+# Source files whose logic determines the stored FastF1 pace features
+_PACE_SOURCES = (
+    "services/pace_features.py",
+)
+
+_ROOT = Path(__file__).resolve().parents[1]
+
+
+def code_version(*sources: str) -> str:
+    """
+    Short content hash of the given repo-relative source files.
+    """
+    digest = hashlib.sha256()
+    for source in sources:
+        digest.update(source.encode())
+        digest.update((_ROOT / source).read_bytes())
+    return digest.hexdigest()[:12]
+
+
+MODEL_VERSION = code_version(*_MODEL_SOURCES)
+FEATURE_VERSION = code_version(*_FEATURE_SOURCES)
+PACE_VERSION = code_version(*_PACE_SOURCES)
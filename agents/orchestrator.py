@@ -0,0 +1,146 @@
+from agents.base_agent import BaseAgent
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from services import metrics
+from typing import Any, Dict, List, Sequence, Set, Tuple
+import contextvars
+import threading
+import time
+
+# JolpicaService methods with hashable arguments whose payloads are memoized per run
+_FETCHES = frozenset({
+    "seasons",
+    "races",
+    "results",
+    "circuit_races",
+    "season_results",
+    "season_frame",
+    "driver_standings",
+    "constructor_standings",
+})
+
+
+class FetchMemo:
+    """
+    Per-run memo in front of a JolpicaService.
+
+    Each fetch method runs at most once per argument list for the lifetime
+    of the memo, even when several agents ask for it concurrently; the
+    others wait for the first call and share its payload. Everything else is
+    passed through to the wrapped service.
+    """
+
+    def __init__(self, jolpica):
+        self._jol = jolpica
+        self._lock = threading.Lock()
+        self._calls: Dict[Tuple, Future] = {}
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._jol, name)
+        if name not in _FETCHES:
+            return attr
+
+        def memoized(*args, **kwargs):
+            key = (name, args, tuple(sorted(kwargs.items())))
+            with self._lock:
+                future = self._calls.get(key)
+                owner = future is None
+                if owner:
+                    future = self._calls[key] = Future()
+
+            if owner:
+                try:
+                    future.set_result(attr(*args, **kwargs))
+                except BaseException as e:
+                    future.set_exception(e)
+            return future.result()
+
+        return memoized
+
+
+class Orchestrator:
+    """
+    Runs agents as a dependency graph built from their declared
+    `inputs` / `output` context keys.
+
+    An agent starts as soon as every agent producing one of its inputs has
+    finished, so independent agents run concurrently on a thread pool.
+    Inputs nobody produces are left to the caller's context. Agents whose
+    output is already in the context (e.g. precomputed features) are
+    skipped. Wall time per agent is returned under context["timings"].
+    """
+
+    def __init__(self, agents: Sequence[BaseAgent], max_workers: int = 4):
+        producers: Dict[str, BaseAgent] = {}
+        for agent in agents:
+            if agent.output is None:
+                raise ValueError(f"{agent.name} does not declare an output")
+            if agent.output in producers:
+                raise ValueError(
+                    f"{agent.name} and {producers[agent.output].name} both produce '{agent.output}'"
+                )
+            producers[agent.output] = agent
+
+        self.agents = list(agents)
+        self.max_workers = max_workers
+        self._order(self.agents, {})
+
+    @staticmethod
+    def _dependencies(agents: Sequence[BaseAgent], context: dict) -> Dict[str, Set[str]]:
+        producers = {a.output: a.name for a in agents if a.output not in context}
+        return {
+            a.name: {producers[i] for i in a.inputs if i in producers and producers[i] != a.name}
+            for a in agents
+        }
+
+    def _order(self, agents: Sequence[BaseAgent], context: dict) -> List[BaseAgent]:
+        """
+        Topological order of the agents to run; raises ValueError on a cycle.
+        """
+        deps = self._dependencies(agents, context)
+        pending = [a for a in agents if a.output not in context]
+        order: List[BaseAgent] = []
+        done: Set[str] = set()
+        while pending:
+            ready = [a for a in pending if deps[a.name] <= done]
+            if not ready:
+                raise ValueError(f"Agent dependency cycle: {[a.name for a in pending]}")
+            for agent in ready:
+                pending.remove(agent)
+                order.append(agent)
+                done.add(agent.name)
+        return order
+
+    @staticmethod
+    def _timed(agent: BaseAgent, context: dict) -> Tuple[Any, float]:
+        start = time.perf_counter()
+        with metrics.timed("agent_run_seconds", span=agent.name, agent=agent.name):
+            result = agent.run(context)
+        return result, time.perf_counter() - start
+
+    def run(self, context: dict) -> dict:
+        """
+        Returns a copy of `context` extended with every agent's output.
+        """
+        context = dict(context)
+        start = time.perf_counter()
+        pending = self._order(self.agents, context)
+        deps = self._dependencies(self.agents, context)
+        timings: Dict[str, float] = {}
+        running: Dict[Future, BaseAgent] = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while pending or running:
+                for agent in [a for a in pending if deps[a.name] <= timings.keys()]:
+                    pending.remove(agent)
+                    # Copied per task so trace spans nest under the caller's
+                    task = contextvars.copy_context()
+                    running[pool.submit(task.run, self._timed, agent, context)] = agent
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    agent = running.pop(future)
+                    context[agent.output], timings[agent.name] = future.result()
+
+        timings["total"] = time.perf_counter() - start
+        context["timings"] = timings
+        return context
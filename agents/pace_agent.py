@@ -0,0 +1,22 @@
+from agents.base_agent import BaseAgent
+from services.pace_features import PaceStore
+from typing import Dict
+
+
+class PaceAgent(BaseAgent):
+    """
+    FastF1 weekend pace per driver (qualifying gap, long-run pace,
+    tyre degradation), read from the pace store
+    """
+
+    inputs = ("season", "round")
+    output = "pace"
+
+    def __init__(self, store: PaceStore):
+        super().__init__("PaceAgent")
+        self.store = store
+
+    def run(self, context: dict) -> Dict[str, Dict]:
+        # Extraction is a separate, slow step (python -m services.pace_features);
+        # weekends not extracted yet simply have no pace features
+        return self.store.read(context["season"], context["round"]) or {}
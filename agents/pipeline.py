@@ -0,0 +1,315 @@
+from agents.base_agent import BaseAgent
+from agents.circuit_agent import CircuitAgent
+from agents.constructor_agent import ConstructorAgent
+from agents.driver_agent import DriverAgent
+from agents.explanation_agent import ExplainabilityAgent
+from agents.fusion_agent import FusionAgent
+from agents.orchestrator import FetchMemo, Orchestrator
+from agents.pace_agent import PaceAgent
+from agents.rolling import sweep
+from services import metrics
+from services.cache_service import CacheService
+from services.feature_store import FeatureStore
+from services.jolpica_service import JolpicaService
+from services.pace_features import PaceStore
+from services.results_frame import ResultsFrame
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import numpy as np
+
+
+def driver_constructor_map(frame: ResultsFrame, season: int, round_no: int) -> Dict[str, str]:
+    """
+    Map driverId -> constructorId going into the selected race: each
+    driver's team in their latest race of the frame before it (the race's
+    own entry list is not known before its results).
+    Returns {} if the frame has no earlier race.
+    """
+    rows = (frame.season < season) | ((frame.season == season) & (frame.round < round_no))
+    mapping: Dict[str, str] = {}
+    # Chronological rows: later races overwrite earlier teams
+    for d, c in zip(frame.driver[rows].tolist(), frame.constructor[rows].tolist()):
+        mapping[frame.drivers[d]] = frame.constructors[c]
+    return mapping
+
+
+class ResultsFrameAgent(BaseAgent):
+    """
+    Parses the season's results once for every agent of the run
+    """
+
+    inputs = ("season",)
+    output = "results_frame"
+
+    def __init__(self, jolpica: JolpicaService):
+        super().__init__("ResultsFrameAgent")
+        self.jol = jolpica
+
+    def run(self, context: dict) -> ResultsFrame:
+        return ResultsFrame.from_jolpica(self.jol, context["season"])
+
+
+class DriverConstructorMapAgent(BaseAgent):
+    """
+    driverId -> constructorId going into the selected race
+    """
+
+    inputs = ("season", "round", "results_frame")
+    output = "driver_to_constructor"
+
+    def __init__(self):
+        super().__init__("DriverConstructorMapAgent")
+
+    def run(self, context: dict) -> Dict[str, str]:
+        return driver_constructor_map(context["results_frame"], context["season"], context["round"])
+
+
+def analysis_agents(jol: JolpicaService, window: int = 5) -> List[BaseAgent]:
+    """
+    The agents producing a FusionAgent context for one race.
+    """
+    return [
+        ResultsFrameAgent(jol),
+        CircuitAgent(jol),
+        DriverAgent(jol, window=window),
+        ConstructorAgent(jol, window=window),
+        DriverConstructorMapAgent(),
+    ]
+
+
+def build_context(
+    jol: JolpicaService,
+    season: int,
+    round_no: int,
+    window: int = 5,
+    frame: Optional[ResultsFrame] = None,
+    store: Optional[FeatureStore] = None,
+) -> dict:
+    """
+    Runs the analysis agents for one race and returns a FusionAgent context.
+    With a `store`, precomputed features are used when the round has them.
+    """
+    if store is not None:
+        for context in stored_contexts(store, jol, season, [round_no], window):
+            return context
+
+    base = {"season": season, "round": round_no}
+    if frame is not None:
+        base["results_frame"] = frame
+
+    context = Orchestrator(analysis_agents(FetchMemo(jol), window)).run(base)
+    return {
+        key: context[key]
+        for key in ("season", "round", "circuit", "drivers", "constructors", "driver_to_constructor")
+    }
+
+
+def run_prediction(
+    jol: JolpicaService,
+    season: int,
+    round_no: int,
+    window: int = 5,
+    store: Optional[FeatureStore] = None,
+    max_workers: int = 4,
+    pace: Optional[PaceStore] = None,
+) -> dict:
+    """
+    Runs the full agent graph for one race: analysis agents (skipped when
+    the store has the round), then fusion and explanation. With a `pace`
+    store, the weekend's FastF1 pace features are added under "pace".
+    Returns the context with every agent output plus per-agent wall times
+    ("timings").
+    """
+    # One fetch memo per run: no payload is requested twice across agents
+    memo = FetchMemo(jol)
+    context = {"season": season, "round": round_no}
+
+    with metrics.trace("prediction", season=season, round=round_no):
+        if store is not None:
+            with metrics.timed("feature_store_read_seconds", span="feature_store"):
+                for stored in stored_contexts(store, memo, season, [round_no], window):
+                    context.update(stored)
+
+        features = "store" if "circuit" in context else "agents"
+        agents: List[BaseAgent] = [FusionAgent(), ExplainabilityAgent()]
+        if features == "agents":
+            agents = analysis_agents(memo, window) + agents
+        if pace is not None:
+            agents.append(PaceAgent(pace))
+        context = Orchestrator(agents, max_workers=max_workers).run(context)
+
+    metrics.incr("predictions_total", features=features)
+    return context
+
+
+def window_frame(jol: JolpicaService, season: int, cross_season: bool = False) -> ResultsFrame:
+    """
+    The season's frame, prefixed with the previous season when the
+    driver/constructor window may cross the season boundary.
+    """
+    frame = ResultsFrame.from_jolpica(jol, season)
+    if not cross_season:
+        return frame
+    return ResultsFrame.concat([ResultsFrame.from_jolpica(jol, season - 1), frame])
+
+
+def next_race(jol: JolpicaService, season: int, frame: Optional[ResultsFrame] = None) -> Optional[int]:
+    """
+    The first calendar round of `season` after its last one with results;
+    None once every round has been run.
+    """
+    if frame is None:
+        frame = ResultsFrame.from_jolpica(jol, season)
+    raced = frame.round[frame.season == season]
+    latest = int(raced.max()) if len(raced) else 0
+    calendar = [int(r["round"]) for r in jol.races(season)["MRData"]["RaceTable"]["Races"]]
+    return min((r for r in calendar if r > latest), default=None)
+
+
+def predictable_rounds(jol: JolpicaService, season: int, frame: Optional[ResultsFrame] = None) -> List[int]:
+    """
+    Rounds of `season` with a prediction: every round with results, plus the
+    next race (its features only need the races before it).
+    """
+    if frame is None:
+        frame = ResultsFrame.from_jolpica(jol, season)
+    rounds = [int(r) for r in np.unique(frame.round[frame.season == season])]
+    upcoming = next_race(jol, season, frame)
+    return rounds if upcoming is None else rounds + [upcoming]
+
+
+def season_contexts(
+    jol: JolpicaService,
+    season: int,
+    rounds: Optional[Iterable[int]] = None,
+    window: int = 5,
+    cross_season: bool = False,
+    frame: Optional[ResultsFrame] = None,
+) -> Iterator[dict]:
+    """
+    FusionAgent contexts for the requested rounds of a season (default and
+    at most: its predictable_rounds). Driver and constructor features come
+    from one incremental sweep over the season instead of a window rebuild
+    per round.
+    """
+    if frame is None:
+        frame = window_frame(jol, season, cross_season)
+    wanted = None if rounds is None else set(rounds)
+    # Earlier seasons' frames are shared by every round's circuit editions
+    circuit_agent = CircuitAgent(FetchMemo(jol))
+    upcoming = next_race(jol, season, frame)
+
+    races = sweep(frame, window, cross_season, None if upcoming is None else (season, upcoming))
+    for s, round_no, drivers, constructors in races:
+        if s != season or (wanted is not None and round_no not in wanted):
+            continue
+
+        try:
+            circuit = circuit_agent.run({"season": s, "round": round_no, "results_frame": frame})
+        except StopIteration:
+            # Round missing from the calendar
+            continue
+
+        yield {
+            "season": s,
+            "round": round_no,
+            "circuit": circuit,
+            "drivers": drivers,
+            "constructors": constructors,
+            "driver_to_constructor": driver_constructor_map(frame, s, round_no),
+        }
+
+
+# Upper bound on one season's feature sweep; a crashed holder frees the lock after it
+FILL_LOCK_EXPIRE = 600
+
+
+def stored_contexts(
+    store: FeatureStore,
+    jol: JolpicaService,
+    season: int,
+    rounds: Optional[Iterable[int]] = None,
+    window: int = 5,
+    cross_season: bool = False,
+    revalidate: bool = False,
+    cache: Optional[CacheService] = None,
+) -> List[dict]:
+    """
+    season_contexts read through the feature store.
+
+    Requested rounds already in the store are served from disk without
+    touching results, unless `revalidate` is set. Otherwise the season is
+    recomputed and rewritten when its results (the rounds with results, or
+    an amended one) have changed since it was stored. With a `cache`, this
+    runs under a lock in it, so processes asking for the same season at
+    once sweep it a single time and the others read its rows.
+    """
+    if cache is not None:
+        name = f"features::{season}::w{window}{'x' if cross_season else ''}"
+        with cache.lock(name, expire=FILL_LOCK_EXPIRE):
+            return stored_contexts(store, jol, season, rounds, window, cross_season, revalidate)
+
+    wanted = None if rounds is None else sorted(set(rounds))
+    index = store.index(season, window, cross_season)
+
+    if not revalidate and index is not None and wanted is not None and set(wanted) <= set(index["rounds"]):
+        contexts = store.read(season, wanted, window, cross_season)
+        if contexts is not None:
+            return contexts
+
+    frame = window_frame(jol, season, cross_season)
+    source = frame.fingerprint()
+
+    if index is not None and index.get("source") == source:
+        contexts = store.read(season, wanted, window, cross_season)
+        if contexts is not None:
+            return contexts
+
+    source_rounds = [int(r) for r in np.unique(frame.round[frame.season == season])]
+    contexts = list(season_contexts(jol, season, None, window, cross_season, frame=frame))
+    store.write(season, contexts, window, cross_season, source_rounds, source)
+    return [c for c in contexts if wanted is None or c["round"] in wanted]
+
+
+def predict_contexts(contexts: List[dict], pace: Optional[PaceStore] = None) -> List[dict]:
+    """
+    Fusion (one batched pass) and explanation for precomputed contexts, e.g.
+    from stored_contexts. With a `pace` store, each weekend's FastF1 pace
+    features are added under "pace" first, as run_prediction does.
+    """
+    pace_agent = None if pace is None else PaceAgent(pace)
+    explainer = ExplainabilityAgent()
+    predicted = []
+    for context, prediction in zip(contexts, FusionAgent().run_batch(contexts)):
+        context = {**context, "prediction": prediction}
+        if pace_agent is not None:
+            context["pace"] = pace_agent.run(context)
+        context["explanation"] = explainer.run(context)
+        predicted.append(context)
+    return predicted
+
+
+def predict_rounds(
+    jol: JolpicaService,
+    seasons: Iterable[int],
+    rounds: Optional[Iterable[int]] = None,
+    window: int = 5,
+    cross_season: bool = False,
+    store: Optional[FeatureStore] = None,
+) -> Dict[Tuple[int, int], Dict]:
+    """
+    Predicts every requested (season, round) with a single FusionAgent batch.
+
+    `rounds` defaults to the predictable_rounds of each season; other
+    rounds (later races, or not on the calendar) are skipped. With a
+    `store`, features come from the feature store.
+    """
+    rounds = None if rounds is None else list(rounds)
+    contexts: List[dict] = []
+    for season in seasons:
+        if store is not None:
+            contexts += stored_contexts(store, jol, season, rounds, window, cross_season)
+        else:
+            contexts += season_contexts(jol, season, rounds, window, cross_season)
+
+    predictions = FusionAgent().run_batch(contexts)
+    return {(c["season"], c["round"]): p for c, p in zip(contexts, predictions)}
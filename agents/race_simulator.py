@@ -0,0 +1,150 @@
+from agents.base_agent import BaseAgent
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Sequence
+import os
+import numpy as np
+
+# Race points for P1..P10
+POINTS = np.array([25, 18, 15, 12, 10, 8, 6, 4, 2, 1], dtype=float)
+
+# Sampling weight of a driver whose fused probability rounds to 0.0 (below
+# 0.0005): still possible, and below every probability the model reports
+WEIGHT_FLOOR = 1e-4
+
+# Pushes a retired car behind every classified one
+_DNF_OFFSET = np.float32(1e4)
+
+CHUNK_SIZE = 1 << 17
+
+
+def sample_finishing_orders(
+    log_weights: np.ndarray,
+    dnf_prob: np.ndarray,
+    temperature: float,
+    size: int,
+    rng: np.random.Generator,
+) -> np.ndarray:
+    """
+    Plackett–Luce finishing orders via the Gumbel-max trick.
+
+    log_weights and dnf_prob broadcast to [..., n]; returns driver indices in
+    finishing order with shape [size, ..., n]. A temperature above 1 flattens
+    the field (more chaos); DNFs are drawn per car and classified last.
+    """
+    shape = (size,) + np.broadcast_shapes(np.shape(log_weights), np.shape(dnf_prob))
+
+    with np.errstate(divide="ignore"):
+        keys = -np.log(-np.log(rng.random(shape, dtype=np.float32)))
+    keys += (np.asarray(log_weights) / temperature).astype(np.float32)
+
+    if np.any(dnf_prob):
+        retired = rng.random(shape, dtype=np.float32) < np.asarray(dnf_prob, dtype=np.float32)
+        np.subtract(keys, _DNF_OFFSET, out=keys, where=retired)
+
+    return np.argsort(-keys, axis=-1)
+
+
+def position_counts(orders: np.ndarray) -> np.ndarray:
+    """
+    counts[driver, position] over the leading (simulation) axis of [S, n] orders.
+    """
+    n = orders.shape[-1]
+    flat = (orders * n + np.arange(n)).ravel()
+    return np.bincount(flat, minlength=n * n).reshape(n, n)
+
+
+def simulate_positions(
+    log_weights: np.ndarray,
+    dnf_prob: np.ndarray,
+    temperature: float = 1.0,
+    n_sims: int = 100_000,
+    seed: Optional[int] = None,
+    chunk_size: int = CHUNK_SIZE,
+    workers: Optional[int] = None,
+) -> np.ndarray:
+    """
+    Probability of each driver finishing in each position, shape [n, n].
+
+    Simulations run in chunks (bounded memory), each with its own child seed,
+    so results depend only on `seed` and not on the number of worker threads.
+    """
+    sizes = [min(chunk_size, n_sims - start) for start in range(0, n_sims, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    def run_chunk(i: int) -> np.ndarray:
+        rng = np.random.default_rng(seeds[i])
+        return position_counts(
+            sample_finishing_orders(log_weights, dnf_prob, temperature, sizes[i], rng)
+        )
+
+    workers = workers or min(len(sizes), os.cpu_count() or 1)
+    if workers <= 1:
+        counts = sum(run_chunk(i) for i in range(len(sizes)))
+    else:
+        # NumPy releases the GIL in the sort and the ufuncs
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            counts = sum(pool.map(run_chunk, range(len(sizes))))
+
+    return counts / max(1, n_sims)
+
+
+class RaceSimulatorAgent(BaseAgent):
+    """
+    Monte Carlo race simulator.
+
+    Samples complete finishing orders from the FusionAgent win
+    probabilities, injecting DNFs from each driver's dnf_risk and extra
+    chaos from the circuit's safety_car_risk. Returns per-position
+    probabilities, podium odds and expected points.
+    """
+
+    inputs = ("prediction", "drivers", "circuit")
+    output = "simulation"
+
+    def __init__(self, n_sims: int = 100_000, seed: Optional[int] = None, chaos: float = 1.0):
+        super().__init__("RaceSimulatorAgent")
+        self.n_sims = n_sims
+        self.seed = seed
+        self.chaos = chaos
+
+    def run(self, context: dict) -> Dict:
+        prediction = context.get("prediction") or {}
+        drivers = context.get("drivers") or {}
+        circuit = context.get("circuit") or {}
+
+        probabilities = prediction.get("probabilities") or {}
+        names: Sequence[str] = list(probabilities)
+        if not names:
+            return {"n_sims": 0, "podium": [], "drivers": {}}
+
+        log_weights = np.log(np.maximum([probabilities[d] for d in names], WEIGHT_FLOOR))
+        dnf_prob = np.clip(
+            [float((drivers.get(d) or {}).get("dnf_risk", 0.0)) for d in names], 0.0, 1.0
+        )
+        temperature = 1.0 + self.chaos * float(circuit.get("safety_car_risk", 0.0))
+
+        positions = simulate_positions(
+            log_weights, dnf_prob, temperature, n_sims=self.n_sims, seed=self.seed
+        )
+
+        n = len(names)
+        podium_odds = positions[:, :3].sum(axis=1)
+        expected_points = positions[:, :len(POINTS)] @ POINTS[:n]
+        expected_position = positions @ np.arange(1, n + 1)
+
+        podium = np.argsort(-podium_odds, kind="stable")[:3]
+
+        return {
+            "n_sims": self.n_sims,
+            "podium": [names[i] for i in podium],
+            "drivers": {
+                d: {
+                    "win": round(float(positions[i, 0]), 4),
+                    "podium": round(float(podium_odds[i]), 4),
+                    "expected_points": round(float(expected_points[i]), 3),
+                    "expected_position": round(float(expected_position[i]), 3),
+                    "positions": [round(float(p), 4) for p in positions[i]],
+                }
+                for i, d in enumerate(names)
+            },
+        }
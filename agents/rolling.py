@@ -0,0 +1,201 @@
+from __future__ import annotations
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Iterator, Optional, Tuple
+import numpy as np
+
+from services.results_frame import ResultsFrame
+
+
+@dataclass
+class RollingWindow:
+    """
+    Incremental DriverAgent / ConstructorAgent statistics over a sliding
+    window of races.
+
+    Keeps running sums, sums of squares, counts and DNF tallies per driver
+    and constructor; `push` adds a race and `evict` drops the oldest, each in
+    O(entities). With `cross_season` the window runs over the chronological
+    race sequence across season boundaries; otherwise it matches the agents'
+    own window of the previous `window` round numbers of the same season.
+    """
+
+    frame: ResultsFrame
+    window: int = 5
+    cross_season: bool = False
+    _races: Deque[Tuple[int, int]] = field(init=False, default_factory=deque)
+
+    def __post_init__(self):
+        f = self.frame
+        # Rows are grouped by race in chronological order
+        keys = np.stack([f.season.astype(np.int64), f.round.astype(np.int64)], axis=1)
+        change = np.flatnonzero(np.any(keys[1:] != keys[:-1], axis=1)) + 1
+        starts = np.concatenate([[0], change])
+        ends = np.concatenate([change, [len(f)]])
+        self._slices: Dict[Tuple[int, int], slice] = {
+            (int(f.season[s]), int(f.round[s])): slice(int(s), int(e))
+            for s, e in zip(starts, ends) if e > s
+        }
+
+        nd, nc = len(f.drivers), len(f.constructors)
+        # Drivers: entries with grid & finish, their sums, squares and grid gain
+        self._d_n = np.zeros(nd)
+        self._d_sum = np.zeros(nd)
+        self._d_sq = np.zeros(nd)
+        self._d_gain = np.zeros(nd)
+        self._d_dnf = np.zeros(nd)
+        # Constructors: classified finishes, scored points and DNFs
+        self._c_n = np.zeros(nc)
+        self._c_sum = np.zeros(nc)
+        self._c_pn = np.zeros(nc)
+        self._c_points = np.zeros(nc)
+        self._c_dnf = np.zeros(nc)
+
+    @property
+    def races(self) -> Tuple[Tuple[int, int], ...]:
+        return tuple(self._races)
+
+    def races_in_order(self) -> Tuple[Tuple[int, int], ...]:
+        return tuple(self._slices)
+
+    # -------- Updates -------- #
+
+    def _apply(self, race: Tuple[int, int], sign: float) -> None:
+        f = self.frame
+        rows = self._slices[race]
+        nd, nc = len(f.drivers), len(f.constructors)
+
+        driver, team = f.driver[rows], f.constructor[rows]
+        grid, position, points = f.grid[rows], f.position[rows], f.points[rows]
+        not_finished = ~f.finished[rows]
+
+        paired = (grid >= 0) & (position >= 0)
+        d = driver[paired]
+        finishes = position[paired].astype(float)
+        self._d_n += sign * np.bincount(d, minlength=nd)
+        self._d_sum += sign * np.bincount(d, weights=finishes, minlength=nd)
+        self._d_sq += sign * np.bincount(d, weights=finishes * finishes, minlength=nd)
+        self._d_gain += sign * np.bincount(d, weights=grid[paired] - finishes, minlength=nd)
+        self._d_dnf += sign * np.bincount(driver, weights=not_finished, minlength=nd)
+
+        classified = position >= 0
+        scored = ~np.isnan(points)
+        self._c_n += sign * np.bincount(team[classified], minlength=nc)
+        self._c_sum += sign * np.bincount(team[classified], weights=position[classified], minlength=nc)
+        self._c_pn += sign * np.bincount(team[scored], minlength=nc)
+        self._c_points += sign * np.bincount(team[scored], weights=points[scored], minlength=nc)
+        self._c_dnf += sign * np.bincount(team, weights=not_finished, minlength=nc)
+
+    def push(self, season: int, round_no: int) -> None:
+        race = (season, round_no)
+        if race in self._slices:
+            self._apply(race, 1.0)
+            self._races.append(race)
+
+    def evict(self) -> None:
+        self._apply(self._races.popleft(), -1.0)
+
+    def advance_to(self, season: int, round_no: int) -> None:
+        """
+        Evicts races that fall outside the window for the target race.
+        """
+        while self._races:
+            old_season, old_round = self._races[0]
+            if self.cross_season:
+                stale = len(self._races) > self.window
+            else:
+                stale = old_season != season or old_round < round_no - self.window
+            if not stale:
+                break
+            self.evict()
+
+    def _n_rounds(self, round_no: int) -> int:
+        if self.cross_season:
+            return len(self._races)
+        return len(range(max(1, round_no - self.window), round_no))
+
+    # -------- Features -------- #
+
+    def _window_codes(self, column: np.ndarray) -> np.ndarray:
+        if not self._races:
+            return np.empty(0, dtype=np.int64)
+        lo = self._slices[self._races[0]].start
+        hi = self._slices[self._races[-1]].stop
+        return ResultsFrame.first_seen(column[lo:hi])
+
+    def driver_features(self, round_no: int) -> Dict[str, Dict]:
+        """
+        Same output as DriverAgent.run for the target round.
+        """
+        n = np.maximum(self._d_n, 1)
+        avg_finish = self._d_sum / n
+        std = np.sqrt(np.maximum(self._d_sq / n - avg_finish * avg_finish, 0.0))
+        consistency = 1 / (1 + std)
+        dnf_risk = self._d_dnf / max(1, self._n_rounds(round_no))
+        delta = self._d_gain / n
+        form_score = 1 / (1 + avg_finish)
+
+        output = {}
+        for code in self._window_codes(self.frame.driver):
+            if self._d_n[code] <= 0:
+                continue
+            driver_id = self.frame.drivers[code]
+            output[driver_id] = {
+                "driver_id": driver_id,
+                "avg_finish": round(float(avg_finish[code]), 3),
+                "consistency": round(float(consistency[code]), 3),
+                "dnf_risk": round(float(dnf_risk[code]), 3),
+                "qualifying_delta": round(float(delta[code]), 3),
+                "form_score": round(float(form_score[code]), 3),
+                "race_count": int(round(self._d_dnf[code]))
+            }
+        return output
+
+    def constructor_features(self, round_no: int) -> Dict[str, Dict]:
+        """
+        Same output as ConstructorAgent.run for the target round.
+        """
+        avg_finish = self._c_sum / np.maximum(self._c_n, 1)
+        points_per_race = self._c_points / np.maximum(self._c_pn, 1)
+        dnf_rate = self._c_dnf / max(1, self._n_rounds(round_no) * 2)
+        dominance_score = (1 / (1 + avg_finish)) * (1 + points_per_race / 25)
+
+        output = {}
+        for code in self._window_codes(self.frame.constructor):
+            if self._c_n[code] <= 0:
+                continue
+            output[self.frame.constructors[code]] = {
+                "avg_finish": round(float(avg_finish[code]), 3),
+                "points_per_race": round(float(points_per_race[code]), 3),
+                "dnf_rate": round(float(dnf_rate[code]), 3),
+                "dominance_score": round(float(dominance_score[code]), 3)
+            }
+        return output
+
+
+def sweep(
+    frame: ResultsFrame,
+    window: int = 5,
+    cross_season: bool = False,
+    upcoming: Optional[Tuple[int, int]] = None,
+) -> Iterator[Tuple[int, int, Dict[str, Dict], Dict[str, Dict]]]:
+    """
+    Walks every race of the frame in order, yielding
+    (season, round, driver features, constructor features) computed from the
+    window before that race, then pushing the race into the window.
+    `upcoming`, a race without results after the frame's last one, is
+    yielded last. Linear in the number of races.
+    """
+    rolling = RollingWindow(frame, window=window, cross_season=cross_season)
+    races = list(rolling.races_in_order())
+    if upcoming is not None:
+        races.append(upcoming)
+    for season, round_no in races:
+        rolling.advance_to(season, round_no)
+        yield (
+            season,
+            round_no,
+            rolling.driver_features(round_no),
+            rolling.constructor_features(round_no),
+        )
+        rolling.push(season, round_no)
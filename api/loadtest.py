@@ -0,0 +1,88 @@
+from __future__ import annotations
+from collections import Counter
+from typing import Dict, List, Tuple
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import aiohttp
+import numpy as np
+
+from services.ranges import int_range
+
+
+async def _worker(
+    session: aiohttp.ClientSession,
+    base_url: str,
+    queue: "asyncio.Queue[Tuple[int, int]]",
+    latencies: List[float],
+    statuses: Counter,
+) -> None:
+    while True:
+        try:
+            season, round_no = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        start = time.perf_counter()
+        try:
+            async with session.get(f"{base_url}/predict", params={"season": season, "round": round_no}) as r:
+                await r.read()
+                statuses[r.status] += 1
+        except aiohttp.ClientError as e:
+            statuses[type(e).__name__] += 1
+        latencies.append(time.perf_counter() - start)
+
+
+async def run(
+    base_url: str, races: List[Tuple[int, int]], requests: int, concurrency: int, seed: int = 0
+) -> Dict:
+    """
+    `requests` GET /predict calls over `races` (drawn at random, so popular
+    races repeat) from `concurrency` clients. Returns throughput, latency
+    percentiles and status counts.
+    """
+    rng = random.Random(seed)
+    queue: "asyncio.Queue[Tuple[int, int]]" = asyncio.Queue()
+    for _ in range(requests):
+        queue.put_nowait(rng.choice(races))
+
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            _worker(session, base_url, queue, latencies, statuses) for _ in range(concurrency)
+        ))
+        elapsed = time.perf_counter() - start
+
+    ms = np.array(latencies) * 1000
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 3),
+        "requests_per_s": round(requests / elapsed, 1) if elapsed > 0 else None,
+        "latency_ms": {p: round(float(np.percentile(ms, q)), 2) for p, q in (("p50", 50), ("p90", 90), ("p99", 99))},
+        "status": {str(k): v for k, v in sorted(statuses.items(), key=str)},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the prediction service")
+    parser.add_argument("--url", default="http://127.0.0.1:8080")
+    parser.add_argument("--seasons", type=int_range, default=[2024], help="e.g. 2024 or 2021-2024")
+    parser.add_argument("--rounds", type=int, default=24, help="rounds 1..N of each season")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    races = [(s, r) for s in args.seasons for r in range(1, args.rounds + 1)]
+    result = asyncio.run(run(args.url.rstrip("/"), races, args.requests, args.concurrency, args.seed))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,389 @@
+from __future__ import annotations
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+import argparse
+import asyncio
+import json
+import time
+
+from aiohttp import web
+
+from agents.model_version import FEATURE_VERSION, MODEL_VERSION, PACE_VERSION
+from agents.pipeline import next_race, predict_contexts, run_prediction, stored_contexts
+from config.settings import settings
+from services import metrics
+from services.cache_service import CacheService
+from services.feature_store import FeatureStore
+from services.jolpica_service import JolpicaService
+from services.pace_features import PaceStore
+from services.ranges import int_range
+
+# -------- Worker process state -------- #
+# Each worker holds its own services (and so its own Jolpica rate budget);
+# the disk cache and feature store are shared between them on disk.
+
+_WORKER: Dict = {}
+
+
+def _init_worker(cache_dir: str, window: int) -> None:
+    cache = CacheService(cache_dir)
+    _WORKER.update(
+        jol=JolpicaService(cache),
+        store=FeatureStore(version=FEATURE_VERSION),
+        pace=PaceStore(version=PACE_VERSION),
+        window=window,
+    )
+
+
+def _call(fn: Callable[..., Any], *args: Any) -> Tuple[Any, Dict[str, Any]]:
+    """
+    fn(*args) plus the metrics the worker recorded since its last call, for
+    the parent's /metrics. A failed call's metrics go out with the next one.
+    """
+    # Agents raise StopIteration for a round missing from the calendar; it cannot
+    # cross into an asyncio future, so it is reported as a lookup failure
+    try:
+        result = fn(*args)
+    except StopIteration:
+        raise LookupError(f"race not found: {args}") from None
+    return result, metrics.drain()
+
+
+class NotPredictable(Exception):
+    """
+    A calendar round past the next race: there is nothing to predict it from yet.
+    """
+
+
+def _record(context: Dict[str, Any]) -> Dict[str, Any]:
+    # One response shape for single and swept predictions, which share the cache
+    return {key: context.get(key) for key in ("season", "round", "circuit", "prediction", "explanation", "pace")}
+
+
+def _predict(season: int, round_no: int) -> Dict[str, Any]:
+    """
+    One race through the full agent graph: a round with results or the next
+    race (NotPredictable for later rounds).
+    """
+    jol = _WORKER["jol"]
+    upcoming = next_race(jol, season)
+    if upcoming is not None and round_no > upcoming:
+        raise NotPredictable(f"{season} round {round_no} has no results and is not the next race (round {upcoming})")
+    context = run_prediction(
+        jol, season, round_no, window=_WORKER["window"], store=_WORKER["store"], pace=_WORKER["pace"]
+    )
+    return _record(context)
+
+
+def _sweep(season: int, rounds: Optional[List[int]]) -> List[Dict[str, Any]]:
+    """
+    Every requested predictable round of a season (all of them when `rounds`
+    is None), from the feature store with one batched fusion pass.
+    """
+    contexts = stored_contexts(_WORKER["store"], _WORKER["jol"], season, rounds, _WORKER["window"])
+    return [_record(context) for context in predict_contexts(contexts, _WORKER["pace"])]
+
+
+# -------- Request cache and worker pool -------- #
+
+@dataclass
+class ResponseCache:
+    """
+    Finished predictions in a bounded LRU with a TTL. Identical requests
+    arriving while one is being computed await that computation instead of
+    starting their own; it keeps running if its first requester disconnects.
+    """
+
+    max_entries: int = settings.API_CACHE_ENTRIES
+    ttl: float = settings.API_CACHE_TTL
+    _entries: "OrderedDict[Hashable, Tuple[float, Any]]" = field(init=False, default_factory=OrderedDict)
+    _pending: Dict[Hashable, asyncio.Future] = field(init=False, default_factory=dict)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _finish(self, key: Hashable, task: asyncio.Future) -> None:
+        self._pending.pop(key, None)
+        # exception() also marks a failure as retrieved when nobody awaited it
+        if not task.cancelled() and task.exception() is None:
+            self.put(key, task.result())
+
+    async def get_or_compute(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        value = self.get(key)
+        if value is not None:
+            metrics.incr("api_cache_total", result="hit")
+            return value
+
+        task = self._pending.get(key)
+        if task is None:
+            metrics.incr("api_cache_total", result="miss")
+            task = self._pending[key] = asyncio.ensure_future(compute())
+            task.add_done_callback(lambda t: self._finish(key, t))
+        else:
+            metrics.incr("api_cache_total", result="coalesced")
+        return await asyncio.shield(task)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class Saturated(Exception):
+    pass
+
+
+@dataclass
+class WorkerPool:
+    """
+    Process pool for the agent pipeline with a cap on queued + running
+    tasks: past `max_pending`, new work is refused (Saturated) instead of
+    queueing without bound.
+    """
+
+    workers: int = settings.API_WORKERS
+    max_pending: int = settings.API_MAX_PENDING
+    cache_dir: str = str(settings.CACHE_DIR)
+    window: int = 5
+    pending: int = field(init=False, default=0)
+
+    def __post_init__(self):
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self.cache_dir, self.window),
+        )
+
+    def has_room(self, tasks: int = 1) -> bool:
+        return self.pending + tasks <= self.max_pending
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        if not self.has_room():
+            raise Saturated()
+        self.pending += 1
+        try:
+            result, recorded = await asyncio.get_running_loop().run_in_executor(self._executor, _call, fn, *args)
+        finally:
+            self.pending -= 1
+        metrics.merge(recorded)
+        return result
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+# -------- Service -------- #
+
+def _int_param(request: web.Request, name: str) -> int:
+    try:
+        return int(request.query[name])
+    except KeyError:
+        raise web.HTTPBadRequest(text=json.dumps({"error": f"missing '{name}'"}), content_type="application/json")
+    except ValueError:
+        raise web.HTTPBadRequest(text=json.dumps({"error": f"'{name}' must be an integer"}), content_type="application/json")
+
+
+def _error(status: int, message: str, **headers: str) -> web.Response:
+    return web.json_response({"error": message}, status=status, headers=headers or None)
+
+
+def _busy() -> web.Response:
+    return _error(503, "prediction workers saturated, retry later", **{"Retry-After": "1"})
+
+
+@dataclass
+class PredictionService:
+    """
+    HTTP front end of the agent pipeline:
+
+        GET  /predict?season=&round=    one race (with results, or the next one)
+        POST /predict/batch             {"races": [{"season":, "round":}, ...]}
+        GET  /stream?seasons=&rounds=   NDJSON, one line per predicted round
+        GET  /healthz, /metrics
+
+    Responses are cached per (model version, season, round); cache hits are
+    served even while the worker pool is saturated.
+    """
+
+    pool: WorkerPool
+    cache: ResponseCache = field(default_factory=ResponseCache)
+    batch_limit: int = settings.API_BATCH_LIMIT
+
+    def _key(self, season: int, round_no: int) -> Tuple[str, int, int, int]:
+        return (MODEL_VERSION, self.pool.window, season, round_no)
+
+    async def _predict(self, season: int, round_no: int) -> Dict[str, Any]:
+        return await self.cache.get_or_compute(
+            self._key(season, round_no), lambda: self.pool.run(_predict, season, round_no)
+        )
+
+    async def _sweep(self, season: int, rounds: Optional[List[int]]) -> List[Dict[str, Any]]:
+        records = await self.pool.run(_sweep, season, rounds)
+        for record in records:
+            self.cache.put(self._key(season, record["round"]), record)
+        return records
+
+    # ---- Handlers ----
+
+    async def predict(self, request: web.Request) -> web.Response:
+        season, round_no = _int_param(request, "season"), _int_param(request, "round")
+        try:
+            record = await self._predict(season, round_no)
+        except Saturated:
+            return _busy()
+        except LookupError:
+            return _error(404, f"no race {round_no} in {season}")
+        except NotPredictable as e:
+            return _error(422, str(e))
+        except Exception as e:
+            return _error(502, f"prediction failed: {e}")
+
+        if not record.get("prediction") or record["prediction"].get("winner") is None:
+            return _error(404, f"no data for {season} round {round_no}")
+        return web.json_response(record)
+
+    async def batch(self, request: web.Request) -> web.Response:
+        try:
+            body = await request.json()
+            pairs = [(int(r["season"]), int(r["round"])) for r in body["races"]]
+        except (ValueError, KeyError, TypeError):
+            return _error(400, 'expected {"races": [{"season": int, "round": int}, ...]}')
+        if len(pairs) > self.batch_limit:
+            return _error(413, f"at most {self.batch_limit} races per batch")
+
+        records: Dict[Tuple[int, int], Any] = {}
+        by_season: Dict[int, List[int]] = {}
+        for season, round_no in pairs:
+            record = self.cache.get(self._key(season, round_no))
+            if record is not None:
+                records[(season, round_no)] = record
+            else:
+                by_season.setdefault(season, []).append(round_no)
+
+        if not self.pool.has_room(len(by_season)):
+            return _busy()
+
+        # One batched sweep per season; rounds it does not cover go one by one (and fail with a reason)
+        swept = await asyncio.gather(
+            *(self._sweep(season, rounds) for season, rounds in by_season.items()), return_exceptions=True
+        )
+        for (season, rounds), result in zip(by_season.items(), swept):
+            done = {} if isinstance(result, BaseException) else {r["round"]: r for r in result}
+            for round_no in rounds:
+                if round_no in done:
+                    records[(season, round_no)] = done[round_no]
+
+        missing = [pair for pair in dict.fromkeys(pairs) if pair not in records]
+        if not self.pool.has_room(len(missing)):
+            return _busy()
+        singles = await asyncio.gather(*(self._predict(*pair) for pair in missing), return_exceptions=True)
+        for pair, result in zip(missing, singles):
+            records[pair] = (
+                {"season": pair[0], "round": pair[1], "error": str(result) or type(result).__name__}
+                if isinstance(result, BaseException) else result
+            )
+
+        return web.json_response({"predictions": [records[pair] for pair in pairs]})
+
+    async def stream(self, request: web.Request) -> web.StreamResponse:
+        try:
+            seasons = int_range(request.query["seasons"])
+            rounds = int_range(request.query["rounds"]) if "rounds" in request.query else None
+        except KeyError:
+            return _error(400, "missing 'seasons'")
+        except ValueError:
+            return _error(400, "'seasons' and 'rounds' take e.g. 2024, 2021-2024 or 1,3,5-7")
+        if not self.pool.has_room(len(seasons)):
+            return _busy()
+
+        # All seasons start at once; lines are written in season order as they finish
+        sweeps = [asyncio.ensure_future(self._sweep(season, rounds)) for season in seasons]
+        response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+        await response.prepare(request)
+        try:
+            for season, sweep in zip(seasons, sweeps):
+                try:
+                    lines = [json.dumps(record) for record in await sweep]
+                except Exception as e:
+                    lines = [json.dumps({"season": season, "error": str(e) or type(e).__name__})]
+                await response.write("".join(line + "\n" for line in lines).encode())
+        finally:
+            for sweep in sweeps:
+                sweep.cancel()
+        await response.write_eof()
+        return response
+
+    async def healthz(self, request: web.Request) -> web.Response:
+        return web.json_response({
+            "model_version": MODEL_VERSION,
+            "workers": self.pool.workers,
+            "pending": self.pool.pending,
+            "max_pending": self.pool.max_pending,
+            "cached": len(self.cache),
+        })
+
+    async def metrics(self, request: web.Request) -> web.Response:
+        return web.Response(text=metrics.prometheus_text(), content_type="text/plain")
+
+    # ---- App ----
+
+    @web.middleware
+    async def _instrument(self, request: web.Request, handler) -> web.StreamResponse:
+        endpoint = request.match_info.route.resource.canonical if request.match_info.route.resource else "unknown"
+        status = 500
+        with metrics.timed("api_request_seconds", endpoint=endpoint):
+            try:
+                response = await handler(request)
+                status = response.status
+                return response
+            except web.HTTPException as e:
+                status = e.status
+                raise
+            finally:
+                metrics.incr("api_requests_total", endpoint=endpoint, status=status)
+
+    def app(self) -> web.Application:
+        app = web.Application(middlewares=[self._instrument])
+        app.router.add_get("/predict", self.predict)
+        app.router.add_post("/predict/batch", self.batch)
+        app.router.add_get("/stream", self.stream)
+        app.router.add_get("/healthz", self.healthz)
+        app.router.add_get("/metrics", self.metrics)
+
+        async def shutdown(app: web.Application) -> None:
+            self.pool.close()
+
+        app.on_cleanup.append(shutdown)
+        return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP prediction service")
+    parser.add_argument("--host", default=settings.API_HOST)
+    parser.add_argument("--port", type=int, default=settings.API_PORT)
+    parser.add_argument("--workers", type=int, default=settings.API_WORKERS)
+    parser.add_argument("--max-pending", type=int, default=settings.API_MAX_PENDING)
+    parser.add_argument("--window", type=int, default=5)
+    args = parser.parse_args()
+
+    pool = WorkerPool(workers=args.workers, max_pending=args.max_pending, window=args.window)
+    service = PredictionService(pool)
+    web.run_app(service.app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+import argparse
+import json
+import os
+
+import numpy as np
+
+from agents.fusion_agent import FusionAgent
+from agents.model_version import FEATURE_VERSION, MODEL_VERSION
+from agents.pipeline import stored_contexts
+from backtest.metrics import summarize
+from config.settings import settings
+from services.cache_policy import CachePolicy
+from services.cache_service import CacheService
+from services.feature_store import FeatureStore
+from services.jolpica_service import JolpicaService
+from services.results_frame import ResultsFrame
+
+# -------- Worker process state -------- #
+# Metrics recorded in workers are not sent back to this process (see README)
+
+_WORKER: Dict = {}
+
+
+def _init_worker(cache_dir: str, window: int, cross_season: bool) -> None:
+    cache = CacheService(cache_dir)
+    _WORKER.update(
+        cache=cache,
+        jol=JolpicaService(cache),
+        store=FeatureStore(version=FEATURE_VERSION),
+        window=window,
+        cross_season=cross_season,
+    )
+
+
+def actual_podium(frame: ResultsFrame, season: int, round_no: int) -> List[str]:
+    rows = frame.mask(season, [round_no]) & (frame.position >= 1) & (frame.position <= 3)
+    order = np.argsort(frame.position[rows], kind="stable")
+    return [frame.drivers[d] for d in frame.driver[rows][order]]
+
+
+def _replay_rounds(season: int, rounds: List[int], revalidate: bool = False) -> List[Dict]:
+    """
+    Predicts the given rounds of one season from the feature store and
+    attaches the actual outcome of each race. Chunks of the same season fill
+    the store under a shared lock: the first one sweeps the season (on a
+    miss, or when `revalidate` finds the results changed), the others then
+    read its rows.
+    """
+    jol = _WORKER["jol"]
+    frame = ResultsFrame.from_jolpica(jol, season)
+    fusion = FusionAgent()
+    records = []
+
+    contexts = stored_contexts(
+        _WORKER["store"], jol, season, rounds, _WORKER["window"], _WORKER["cross_season"], revalidate,
+        cache=_WORKER["cache"],
+    )
+
+    for context in contexts:
+        podium = actual_podium(frame, season, context["round"])
+        records.append({
+            "season": season,
+            "round": context["round"],
+            **fusion.run(context),
+            "actual_winner": podium[0] if podium else None,
+            "actual_podium": podium,
+        })
+    return records
+
+
+# -------- Engine -------- #
+
+@dataclass
+class BacktestEngine:
+    """
+    Replays every completed round of the given seasons through the agent
+    pipeline on a process pool and scores the predictions against the actual
+    results. Every feature comes from races before the one predicted, so the
+    scores are out of sample. Per-race records are cached by (model version,
+    window, season, round), so re-runs only compute rounds that are new or
+    whose model changed; current-season records expire after TTL_MED so
+    amended results are picked up.
+    """
+
+    cache: CacheService
+    window: int = 5
+    cross_season: bool = False
+    workers: Optional[int] = None
+    policy: CachePolicy = field(default_factory=CachePolicy)
+
+    def _key(self, season: int, round_no: int) -> str:
+        window = f"w{self.window}{'x' if self.cross_season else ''}"
+        return f"backtest::{MODEL_VERSION}::{window}::{season}::{round_no}"
+
+    def _ttl(self, season: int) -> Optional[int]:
+        # Past seasons are final; the current one can still be amended
+        return None if season < self.policy.current_season else settings.TTL_MED
+
+    def _rounds(self, seasons: Iterable[int]) -> List[Tuple[int, int]]:
+        jol = JolpicaService(self.cache)
+        try:
+            pairs = []
+            for season in seasons:
+                # Also warms the shared disk cache before workers start
+                frame = ResultsFrame.from_jolpica(jol, season)
+                pairs += [(season, int(r)) for r in np.unique(frame.round[frame.season == season])]
+            return pairs
+        finally:
+            jol.close()
+
+    def replay(self, seasons: Iterable[int]) -> List[Dict]:
+        pairs = self._rounds(seasons)
+        records = {pair: self.cache.get(self._key(*pair)) for pair in pairs}
+        missing = [pair for pair, record in records.items() if record is None]
+
+        by_season: Dict[int, List[int]] = {}
+        for season, round_no in missing:
+            by_season.setdefault(season, []).append(round_no)
+
+        if by_season:
+            # Chunks of rounds rather than whole seasons, about two per worker,
+            # so one long season does not leave the other workers idle
+            workers = self.workers or os.cpu_count()
+            size = max(1, -(-len(missing) // (2 * workers)))
+            chunks = [
+                (season, rounds[i:i + size])
+                for season, rounds in by_season.items()
+                for i in range(0, len(rounds), size)
+            ]
+            with ProcessPoolExecutor(
+                max_workers=min(len(chunks), workers),
+                initializer=_init_worker,
+                initargs=(self.cache.cache_dir, self.window, self.cross_season),
+            ) as pool:
+                futures = [
+                    pool.submit(_replay_rounds, s, r, self._ttl(s) is not None)
+                    for s, r in chunks
+                ]
+                for future in as_completed(futures):
+                    for record in future.result():
+                        pair = (record["season"], record["round"])
+                        self.cache.set(self._key(*pair), record, ttl=self._ttl(pair[0]))
+                        records[pair] = record
+
+        return [records[pair] for pair in pairs if records[pair] is not None]
+
+    def run(self, seasons: Iterable[int]) -> Dict:
+        records = self.replay(list(seasons))
+        return {
+            "model_version": MODEL_VERSION,
+            "window": self.window,
+            "cross_season": self.cross_season,
+            **summarize(records),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest the race predictor")
+    parser.add_argument("seasons", type=int, nargs="+")
+    parser.add_argument("--window", type=int, default=5)
+    parser.add_argument("--cross-season", action="store_true")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    cache = CacheService()
+    try:
+        report = BacktestEngine(
+            cache, window=args.window, cross_season=args.cross_season, workers=args.workers
+        ).run(args.seasons)
+    finally:
+        cache.close()
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+from typing import Dict, List, Sequence
+import numpy as np
+
+# Log loss charges a winner scored 0.0 as 0.001, the smallest probability the
+# 3-decimal fused output can state, so one longshot cannot dominate the mean
+LOG_LOSS_FLOOR = 1e-3
+
+
+def winner_hit_rate(records: Sequence[Dict]) -> float:
+    return float(np.mean([r["winner"] == r["actual_winner"] for r in records]))
+
+
+def podium_overlap(records: Sequence[Dict]) -> float:
+    """
+    Mean share of the actual podium found in the predicted podium (order ignored).
+    """
+    return float(np.mean([
+        len(set(r["podium"]) & set(r["actual_podium"])) / max(1, len(r["actual_podium"]))
+        for r in records
+    ]))
+
+
+def log_loss(records: Sequence[Dict]) -> float:
+    p = np.array([r["probabilities"].get(r["actual_winner"], 0.0) for r in records])
+    return float(np.mean(-np.log(np.clip(p, LOG_LOSS_FLOOR, 1.0))))
+
+
+def brier_score(records: Sequence[Dict]) -> float:
+    """
+    Multi-class Brier score of the win distribution; an actual winner the
+    model never scored counts as a predicted probability of 0.
+    """
+    scores = []
+    for r in records:
+        p = np.array(list(r["probabilities"].values()))
+        y = np.array([d == r["actual_winner"] for d in r["probabilities"]], dtype=float)
+        missed = 0.0 if r["actual_winner"] in r["probabilities"] else 1.0
+        scores.append(float(np.sum((p - y) ** 2)) + missed)
+    return float(np.mean(scores))
+
+
+def reliability_curve(records: Sequence[Dict], bins: int = 10) -> List[Dict]:
+    """
+    Calibration table over every (driver, race) win probability:
+    mean predicted probability vs observed win frequency per bin.
+    """
+    p = np.array([v for r in records for v in r["probabilities"].values()])
+    y = np.array([d == r["actual_winner"] for r in records for d in r["probabilities"]], dtype=float)
+
+    idx = np.minimum((p * bins).astype(int), bins - 1)
+    count = np.bincount(idx, minlength=bins)
+    mean_p = np.bincount(idx, weights=p, minlength=bins) / np.maximum(count, 1)
+    freq = np.bincount(idx, weights=y, minlength=bins) / np.maximum(count, 1)
+
+    return [
+        {
+            "bin": f"{b / bins:.1f}-{(b + 1) / bins:.1f}",
+            "count": int(count[b]),
+            "mean_predicted": round(float(mean_p[b]), 4),
+            "observed": round(float(freq[b]), 4),
+        }
+        for b in range(bins)
+        if count[b]
+    ]
+
+
+def summarize(records: Sequence[Dict]) -> Dict:
+    scored = [r for r in records if r["winner"] is not None and r["actual_winner"]]
+    if not scored:
+        return {"races": 0, "skipped": len(records)}
+
+    return {
+        "races": len(scored),
+        "skipped": len(records) - len(scored),
+        "winner_hit_rate": round(winner_hit_rate(scored), 4),
+        "podium_overlap": round(podium_overlap(scored), 4),
+        "log_loss": round(log_loss(scored), 4),
+        "brier_score": round(brier_score(scored), 4),
+        "reliability": reliability_curve(scored),
+    }
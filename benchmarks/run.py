@@ -0,0 +1,266 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from pathlib import Path
+from statistics import median
+from typing import Any, Callable, Dict, Optional
+import argparse
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+# Offline by construction: anything not seeded fails fast instead of reaching the API
+os.environ.setdefault("JOLPICA_BASE", "http://127.0.0.1:9/offline")
+os.environ.setdefault("JOLPICA_MAX_RETRY_AFTER", "0")
+
+import numpy as np
+
+from agents.circuit_agent import CircuitAgent
+from agents.constructor_agent import ConstructorAgent
+from agents.driver_agent import DriverAgent
+from agents.fusion_agent import FusionAgent
+from agents.model_version import MODEL_VERSION
+from agents.pipeline import predict_rounds, run_prediction, season_contexts
+from agents.race_simulator import RaceSimulatorAgent
+from benchmarks.synthetic import SyntheticJolpica
+from services.cache_policy import cache_key
+from services.cache_service import CacheService
+from services.feature_store import FeatureStore
+from services.jolpica_service import JolpicaService
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+@dataclass(frozen=True)
+class Scale:
+    name: str
+    seasons: int
+    rounds: int
+    drivers: int
+    n_sims: int
+
+
+SCALES = {
+    "grid": Scale("grid", seasons=2, rounds=24, drivers=20, n_sims=100_000),
+    "field": Scale("field", seasons=3, rounds=24, drivers=200, n_sims=20_000),
+    "stress": Scale("stress", seasons=2, rounds=24, drivers=2000, n_sims=2_000),
+}
+
+
+def measure(
+    fn: Callable[[], Any],
+    items: int = 1,
+    repeat: int = 5,
+    setup: Optional[Callable[[], None]] = None,
+) -> Dict[str, float]:
+    """
+    Best / median wall time over `repeat` runs (after one warm-up), items
+    per second at the best time, and the tracemalloc peak of one extra run.
+    `setup` runs untimed before every call, e.g. to empty a cache.
+    """
+    def once() -> float:
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        return time.perf_counter() - start
+
+    once()
+    times = [once() for _ in range(repeat)]
+
+    if setup is not None:
+        setup()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    best = min(times)
+    return {
+        "best_s": best,
+        "median_s": median(times),
+        "items": items,
+        "items_per_s": items / best if best > 0 else float("inf"),
+        "peak_bytes": peak,
+    }
+
+
+# -------- Benchmarks -------- #
+
+def bench_scale(scale: Scale, repeat: int) -> Dict[str, Dict[str, float]]:
+    seasons = list(range(2030, 2030 + scale.seasons))
+    season = seasons[-1]
+    synthetic = SyntheticJolpica(seasons=seasons, rounds=scale.rounds, drivers=scale.drivers)
+    results: Dict[str, Dict[str, float]] = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = CacheService(str(Path(tmp) / "cache"))
+        synthetic.seed_cache(cache)
+        jol = JolpicaService(cache)
+
+        # ---- Cache tiers ----
+        keys = list(cache.iterkeys())
+        for key in keys:
+            cache.get(key)
+        results["cache.memory_get"] = measure(lambda: [cache.get(k) for k in keys], len(keys), repeat)
+        results["cache.disk_get"] = measure(
+            lambda: [cache.get(k, skip_memory=True) for k in keys], len(keys), repeat
+        )
+        payload = synthetic.results_payload(season, 1)
+        results["cache.set"] = measure(
+            lambda: [cache.set(f"bench::{i}", payload, ttl=None) for i in range(50)], 50, repeat
+        )
+
+        # ---- Results frame (compact build from raw JSON, then warm reads) ----
+        frame_key = cache_key(*JolpicaService.frame_entry(season))
+
+        def drop_compact() -> None:
+            cache.delete(frame_key)
+
+        results["jolpica.season_frame_cold"] = measure(
+            lambda: jol.season_frame(season), scale.rounds, repeat, setup=drop_compact
+        )
+        results["jolpica.season_frame_warm"] = measure(
+            lambda: jol.season_frame(season), scale.rounds, repeat
+        )
+
+        # ---- Agents, one call per round on a shared frame ----
+        frame = jol.season_frame(season)
+        rounds = list(range(2, scale.rounds + 1))
+        contexts = [{"season": season, "round": r, "results_frame": frame} for r in rounds]
+        for name, agent in (
+            ("agent.circuit", CircuitAgent(jol)),
+            ("agent.driver", DriverAgent(jol)),
+            ("agent.constructor", ConstructorAgent(jol)),
+        ):
+            results[name] = measure(lambda: [agent.run(c) for c in contexts], len(contexts), repeat)
+
+        # ---- Fusion ----
+        fusion_contexts = list(season_contexts(jol, season))
+        fusion = FusionAgent()
+        results["fusion.run"] = measure(
+            lambda: [fusion.run(c) for c in fusion_contexts], len(fusion_contexts), repeat
+        )
+        results["fusion.run_batch"] = measure(
+            lambda: fusion.run_batch(fusion_contexts), len(fusion_contexts), repeat
+        )
+
+        # ---- Simulation ----
+        sim_context = {**fusion_contexts[-1], "prediction": fusion.run(fusion_contexts[-1])}
+        simulator = RaceSimulatorAgent(n_sims=scale.n_sims, seed=0)
+        results["agent.race_simulator"] = measure(
+            lambda: simulator.run(sim_context), scale.n_sims, max(1, repeat // 2)
+        )
+
+        # ---- End to end ----
+        results["pipeline.season_contexts"] = measure(
+            lambda: list(season_contexts(jol, season)), len(fusion_contexts), repeat
+        )
+        results["pipeline.predict_rounds"] = measure(
+            lambda: predict_rounds(jol, seasons), len(seasons) * len(fusion_contexts), repeat
+        )
+        results["pipeline.run_prediction"] = measure(
+            lambda: [run_prediction(jol, season, r) for r in rounds], len(rounds), repeat
+        )
+
+        store = FeatureStore(root=Path(tmp) / "features", version=MODEL_VERSION)
+        run_prediction(jol, season, rounds[0], store=store)
+        results["pipeline.run_prediction_store"] = measure(
+            lambda: [run_prediction(jol, season, r, store=store) for r in rounds], len(rounds), repeat
+        )
+
+        jol.close()
+        cache.close()
+
+    return results
+
+
+# -------- Reporting -------- #
+
+def _commit() -> str:
+    root = Path(__file__).resolve().parents[1]
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=root, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            cwd=root, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return f"{commit}-dirty" if dirty else commit
+
+
+def _previous(output: Path, current: Path) -> Optional[Path]:
+    runs = sorted(
+        (p for p in output.glob("*.json") if p != current), key=lambda p: p.stat().st_mtime
+    )
+    return runs[-1] if runs else None
+
+
+def _format_bytes(n: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024:
+            return f"{n:.0f}{unit}"
+        n /= 1024
+    return f"{n:.0f}TB"
+
+
+def report(run: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> str:
+    lines = [f"commit {run['commit']}  model {run['model_version']}"]
+    if baseline is not None:
+        lines[0] += f"  (vs {baseline['commit']})"
+
+    for scale, benches in run["scales"].items():
+        lines.append(f"\n[{scale}]")
+        lines.append(f"{'benchmark':34} {'best':>10} {'items/s':>12} {'peak':>8} {'vs base':>8}")
+        for name, r in benches.items():
+            base = (baseline or {}).get("scales", {}).get(scale, {}).get(name)
+            ratio = f"{r['best_s'] / base['best_s']:.2f}x" if base and base["best_s"] > 0 else ""
+            lines.append(
+                f"{name:34} {r['best_s'] * 1000:9.2f}ms {r['items_per_s']:12.1f} "
+                f"{_format_bytes(r['peak_bytes']):>8} {ratio:>8}"
+            )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks on synthetic Jolpica data")
+    parser.add_argument("--scales", default="grid,field", help=f"comma-separated: {','.join(SCALES)}")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", type=Path, default=RESULTS_DIR)
+    parser.add_argument("--compare", type=Path, default=None, help="baseline result file (default: latest)")
+    args = parser.parse_args()
+
+    run = {
+        "commit": _commit(),
+        "model_version": MODEL_VERSION,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "scales": {},
+    }
+    for name in args.scales.split(","):
+        run["scales"][name] = bench_scale(SCALES[name], args.repeat)
+
+    # One file per commit: reruns on the same commit replace it
+    args.output.mkdir(parents=True, exist_ok=True)
+    path = args.output / f"{run['commit']}.json"
+    baseline_path = args.compare or _previous(args.output, path)
+    baseline = json.loads(baseline_path.read_text()) if baseline_path else None
+    path.write_text(json.dumps(run, indent=2))
+
+    print(report(run, baseline))
+    print(f"\nSaved {path}")
+
+
+if __name__ == "__main__":
+    main()
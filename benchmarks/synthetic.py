@@ -0,0 +1,203 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+import numpy as np
+
+from services.cache_policy import cache_key, make_entry
+from services.cache_service import CacheService
+from services.jolpica_service import JolpicaService
+
+POINTS = (25, 18, 15, 12, 10, 8, 6, 4, 2, 1)
+RETIREMENTS = ("Accident", "Engine", "Gearbox", "Collision", "Hydraulics")
+
+
+def _mrdata(total: int, table: str, body: Dict[str, Any]) -> Dict[str, Any]:
+    return {"MRData": {"limit": "100", "offset": "0", "total": str(total), table: body}}
+
+
+@dataclass
+class SyntheticJolpica:
+    """
+    Deterministic Jolpica-shaped payloads for benchmarks and offline runs.
+
+    Every season has `rounds` races over `drivers` entrants (two per
+    constructor). Each driver has a latent pace, so finishing orders, grid
+    positions and retirements have the structure the agents look for,
+    not uniform noise. With `raced`, the last season is still in progress:
+    only its first `raced` rounds have results.
+    """
+
+    seasons: Iterable[int] = (2024,)
+    rounds: int = 24
+    drivers: int = 20
+    dnf_rate: float = 0.08
+    seed: int = 0
+    raced: Optional[int] = None
+
+    def __post_init__(self):
+        self.seasons = list(self.seasons)
+        self.driver_ids = [f"driver_{i:04d}" for i in range(self.drivers)]
+        self.team_ids = [f"team_{i:03d}" for i in range((self.drivers + 1) // 2)]
+        self._races: Dict[int, List[Dict[str, Any]]] = {}
+
+    # -------- Generation -------- #
+
+    def _circuit(self, round_no: int) -> Dict[str, Any]:
+        return {
+            "circuitId": f"circuit_{round_no:02d}",
+            "circuitName": f"Synthetic Circuit {round_no}",
+            "Location": {"locality": f"Town {round_no}", "country": "Nowhere"},
+        }
+
+    def _race(self, season: int, round_no: int) -> Dict[str, Any]:
+        return {
+            "season": str(season),
+            "round": str(round_no),
+            "raceName": f"Synthetic Grand Prix {round_no}",
+            "Circuit": self._circuit(round_no),
+            "date": (date(season, 3, 1) + timedelta(weeks=round_no - 1)).isoformat(),
+        }
+
+    def races(self, season: int) -> List[Dict[str, Any]]:
+        """
+        The season's races, each with its full `Results` list.
+        """
+        if season in self._races:
+            return self._races[season]
+
+        rng = np.random.default_rng([self.seed, season])
+        n = self.drivers
+        pace = np.sort(rng.normal(0.0, 1.0, n))[::-1] + rng.normal(0.0, 0.3, n)
+        laps = 50 + rng.integers(0, 25, self.rounds)
+        races = []
+
+        for round_no in range(1, self.rounds + 1):
+            grid_order = np.argsort(-(pace + rng.normal(0.0, 0.6, n)), kind="stable")
+            grid = np.empty(n, dtype=int)
+            grid[grid_order] = np.arange(1, n + 1)
+
+            race_order = np.argsort(-(pace + rng.normal(0.0, 0.9, n)), kind="stable")
+            retired = rng.random(n) < self.dnf_rate
+
+            results = []
+            finishers = [d for d in race_order if not retired[d]]
+            for position, d in enumerate([*finishers, *[d for d in race_order if retired[d]]], start=1):
+                classified = not retired[d]
+                results.append({
+                    "number": str(d + 1),
+                    "position": str(position),
+                    "positionText": str(position) if classified else "R",
+                    "points": str(POINTS[position - 1] if classified and position <= len(POINTS) else 0),
+                    "Driver": {"driverId": self.driver_ids[d]},
+                    "Constructor": {"constructorId": self.team_ids[d // 2], "name": self.team_ids[d // 2]},
+                    "grid": str(grid[d]),
+                    "laps": str(laps[round_no - 1] if classified else rng.integers(0, laps[round_no - 1])),
+                    "status": "Finished" if classified else RETIREMENTS[d % len(RETIREMENTS)],
+                })
+
+            races.append({**self._race(season, round_no), "Results": results})
+
+        self._races[season] = races
+        return races
+
+    def completed(self, season: int) -> List[Dict[str, Any]]:
+        """
+        The races of `season` that have results.
+        """
+        races = self.races(season)
+        if self.raced is not None and season == self.seasons[-1]:
+            return races[:self.raced]
+        return races
+
+    # -------- Payloads -------- #
+
+    def races_payload(self, season: int) -> Dict[str, Any]:
+        schedule = [self._race(season, r) for r in range(1, self.rounds + 1)]
+        return _mrdata(len(schedule), "RaceTable", {"season": str(season), "Races": schedule})
+
+    def circuit_races_payload(self, round_no: int) -> Dict[str, Any]:
+        """
+        Every season's race at the circuit of `round_no` (each round has its own).
+        """
+        races = [self._race(season, round_no) for season in self.seasons]
+        circuit_id = self._circuit(round_no)["circuitId"]
+        return _mrdata(len(races), "RaceTable", {"circuitId": circuit_id, "Races": races})
+
+    def results_payload(self, season: int, round_no: int) -> Dict[str, Any]:
+        races = self.completed(season)
+        if round_no > len(races):
+            return _mrdata(0, "RaceTable", {"season": str(season), "round": str(round_no), "Races": []})
+        return JolpicaService._round_payload(races[round_no - 1])
+
+    def season_results_payload(self, season: int) -> Dict[str, Any]:
+        races = self.completed(season)
+        total = sum(len(r["Results"]) for r in races)
+        return _mrdata(total, "RaceTable", {"season": str(season), "Races": races})
+
+    def _standings(self, season: int, after_round: int) -> Dict[str, np.ndarray]:
+        points = np.zeros(self.drivers)
+        index = {d: i for i, d in enumerate(self.driver_ids)}
+        for race in self.completed(season)[:after_round]:
+            for res in race["Results"]:
+                points[index[res["Driver"]["driverId"]]] += float(res["points"])
+        team_points = np.bincount(np.arange(self.drivers) // 2, weights=points)
+        return {"drivers": points, "teams": team_points}
+
+    def driver_standings_payload(self, season: int, after_round: int) -> Dict[str, Any]:
+        points = self._standings(season, after_round)["drivers"]
+        order = np.argsort(-points, kind="stable")
+        standings = [
+            {
+                "position": str(p),
+                "points": f"{points[d]:g}",
+                "Driver": {"driverId": self.driver_ids[d]},
+                "Constructors": [{"constructorId": self.team_ids[d // 2]}],
+            }
+            for p, d in enumerate(order, start=1)
+        ]
+        lists = [{"season": str(season), "round": str(after_round), "DriverStandings": standings}]
+        return _mrdata(len(standings), "StandingsTable", {"season": str(season), "StandingsLists": lists})
+
+    def constructor_standings_payload(self, season: int, after_round: int) -> Dict[str, Any]:
+        points = self._standings(season, after_round)["teams"]
+        order = np.argsort(-points, kind="stable")
+        standings = [
+            {
+                "position": str(p),
+                "points": f"{points[t]:g}",
+                "Constructor": {"constructorId": self.team_ids[t]},
+            }
+            for p, t in enumerate(order, start=1)
+        ]
+        lists = [{"season": str(season), "round": str(after_round), "ConstructorStandings": standings}]
+        return _mrdata(len(standings), "StandingsTable", {"season": str(season), "StandingsLists": lists})
+
+    # -------- Offline cache -------- #
+
+    def seed_cache(self, cache: CacheService, after_round: Optional[int] = None) -> None:
+        """
+        Stores every payload the way JolpicaService does (immutable
+        envelopes under canonical keys), so a JolpicaService over `cache`
+        answers every endpoint without network access.
+        """
+        after_round = self.rounds // 2 if after_round is None else after_round
+        for season in self.seasons:
+            entries = {
+                cache_key(f"/{season}/races.json", {"limit": 100}): self.races_payload(season),
+                cache_key(f"/{season}/results.json"): self.completed(season),
+                cache_key(f"/{season}/driverstandings.json"): self.driver_standings_payload(season, after_round),
+                cache_key(f"/{season}/constructorstandings.json"): self.constructor_standings_payload(
+                    season, after_round
+                ),
+            }
+            for round_no in range(1, self.rounds + 1):
+                entries[cache_key(f"/{season}/{round_no}/results.json", {"limit": 100})] = (
+                    self.results_payload(season, round_no)
+                )
+            for key, data in entries.items():
+                cache.set(key, make_entry(data, None), ttl=None)
+
+        for round_no in range(1, self.rounds + 1):
+            key = cache_key(f"/circuits/{self._circuit(round_no)['circuitId']}/races.json", {"limit": 100})
+            cache.set(key, make_entry(self.circuit_races_payload(round_no), None), ttl=None)
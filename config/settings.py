@@ -9,15 +9,62 @@ load_dotenv()
 class Settings:
     PROJECT_ROOT: Path = Path(__file__).resolve().parents[1]
     CACHE_DIR: Path = PROJECT_ROOT / "data" / "cache"
+    # Precomputed agent features (see services/feature_store.py)
+    FEATURE_DIR: Path = Path(os.getenv("FEATURE_DIR", str(PROJECT_ROOT / "data" / "features")))
 
     JOLPICA_BASE: str = os.getenv(
         "JOLPICA_BASE",
         "https://api.jolpi.ca/ergast/f1"
     )
 
+    # Concurrent requests allowed against Jolpica across the whole process
+    JOLPICA_MAX_IN_FLIGHT: int = int(os.getenv("JOLPICA_MAX_IN_FLIGHT", "4"))
+
+    # Published Jolpica limits: 4 req/s burst, 500 req/hour sustained
+    JOLPICA_RATE_PER_SEC: float = float(os.getenv("JOLPICA_RATE_PER_SEC", "4"))
+    JOLPICA_BURST: int = int(os.getenv("JOLPICA_BURST", "4"))
+    JOLPICA_RATE_PER_HOUR: int = int(os.getenv("JOLPICA_RATE_PER_HOUR", "500"))
+    JOLPICA_MAX_RETRY_AFTER: float = float(os.getenv("JOLPICA_MAX_RETRY_AFTER", "30"))
+    JOLPICA_BREAKER_THRESHOLD: int = int(os.getenv("JOLPICA_BREAKER_THRESHOLD", "5"))
+    JOLPICA_BREAKER_RESET: float = float(os.getenv("JOLPICA_BREAKER_RESET", "30"))
+
+    # Opt-in: serve expired Jolpica entries at once and refresh them in the background
+    JOLPICA_STALE_WHILE_REVALIDATE: bool = os.getenv("JOLPICA_STALE_WHILE_REVALIDATE", "0") == "1"
+    # Share of an entry's TTL left when a read triggers a background refresh (0 = off)
+    JOLPICA_REFRESH_AHEAD: float = float(os.getenv("JOLPICA_REFRESH_AHEAD", "0"))
+
+    # In-process LRU tier in front of the disk cache
+    CACHE_MEMORY_ENTRIES: int = int(os.getenv("CACHE_MEMORY_ENTRIES", "512"))
+    CACHE_MEMORY_BYTES: int = int(os.getenv("CACHE_MEMORY_BYTES", str(64 * 1024 * 1024)))
+
+    # Instrumentation (services/metrics.py), off by default
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "0") == "1"
+    TRACING_ENABLED: bool = os.getenv("TRACING_ENABLED", "0") == "1"
+    TRACE_BUFFER: int = int(os.getenv("TRACE_BUFFER", "100"))
+
+    # Streamlit app: memoized predictions per (season, round, model version)
+    UI_PREDICTION_TTL: int = int(os.getenv("UI_PREDICTION_TTL", "3600"))
+    UI_PREDICTION_ENTRIES: int = int(os.getenv("UI_PREDICTION_ENTRIES", "256"))
+    # Warm the latest and next rounds in the background when the app starts
+    UI_WARM_CACHE: bool = os.getenv("UI_WARM_CACHE", "1") == "1"
+    # Seasons simulated by the optional championship projection
+    UI_CHAMPIONSHIP_SIMS: int = int(os.getenv("UI_CHAMPIONSHIP_SIMS", "50000"))
+
+    # Prediction HTTP service (api/server.py)
+    API_HOST: str = os.getenv("API_HOST", "127.0.0.1")
+    API_PORT: int = int(os.getenv("API_PORT", "8080"))
+    API_WORKERS: int = int(os.getenv("API_WORKERS", str(min(4, os.cpu_count() or 1))))
+    # Pool tasks queued or running before new work is answered 503
+    API_MAX_PENDING: int = int(os.getenv("API_MAX_PENDING", "32"))
+    API_CACHE_ENTRIES: int = int(os.getenv("API_CACHE_ENTRIES", "4096"))
+    API_CACHE_TTL: int = int(os.getenv("API_CACHE_TTL", "3600"))
+    API_BATCH_LIMIT: int = int(os.getenv("API_BATCH_LIMIT", "500"))
+
     TTL_SHORT: int = int(os.getenv("TTL_SHORT", "3600"))       # 1 hour
     TTL_MED: int = int(os.getenv("TTL_MED", "21600"))         # 6 hours
     TTL_LONG: int = int(os.getenv("TTL_LONG", "604800"))      # 7 days
+    # How long expired entries are kept around for revalidation
+    TTL_STALE: int = int(os.getenv("TTL_STALE", "2592000"))   # 30 days
 
 
 # ✅ THIS LINE IS CRITICAL
@@ -1,28 +1,29 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple
+import argparse
+import csv
+import json
+import os
+import sys
+
+from config.settings import settings
 from services.cache_service import CacheService
+from services.feature_store import FeatureStore
 from services.jolpica_service import JolpicaService
-from agents.circuit_agent import CircuitAgent
-from agents.driver_agent import DriverAgent
-from agents.constructor_agent import ConstructorAgent
-from agents.fusion_agent import FusionAgent
-from agents.explanation_agent import ExplainabilityAgent
-
-def build_driver_constructor_map(season, round_no, jol):
-    results = jol.results(season, round_no)
-    race_results = results["MRData"]["RaceTable"]["Races"][0]["Results"]
-    return {
-        r["Driver"]["driverId"]: r["Constructor"]["constructorId"]
-        for r in race_results
-    }
+from services.pace_features import PaceStore
+from services import metrics
+from agents.model_version import FEATURE_VERSION, MODEL_VERSION, PACE_VERSION
+from agents.pipeline import predict_contexts, predictable_rounds, run_prediction, stored_contexts
+from services.ranges import int_range
+
+CSV_FIELDS = ("season", "round", "model_version", "winner", "second", "third", "winner_probability")
 
-def main():
-    cache = CacheService()
-    jol = JolpicaService(cache)
 
-    base = {"season": 2024, "round": 5}
+# -------- Single race (default) -------- #
 
-    circuit = CircuitAgent(jol).run(base)
-    drivers = DriverAgent(jol).run(base)
-    constructors = ConstructorAgent(jol).run(base)
+def print_race(context: dict) -> None:
+    constructors = context["constructors"]
     print("\n🏗️ CONSTRUCTOR AGENT (sample)\n")
     top_teams = sorted(
         constructors.items(),
@@ -32,7 +33,7 @@ def main():
     for team, stats in top_teams:
         print(team, stats)
 
-    mapping = build_driver_constructor_map(2024, 5, jol)
+    mapping = context["driver_to_constructor"]
 
     print("\n🔗 DRIVER → CONSTRUCTOR MAP (sample)\n")
     for i, (d, c) in enumerate(mapping.items()):
@@ -40,21 +41,16 @@ def main():
         if i == 5:
             break
 
+    pace = context.get("pace") or {}
+    if pace:
+        print("\n⏱️ FASTF1 PACE (sample)\n")
+        for driver, stats in sorted(
+            pace.items(), key=lambda x: float("inf") if x[1]["quali_gap"] is None else x[1]["quali_gap"]
+        )[:5]:
+            print(driver, stats)
 
-
-
-    prediction = FusionAgent().run({
-        "circuit": circuit,
-        "drivers": drivers,
-        "constructors": constructors,
-        "driver_to_constructor": mapping
-    })
-
-    explanation = ExplainabilityAgent().run({
-        "circuit": circuit,
-        "drivers": drivers,
-        "prediction": prediction
-    })
+    prediction = context["prediction"]
+    explanation = context["explanation"]
 
     print("\n🏁 RACE PREDICTION")
     print("Winner:", prediction["winner"])
@@ -64,7 +60,290 @@ def main():
     for e in explanation["explanations"]:
         print("-", e)
 
-    cache.close()
+    print("\n⏱️ AGENT TIMINGS")
+    for name, seconds in context["timings"].items():
+        print(f"{name}: {seconds * 1000:.1f} ms")
+
+    # METRICS_ENABLED=1 / TRACING_ENABLED=1
+    if metrics.enabled():
+        print("\n📈 METRICS\n")
+        print(metrics.prometheus_text())
+    for trace in metrics.recent_traces():
+        print(json.dumps(trace, indent=2))
+
+
+# -------- Batch: worker process state -------- #
+# Metrics recorded in workers are not sent back to this process (see README)
+
+_WORKER: Dict = {}
+
+
+def _init_worker(cache_dir: str, window: int) -> None:
+    cache = CacheService(cache_dir)
+    _WORKER.update(
+        cache=cache,
+        jol=JolpicaService(cache),
+        store=FeatureStore(version=FEATURE_VERSION),
+        pace=PaceStore(version=PACE_VERSION),
+        window=window,
+    )
+
+
+def _close_worker() -> None:
+    if _WORKER:
+        _WORKER["jol"].close()
+        _WORKER["cache"].close()
+        _WORKER.clear()
+
+
+def _record(context: dict) -> Dict:
+    prediction = context.get("prediction") or {}
+    return {
+        "season": context["season"],
+        "round": context["round"],
+        "model_version": MODEL_VERSION,
+        "winner": prediction.get("winner"),
+        "podium": prediction.get("podium", []),
+        "probabilities": prediction.get("probabilities", {}),
+        "explanations": (context.get("explanation") or {}).get("explanations", []),
+        "pace": context.get("pace") or {},
+    }
+
+
+def _predict_rounds(season: int, rounds: List[int]) -> Tuple[List[Dict], List[str]]:
+    """
+    Predicts the given rounds of one season (with results, or the next race)
+    with one feature-store read and batched fusion pass; rounds the store
+    does not cover go one by one through the agent graph. Chunks of the same
+    season fill the store under a shared lock, so it is swept once.
+    Returns (records, errors).
+    """
+    jol, store, pace, window = _WORKER["jol"], _WORKER["store"], _WORKER["pace"], _WORKER["window"]
+
+    contexts = stored_contexts(store, jol, season, rounds, window, cache=_WORKER["cache"])
+    records = [_record(context) for context in predict_contexts(contexts, pace)]
+    errors = []
+
+    swept = {c["round"] for c in contexts}
+    for round_no in rounds:
+        if round_no in swept:
+            continue
+        try:
+            records.append(_record(run_prediction(jol, season, round_no, window=window, store=store, pace=pace)))
+        except Exception as e:
+            errors.append(f"{season} round {round_no}: {e!r}")
+
+    return records, errors
+
+
+# -------- Batch: output -------- #
+
+def _done(path: Path, fmt: str) -> Set[Tuple[int, int]]:
+    """
+    (season, round) pairs already in `path` for the current model version.
+    A trailing partial line (an interrupted write) is cut off so appends
+    start on a clean line.
+    """
+    if not path.exists():
+        return set()
+
+    with open(path, "rb+") as f:
+        data = f.read()
+        end = data.rfind(b"\n") + 1
+        if end < len(data):
+            f.truncate(end)
+            data = data[:end]
+
+    lines = data.decode().splitlines()
+    if fmt == "csv":
+        rows = csv.DictReader(lines)
+    else:
+        rows = []
+        for line in lines:
+            try:
+                rows.append(json.loads(line))
+            except ValueError:
+                continue
+
+    return {
+        (int(r["season"]), int(r["round"]))
+        for r in rows
+        if r.get("model_version") == MODEL_VERSION
+    }
+
+
+def _writer(out, fmt: str, header: bool) -> Callable[[Dict], None]:
+    if fmt == "csv":
+        writer = csv.DictWriter(out, fieldnames=CSV_FIELDS, extrasaction="ignore")
+        if header:
+            writer.writeheader()
+
+        def write(record: Dict) -> None:
+            podium = record["podium"] + [None, None, None]
+            writer.writerow({
+                **record,
+                "second": podium[1],
+                "third": podium[2],
+                "winner_probability": record["probabilities"].get(record["winner"]),
+            })
+            out.flush()
+    elif fmt == "jsonl":
+        def write(record: Dict) -> None:
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+    else:
+        def write(record: Dict) -> None:
+            out.write(
+                f"{record['season']} R{record['round']:02d}  "
+                f"winner {record['winner']}  podium {', '.join(record['podium'])}\n"
+            )
+            out.flush()
+    return write
+
+
+def run_batch(
+    seasons: List[int],
+    rounds: Optional[List[int]],
+    window: int,
+    workers: int,
+    fmt: str,
+    output: Optional[Path],
+    resume: bool,
+    cache_dir: str = str(settings.CACHE_DIR),
+) -> int:
+    """
+    Predicts every round of `seasons` (optionally only `rounds`) that has
+    results, plus each season's next race; later rounds are skipped and
+    reported. Rounds are split into chunks, about two per worker, on a
+    process pool, and each chunk's records are written as soon as it
+    finishes. Returns the number of failures (rounds, or whole seasons whose
+    calendar or task failed).
+    """
+    done = _done(output, fmt) if output is not None and resume else set()
+
+    cache = CacheService(cache_dir)
+    jol = JolpicaService(cache)
+    tasks: Dict[int, List[int]] = {}
+    failed_seasons: List[str] = []
+    skipped: Dict[int, List[int]] = {}
+    try:
+        for season in seasons:
+            try:
+                calendar = [int(r["round"]) for r in jol.races(season)["MRData"]["RaceTable"]["Races"]]
+                predictable = set(predictable_rounds(jol, season))
+            except Exception as e:
+                failed_seasons.append(f"{season} calendar: {e!r}")
+                continue
+            wanted = [r for r in calendar if rounds is None or r in rounds]
+            later = [r for r in wanted if r not in predictable]
+            if later:
+                skipped[season] = later
+            todo = [r for r in wanted if r in predictable and (season, r) not in done]
+            if todo:
+                tasks[season] = todo
+    finally:
+        jol.close()
+        cache.close()
+
+    if output is not None:
+        header = not (resume and output.exists() and output.stat().st_size > 0)
+        out = open(output, "a" if resume else "w", newline="")
+    else:
+        header, out = True, sys.stdout
+    write = _writer(out, fmt, header)
+    predicted = failures = 0
+
+    def emit(records: List[Dict], errors: List[str]) -> None:
+        nonlocal predicted, failures
+        for record in sorted(records, key=lambda r: r["round"]):
+            write(record)
+        predicted += len(records)
+        for error in errors:
+            print(f"failed: {error}", file=sys.stderr)
+        failures += len(errors)
+
+    for season, later in skipped.items():
+        print(f"skipped: {season} rounds {', '.join(map(str, later))} (after the next race)", file=sys.stderr)
+    emit([], failed_seasons)
+
+    total = sum(len(todo) for todo in tasks.values())
+    size = max(1, -(-total // (2 * max(1, workers))))
+    chunks = [
+        (season, todo[i:i + size])
+        for season, todo in tasks.items()
+        for i in range(0, len(todo), size)
+    ]
+    try:
+        if workers <= 1 or len(chunks) <= 1:
+            _init_worker(cache.cache_dir, window)
+            try:
+                for season, todo in chunks:
+                    emit(*_predict_rounds(season, todo))
+            finally:
+                _close_worker()
+        else:
+            with ProcessPoolExecutor(
+                max_workers=min(len(chunks), workers),
+                initializer=_init_worker,
+                initargs=(cache.cache_dir, window),
+            ) as pool:
+                futures = {pool.submit(_predict_rounds, s, r): (s, r) for s, r in chunks}
+                for future in as_completed(futures):
+                    try:
+                        emit(*future.result())
+                    except Exception as e:
+                        season, todo = futures[future]
+                        emit([], [f"{season} rounds {todo[0]}-{todo[-1]}: {e!r}"])
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    summary = f"{predicted} predicted, {failures} failed"
+    if skipped:
+        summary += f", {sum(map(len, skipped.values()))} not raced yet"
+    if done:
+        summary += f", {len(done)} already in {output}"
+    print(summary, file=sys.stderr)
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Race predictions: one race in detail (default) or batches as text/JSONL/CSV"
+    )
+    parser.add_argument("--seasons", type=int_range, default=[2024], help="e.g. 2024 or 2021-2024")
+    parser.add_argument("--rounds", type=int_range, default=None, help="e.g. 5 or 1-10 (default: raced rounds and the next race)")
+    parser.add_argument("--window", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--format", choices=("text", "jsonl", "csv"), default="text")
+    parser.add_argument("--output", type=Path, default=None, help="file to write (default: stdout)")
+    parser.add_argument("--resume", action="store_true", help="skip races already in --output")
+    args = parser.parse_args(sys.argv[1:] or ["--rounds", "5"])
+
+    if args.resume and args.output is None:
+        parser.error("--resume needs --output")
+
+    if args.format == "text" and len(args.seasons) == 1 and args.rounds and len(args.rounds) == 1:
+        cache = CacheService()
+        jol = JolpicaService(cache)
+        try:
+            # Agent graph; circuit / driver / constructor features precomputed when available
+            context = run_prediction(
+                jol, args.seasons[0], args.rounds[0], window=args.window,
+                store=FeatureStore(version=FEATURE_VERSION),
+                pace=PaceStore(version=PACE_VERSION),
+            )
+            print_race(context)
+        finally:
+            jol.close()
+            cache.close()
+        return
+
+    failures = run_batch(
+        args.seasons, args.rounds, args.window, args.workers, args.format, args.output, args.resume
+    )
+    sys.exit(1 if failures else 0)
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,109 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Mapping, Optional
+from urllib.parse import urlencode
+import re
+import time
+
+from config.settings import settings
+
+_SEASON_PATH = re.compile(r"^/(\d{4})(?:/(\d+))?/([a-z]+)\.json$")
+
+
+def canonical_path(path: str) -> str:
+    path = "/" + path.strip().strip("/")
+    return re.sub(r"/{2,}", "/", path).lower()
+
+
+def cache_key(path: str, params: Optional[Mapping[str, Any]] = None) -> str:
+    """
+    Stable cache key: base URL + canonical path + sorted, stringified params.
+    """
+    query = urlencode(sorted((str(k), str(v)) for k, v in (params or {}).items() if v is not None))
+    key = f"jolpica::{settings.JOLPICA_BASE.rstrip('/')}{canonical_path(path)}"
+    return f"{key}?{query}" if query else key
+
+
+# -------- Cache entries -------- #
+
+def make_entry(data: Any, ttl: Optional[int], headers: Optional[Mapping[str, str]] = None) -> Dict[str, Any]:
+    """
+    What JolpicaService stores: the payload plus freshness and validators.
+    `expires_at` None means the payload can never change.
+    """
+    now = time.time()
+    headers = headers or {}
+    return {
+        "data": data,
+        "fetched_at": now,
+        "expires_at": None if ttl is None else now + ttl,
+        "etag": headers.get("ETag"),
+        "last_modified": headers.get("Last-Modified"),
+    }
+
+
+def is_fresh(entry: Dict[str, Any]) -> bool:
+    return entry["expires_at"] is None or entry["expires_at"] > time.time()
+
+
+def conditional_headers(entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+    if not entry:
+        return {}
+    headers = {}
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+def disk_ttl(ttl: Optional[int]) -> Optional[int]:
+    """
+    Mutable entries outlive their freshness by TTL_STALE so they can still
+    be revalidated (or served) after expiry.
+    """
+    return None if ttl is None else ttl + settings.TTL_STALE
+
+
+# -------- Policy -------- #
+
+@dataclass(frozen=True)
+class CachePolicy:
+    """
+    Decides how long a Jolpica payload stays fresh.
+
+    Past seasons and completed rounds never change, so they are stored
+    without expiry (ttl None). Everything else keeps the endpoint's TTL;
+    a round with no results yet is rechecked on TTL_SHORT.
+    """
+
+    current_season: int = field(default_factory=lambda: datetime.now(timezone.utc).year)
+    # Results can still be amended by the stewards shortly after a race
+    settle_days: int = 3
+
+    def ttl(self, path: str, data: Any, default: Optional[int]) -> Optional[int]:
+        match = _SEASON_PATH.match(canonical_path(path))
+        if not match:
+            return default
+
+        season, round_no, endpoint = int(match.group(1)), match.group(2), match.group(3)
+        if season < self.current_season:
+            return None
+
+        if round_no is not None and endpoint == "results":
+            races = (data or {}).get("MRData", {}).get("RaceTable", {}).get("Races", [])
+            if not races or not races[0].get("Results"):
+                return settings.TTL_SHORT
+            if self._completed(races[0]):
+                return None
+
+        return default
+
+    def _completed(self, race: Dict[str, Any]) -> bool:
+        try:
+            race_day = date.fromisoformat(race["date"])
+        except (KeyError, TypeError, ValueError):
+            return False
+        today = datetime.now(timezone.utc).date()
+        return race_day + timedelta(days=self.settle_days) < today
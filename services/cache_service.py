@@ -1,21 +1,131 @@
 from __future__ import annotations
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Any, Optional
-from diskcache import Cache
+from typing import Any, Dict, Iterator, Optional, Tuple
+import pickle
+import threading
+import time
+from diskcache import Cache, Lock
 from config.settings import settings
+from services import metrics
 
 @dataclass
 class CacheService:
+    """
+    Two-tier cache: a bounded in-process LRU in front of diskcache.
+    Values handed out by the memory tier are shared, treat them as read-only.
+    Values are pickled here and stored on disk as bytes, so their size for
+    the memory tier's byte bound comes with the serialization done anyway.
+    """
     cache_dir: str = str(settings.CACHE_DIR)
+    memory_entries: int = settings.CACHE_MEMORY_ENTRIES
+    memory_bytes: int = settings.CACHE_MEMORY_BYTES
 
     def __post_init__(self):
         self._cache = Cache(self.cache_dir)
+        # key -> (value, absolute expiry or None, pickled size)
+        self._memory: OrderedDict[str, Tuple[Any, Optional[float], int]] = OrderedDict()
+        self._memory_size = 0
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "memory_misses": 0, "disk_hits": 0, "disk_misses": 0}
 
-    def get(self, key: str) -> Optional[Any]:
-        return self._cache.get(key, default=None)
+    # -------- Memory tier -------- #
+
+    def _drop(self, key: str) -> None:
+        _, _, size = self._memory.pop(key)
+        self._memory_size -= size
+
+    def _remember(self, key: str, value: Any, expire_at: Optional[float], size: int) -> None:
+        with self._lock:
+            if key in self._memory:
+                self._drop(key)
+            if size > self.memory_bytes:
+                return
+
+            self._memory[key] = (value, expire_at, size)
+            self._memory_size += size
+
+            while len(self._memory) > self.memory_entries or self._memory_size > self.memory_bytes:
+                self._drop(next(iter(self._memory)))
+
+    @staticmethod
+    def _load(raw: Any) -> Tuple[Any, int]:
+        """
+        (value, pickled size) of a disk-tier entry. Entries written before
+        values were pickled here come back as objects and are measured once.
+        """
+        if isinstance(raw, bytes):
+            return pickle.loads(raw), len(raw)
+        return raw, len(pickle.dumps(raw, protocol=pickle.HIGHEST_PROTOCOL))
+
+    # -------- Public API -------- #
+
+    def get(self, key: str, skip_memory: bool = False) -> Optional[Any]:
+        """
+        skip_memory reads straight from disk, e.g. to see writes made by
+        other processes; the value is still promoted into memory.
+        """
+        with self._lock:
+            entry = None if skip_memory else self._memory.get(key)
+            if entry is not None:
+                value, expire_at, _ = entry
+                if expire_at is None or expire_at > time.time():
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    metrics.incr("cache_lookups_total", tier="memory", result="hit")
+                    return value
+                self._drop(key)
+            self._stats["memory_misses"] += 1
+        metrics.incr("cache_lookups_total", tier="memory", result="miss")
+
+        # expire_time keeps the memory copy's TTL aligned with the disk entry
+        with metrics.timed("cache_disk_read_seconds"):
+            raw, expire_at = self._cache.get(key, default=None, expire_time=True)
+
+        with self._lock:
+            self._stats["disk_hits" if raw is not None else "disk_misses"] += 1
+        metrics.incr("cache_lookups_total", tier="disk", result="miss" if raw is None else "hit")
+        if raw is None:
+            return None
+
+        value, size = self._load(raw)
+        self._remember(key, value, expire_at, size)
+        return value
 
     def set(self, key: str, value: Any, ttl: int) -> None:
-        self._cache.set(key, value, expire=ttl)
+        raw = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with metrics.timed("cache_disk_write_seconds"):
+            self._cache.set(key, raw, expire=ttl)
+        self._remember(key, value, None if ttl is None else time.time() + ttl, len(raw))
+
+    def delete(self, key: str) -> bool:
+        """
+        Removes `key` from both tiers; True when the disk tier had it.
+        """
+        with self._lock:
+            if key in self._memory:
+                self._drop(key)
+        return bool(self._cache.delete(key))
+
+    def iterkeys(self) -> Iterator[str]:
+        """
+        Every key of the disk tier (a superset of the memory tier), locks included.
+        """
+        return self._cache.iterkeys()
+
+    def lock(self, name: str, expire: Optional[float] = None) -> Lock:
+        """
+        Lock stored in the cache directory, shared by every process using it.
+        """
+        return Lock(self._cache, f"lock::{name}", expire=expire)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                **self._stats,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_size,
+            }
 
     def close(self) -> None:
         self._cache.close()
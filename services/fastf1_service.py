@@ -1,13 +1,92 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Optional
+from typing import Dict, Iterable, Iterator, Optional, Tuple
 from pathlib import Path
+import gc
+import warnings
 
 import fastf1
+import numpy as np
+import pandas as pd
 from fastf1.core import Session
 
 from config.settings import settings
 
+# -------- Telemetry reduction -------- #
+
+# Per-lap statistics kept from car telemetry; the samples themselves are dropped
+TELEMETRY_DTYPE = np.dtype([
+    ("driver", "U3"),
+    ("lap", "<i2"),
+    ("samples", "<i4"),
+    ("top_speed", "<f4"),        # km/h
+    ("full_throttle", "<f4"),    # share of samples at >= FULL_THROTTLE %
+    ("brake_ratio", "<f4"),      # share of samples on the brake
+    ("braking_zones", "<i2"),
+    ("max_speed_drop", "<f4"),   # largest speed shed in one braking zone, km/h
+])
+
+FULL_THROTTLE = 98
+# Brake applications shorter than this many samples (~240 ms each) are not zones
+BRAKE_MIN_SAMPLES = 2
+
+
+def reduce_lap(speed: np.ndarray, throttle: np.ndarray, brake: np.ndarray) -> Tuple:
+    """
+    (samples, top_speed, full_throttle, brake_ratio, braking_zones,
+    max_speed_drop) for one lap of car samples.
+    """
+    n = len(speed)
+    if n == 0:
+        return (0, np.nan, np.nan, np.nan, 0, np.nan)
+
+    edges = np.diff(np.concatenate(([0], brake.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    keep = ends - starts >= BRAKE_MIN_SAMPLES
+    starts, ends = starts[keep], ends[keep]
+
+    max_drop = np.nan
+    if len(starts):
+        # Minimum speed inside each [start, end) zone; the pad keeps end == n a valid index
+        padded = np.append(speed, np.float32(np.inf))
+        lows = np.minimum.reduceat(padded, np.column_stack([starts, ends]).ravel())[::2]
+        max_drop = float((speed[starts] - lows).max())
+
+    return (
+        n,
+        float(speed.max()),
+        float(np.count_nonzero(throttle >= FULL_THROTTLE)) / n,
+        float(np.count_nonzero(brake)) / n,
+        len(starts),
+        max_drop,
+    )
+
+
+def per_driver(table: np.ndarray) -> Dict[str, Dict[str, float]]:
+    """
+    Aggregates per-lap TELEMETRY_DTYPE rows by driver: top speed over all
+    laps, sample-weighted throttle / brake shares, braking zones per lap
+    and the mean per-lap largest speed drop.
+    """
+    features: Dict[str, Dict[str, float]] = {}
+    for driver in np.unique(table["driver"]):
+        rows = table[(table["driver"] == driver) & (table["samples"] > 0)]
+        if not len(rows):
+            continue
+        weights = rows["samples"].astype(float)
+        drops = rows["max_speed_drop"][~np.isnan(rows["max_speed_drop"])]
+        features[str(driver)] = {
+            "laps": int(len(rows)),
+            "top_speed": round(float(rows["top_speed"].max()), 1),
+            "full_throttle": round(float(np.average(rows["full_throttle"], weights=weights)), 3),
+            "brake_ratio": round(float(np.average(rows["brake_ratio"], weights=weights)), 3),
+            "braking_zones": round(float(rows["braking_zones"].mean()), 2),
+            "max_speed_drop": round(float(drops.mean()), 1) if len(drops) else None,
+        }
+    return features
+
+
 @dataclass
 class FastF1Service:
     cache_dir: Path = settings.CACHE_DIR / "fastf1"
@@ -17,17 +96,158 @@ class FastF1Service:
         # Enable FastF1's built-in cache to reduce repeated downloads
         fastf1.Cache.enable_cache(str(self.cache_dir))
 
-    def get_session(self, year: int, gp: str | int, session_name: str) -> Session:
+    def get_session(
+        self,
+        year: int,
+        gp: str | int,
+        session_name: str,
+        laps: bool = True,
+        telemetry: bool = True,
+        weather: bool = True,
+        messages: bool = False,
+    ) -> Session:
         """
         gp can be round number (int) or GP name (str), ex: 2024, 1, "R"
         session_name: "FP1","FP2","FP3","Q","SQ","SS","R"
+
+        Only the requested parts are loaded: telemetry and weather cost
+        seconds and hundreds of MB per session, results alone almost nothing.
         """
         ses = fastf1.get_session(year, gp, session_name)
-        ses.load(weather=True, messages=False)  # weather is useful for prediction
+        ses.load(laps=laps, telemetry=telemetry, weather=weather, messages=messages)
         return ses
 
-    def get_race(self, year: int, gp: str | int) -> Session:
-        return self.get_session(year, gp, "R")
+    def get_results(self, year: int, gp: str | int, session_name: str) -> Session:
+        """
+        Session with classification and driver info only (incl. Q1-Q3 times).
+        """
+        return self.get_session(year, gp, session_name, laps=False, telemetry=False, weather=False)
+
+    def get_laps(self, year: int, gp: str | int, session_name: str) -> Session:
+        """
+        Session with timing laps (stints, compounds, tyre life) but no telemetry or weather.
+        """
+        return self.get_session(year, gp, session_name, laps=True, telemetry=False, weather=False)
+
+    # -------- Streaming telemetry -------- #
+
+    @staticmethod
+    def _raw_car_data(session: Session) -> Dict[str, pd.DataFrame]:
+        """
+        Driver number -> raw car channel frame (Date, Time, Speed, Throttle,
+        Brake, ...). FastF1 has no public call for the stream alone: its
+        internal API module is used where it still has car_data, else the
+        session's telemetry is loaded through the public API (slower, and
+        position data is loaded too).
+        """
+        try:
+            from fastf1 import _api as api
+        except ImportError:
+            # Older releases: the public alias, minus its "will be private" warning
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", UserWarning)
+                try:
+                    from fastf1 import api
+                except ImportError:
+                    api = None
+
+        car_data = getattr(api, "car_data", None)
+        if car_data is not None:
+            return car_data(session.api_path)
+
+        session.load(laps=True, telemetry=True, weather=False, messages=False)
+        return dict(session.car_data)
+
+    @staticmethod
+    def _t0_date(raw: Dict[str, pd.DataFrame]) -> Optional[pd.Timestamp]:
+        """
+        Session.t0_date the way FastF1 core derives it (the latest Date - Time
+        offset, rounded to ms), from the car stream alone: core also takes
+        the position stream into account, which is not fetched here.
+        """
+        offsets = [(frame["Date"] - frame["Time"]).max() for frame in raw.values() if len(frame)]
+        return max(offsets).round("ms") if offsets else None
+
+    def iter_telemetry(
+        self, session: Session, drivers: Optional[Iterable[str]] = None
+    ) -> Iterator[Tuple[str, int, Dict[str, np.ndarray]]]:
+        """
+        (driver, lap number, channels) per lap, one driver at a time, for a
+        session loaded with laps but without telemetry (see get_laps).
+
+        Only the raw car channel stream is fetched (no position data, no
+        per-driver Telemetry objects). Each driver's samples are popped
+        from it, downcast (float32 time and speed, uint8 throttle, bool
+        brake) and dropped once their laps have been yielded, so at most
+        one session's raw stream plus one driver's arrays is held at a time.
+        Laps are cut on each sample's Date relative to the session's
+        t0_date, as in FastF1's own telemetry, not on the raw Time column.
+        Channel arrays are views; copy them to keep them past the iteration.
+        """
+        raw = self._raw_car_data(session)
+        t0_date = self._t0_date(raw)
+        laps = session.laps
+        wanted = None if drivers is None else set(drivers)
+
+        for number in list(raw):
+            frame = raw.pop(number)
+            driver_laps = laps[laps["DriverNumber"] == number]
+            if driver_laps.empty or (wanted is not None and driver_laps["Driver"].iloc[0] not in wanted):
+                continue
+
+            # Session time from Date, as FastF1 core computes it: the raw Time
+            # column is coarse and has duplicates. Samples come in order.
+            time = (frame["Date"].dt.round("ms") - t0_date).dt.total_seconds().to_numpy(dtype=np.float32)
+            channels = {
+                "time": time,
+                "speed": frame["Speed"].to_numpy(dtype=np.float32),
+                "throttle": np.clip(frame["Throttle"].to_numpy(), 0, 255).astype(np.uint8),
+                "brake": frame["Brake"].to_numpy(dtype=bool),
+            }
+            del frame
+
+            starts = driver_laps["LapStartTime"].dt.total_seconds().to_numpy()
+            ends = driver_laps["Time"].dt.total_seconds().to_numpy()
+            valid = ~(np.isnan(starts) | np.isnan(ends))
+            lo = np.searchsorted(time, starts[valid], side="left")
+            hi = np.searchsorted(time, ends[valid], side="right")
+
+            driver = str(driver_laps["Driver"].iloc[0])
+            for lap, a, b in zip(driver_laps["LapNumber"].to_numpy()[valid], lo, hi):
+                yield driver, int(lap), {name: values[a:b] for name, values in channels.items()}
+            del channels
+
+    def reduce_telemetry(self, session: Session, drivers: Optional[Iterable[str]] = None) -> np.ndarray:
+        """
+        Per-lap TELEMETRY_DTYPE rows for a session, each lap's samples
+        reduced as they stream past and then released.
+        """
+        rows = [
+            (driver, lap) + reduce_lap(c["speed"], c["throttle"], c["brake"])
+            for driver, lap, c in self.iter_telemetry(session, drivers)
+        ]
+        return np.array(rows, dtype=TELEMETRY_DTYPE)
+
+    def telemetry_stats(
+        self,
+        sessions: Iterable[Tuple[int, str | int, str]],
+        drivers: Optional[Iterable[str]] = None,
+    ) -> Iterator[Tuple[Tuple[int, str | int, str], np.ndarray]]:
+        """
+        ((year, gp, session_name), per-lap table) for each session in turn.
+        A session is loaded (laps only), reduced and released before the
+        next one, so peak memory does not grow with the number of sessions.
+        """
+        drivers = None if drivers is None else list(drivers)
+        for key in sessions:
+            session = self.get_laps(*key)
+            table = self.reduce_telemetry(session, drivers)
+            del session
+            gc.collect()
+            yield key, table
+
+    def get_race(self, year: int, gp: str | int, **load) -> Session:
+        return self.get_session(year, gp, "R", **load)
 
-    def get_qualifying(self, year: int, gp: str | int) -> Session:
-        return self.get_session(year, gp, "Q")
+    def get_qualifying(self, year: int, gp: str | int, **load) -> Session:
+        return self.get_session(year, gp, "Q", **load)
@@ -0,0 +1,271 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import errno
+import json
+import os
+import shutil
+import uuid
+import numpy as np
+
+from config.settings import settings
+
+# -------- Column layouts -------- #
+# One .npy record file per table, rows sorted by round. Features are rounded
+# to 3 decimals by the agents, so they are kept as float64 to round-trip.
+
+_DRIVER_FIELDS = ("avg_finish", "consistency", "dnf_risk", "qualifying_delta", "form_score")
+_CONSTRUCTOR_FIELDS = ("avg_finish", "points_per_race", "dnf_rate", "dominance_score")
+_CIRCUIT_FIELDS = ("qualifying_importance", "overtaking_difficulty", "safety_car_risk")
+
+_TABLES = {
+    "drivers": np.dtype(
+        [("round", "<i2"), ("code", "<i4")]
+        + [(f, "<f8") for f in _DRIVER_FIELDS]
+        + [("race_count", "<i4")]
+    ),
+    "constructors": np.dtype(
+        [("round", "<i2"), ("code", "<i4")] + [(f, "<f8") for f in _CONSTRUCTOR_FIELDS]
+    ),
+    "circuit": np.dtype(
+        [("round", "<i2"), ("code", "<i4")]
+        + [(f, "<f8") for f in _CIRCUIT_FIELDS]
+        + [("lap_count", "<i4")]
+    ),
+    # driver_to_constructor: code -> driver, team -> constructor
+    "entries": np.dtype([("round", "<i2"), ("code", "<i4"), ("team", "<i4")]),
+}
+
+_STORE_FORMAT = 1
+
+
+def _intern(table: Dict[str, int], value: str) -> int:
+    code = table.get(value)
+    if code is None:
+        code = table[value] = len(table)
+    return code
+
+
+@dataclass
+class FeatureStore:
+    """
+    Versioned on-disk store for CircuitAgent / DriverAgent / ConstructorAgent
+    outputs, i.e. the FusionAgent contexts of a season.
+
+    Layout: {root}/{version}/{params}/{season}/ holding one memory-mapped
+    .npy record file per table plus index.json with the id tables. `version`
+    is the hash of the code that produces the features, so an agent change
+    starts a fresh namespace instead of serving outdated rows. Seasons are
+    written atomically (temp directory + rename).
+    """
+
+    root: Path = settings.FEATURE_DIR
+    version: str = "dev"
+    # season dir -> (index.json identity, index, memory-mapped tables)
+    _opened: Dict[Path, Tuple[Tuple[int, int], Dict, Dict[str, np.ndarray]]] = field(
+        init=False, repr=False, default_factory=dict
+    )
+
+    def path(self, season: int, window: int = 5, cross_season: bool = False) -> Path:
+        params = f"w{window}{'x' if cross_season else ''}"
+        return Path(self.root) / self.version / params / str(season)
+
+    def _open(
+        self, season: int, window: int, cross_season: bool
+    ) -> Optional[Tuple[Dict, Dict[str, Any]]]:
+        """
+        The season's index and memory-mapped tables. Kept open between
+        reads; a rewrite replaces the directory, which changes the
+        index.json inode and invalidates the entry.
+        """
+        path = self.path(season, window, cross_season)
+        try:
+            stat = os.stat(path / "index.json")
+        except OSError:
+            self._opened.pop(path, None)
+            return None
+
+        identity = (stat.st_ino, stat.st_mtime_ns)
+        opened = self._opened.get(path)
+        if opened is not None and opened[0] == identity:
+            return opened[1], opened[2]
+
+        try:
+            with open(path / "index.json") as f:
+                index = json.load(f)
+            if index.get("format") != _STORE_FORMAT:
+                return None
+            tables = {name: np.load(path / f"{name}.npy", mmap_mode="r") for name in _TABLES}
+        except (OSError, ValueError):
+            return None
+
+        self._opened[path] = (identity, index, tables)
+        return index, tables
+
+    def index(self, season: int, window: int = 5, cross_season: bool = False) -> Optional[Dict]:
+        opened = self._open(season, window, cross_season)
+        return None if opened is None else opened[0]
+
+    # -------- Write -------- #
+
+    def write(
+        self,
+        season: int,
+        contexts: Sequence[dict],
+        window: int = 5,
+        cross_season: bool = False,
+        source_rounds: Iterable[int] = (),
+        source: str = "",
+    ) -> None:
+        """
+        Replaces the stored season with `contexts` (as built by
+        pipeline.season_contexts). `source_rounds` records which rounds had
+        results at write time and `source` the fingerprint of those results,
+        so readers can tell when the season moved on or was amended.
+        """
+        drivers: Dict[str, int] = {}
+        constructors: Dict[str, int] = {}
+        circuits: Dict[str, int] = {}
+        rows: Dict[str, List[tuple]] = {name: [] for name in _TABLES}
+
+        for context in sorted(contexts, key=lambda c: c["round"]):
+            r = context["round"]
+            for driver_id, f in context["drivers"].items():
+                rows["drivers"].append(
+                    (r, _intern(drivers, driver_id))
+                    + tuple(f[k] for k in _DRIVER_FIELDS)
+                    + (f["race_count"],)
+                )
+            for team, f in context["constructors"].items():
+                rows["constructors"].append(
+                    (r, _intern(constructors, team)) + tuple(f[k] for k in _CONSTRUCTOR_FIELDS)
+                )
+            c = context["circuit"]
+            circuit = json.dumps([c["circuit_name"], c["location"]])
+            rows["circuit"].append(
+                (r, _intern(circuits, circuit))
+                + tuple(c[k] for k in _CIRCUIT_FIELDS)
+                + (-1 if c["lap_count"] is None else c["lap_count"],)
+            )
+            for driver_id, team in context["driver_to_constructor"].items():
+                rows["entries"].append(
+                    (r, _intern(drivers, driver_id), _intern(constructors, team))
+                )
+
+        target = self.path(season, window, cross_season)
+        tmp = target.with_name(f".{target.name}.{uuid.uuid4().hex}")
+        tmp.mkdir(parents=True)
+        try:
+            for name, dtype in _TABLES.items():
+                np.save(tmp / f"{name}.npy", np.array(rows[name], dtype=dtype))
+            with open(tmp / "index.json", "w") as f:
+                json.dump({
+                    "format": _STORE_FORMAT,
+                    "season": season,
+                    "rounds": sorted({c["round"] for c in contexts}),
+                    "source_rounds": sorted(int(r) for r in source_rounds),
+                    "source": source,
+                    "drivers": list(drivers),
+                    "constructors": list(constructors),
+                    "circuits": [json.loads(c) for c in circuits],
+                }, f)
+
+            self._publish(tmp, target)
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    @staticmethod
+    def _publish(tmp: Path, target: Path) -> None:
+        """
+        Moves the finished `tmp` directory to `target`. The old season is
+        renamed aside first (a directory cannot be replaced while it has
+        files); when a concurrent writer publishes in between, its complete
+        season is kept, as it was built from the same or newer results.
+        """
+        old = target.with_name(f".{target.name}.{uuid.uuid4().hex}.old")
+        try:
+            os.replace(target, old)
+        except FileNotFoundError:
+            pass
+        try:
+            os.replace(tmp, target)
+        except OSError as e:
+            # Non-empty target: another writer's season landed first (it may
+            # already be moving aside for a third one)
+            if e.errno not in (errno.ENOTEMPTY, errno.EEXIST):
+                raise
+        finally:
+            shutil.rmtree(old, ignore_errors=True)
+
+    # -------- Read -------- #
+
+    @staticmethod
+    def _rows(records: np.ndarray, rounds: Optional[Sequence[int]]) -> np.ndarray:
+        if rounds is None:
+            return records
+        # Rows are sorted by round: slice the covering range, then filter
+        lo = np.searchsorted(records["round"], rounds[0], side="left")
+        hi = np.searchsorted(records["round"], rounds[-1], side="right")
+        block = records[lo:hi]
+        return block[np.isin(block["round"], rounds)]
+
+    def read(
+        self,
+        season: int,
+        rounds: Optional[Iterable[int]] = None,
+        window: int = 5,
+        cross_season: bool = False,
+    ) -> Optional[List[dict]]:
+        """
+        FusionAgent contexts for the stored rounds of a season (all of them,
+        or those in `rounds`), in round order. None if the season is not stored.
+        """
+        opened = self._open(season, window, cross_season)
+        if opened is None:
+            return None
+
+        index, records = opened
+        rounds = None if rounds is None else sorted(set(rounds))
+        if rounds == []:
+            return []
+
+        drivers, constructors, circuits = index["drivers"], index["constructors"], index["circuits"]
+        contexts: Dict[int, dict] = {}
+
+        def context(r: int) -> dict:
+            if r not in contexts:
+                contexts[r] = {
+                    "season": season,
+                    "round": r,
+                    "circuit": {},
+                    "drivers": {},
+                    "constructors": {},
+                    "driver_to_constructor": {},
+                }
+            return contexts[r]
+
+        tables = {name: self._rows(records[name], rounds) for name in _TABLES}
+
+        # tolist() turns each record into a tuple of Python scalars in one pass
+        for r, code, *values, lap_count in tables["circuit"].tolist():
+            name, location = circuits[code]
+            context(r)["circuit"] = {
+                "circuit_name": name,
+                "location": location,
+                **dict(zip(_CIRCUIT_FIELDS, values)),
+                "lap_count": None if lap_count < 0 else lap_count,
+            }
+        for r, code, *values, race_count in tables["drivers"].tolist():
+            driver_id = drivers[code]
+            context(r)["drivers"][driver_id] = {
+                "driver_id": driver_id,
+                **dict(zip(_DRIVER_FIELDS, values)),
+                "race_count": race_count,
+            }
+        for r, code, *values in tables["constructors"].tolist():
+            context(r)["constructors"][constructors[code]] = dict(zip(_CONSTRUCTOR_FIELDS, values))
+        for r, code, team in tables["entries"].tolist():
+            context(r)["driver_to_constructor"][drivers[code]] = constructors[team]
+
+        return [contexts[r] for r in sorted(contexts)]
@@ -1,11 +1,57 @@
 from __future__ import annotations
-from dataclasses import dataclass
-from typing import Any, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+import threading
 import time
 import requests
+from requests.adapters import HTTPAdapter
 
 from config.settings import settings
+from services.cache_policy import (
+    CachePolicy,
+    cache_key,
+    conditional_headers,
+    disk_ttl,
+    is_fresh,
+    make_entry,
+)
+from services import metrics
 from services.cache_service import CacheService
+from services.results_frame import COMPACT_VERSION, ResultsFrame
+from services.singleflight import SingleFlight
+from services.rate_limit import (
+    CircuitBreaker,
+    CircuitOpenError,
+    Counters,
+    RateLimiter,
+    TokenBucket,
+    backoff_delay,
+    parse_retry_after,
+)
+
+# Shared by every JolpicaService instance so parallel callers cannot overrun the API
+_IN_FLIGHT = threading.BoundedSemaphore(settings.JOLPICA_MAX_IN_FLIGHT)
+_RATE = RateLimiter([
+    TokenBucket(rate=settings.JOLPICA_RATE_PER_SEC, capacity=settings.JOLPICA_BURST),
+    TokenBucket(rate=settings.JOLPICA_RATE_PER_HOUR / 3600, capacity=settings.JOLPICA_RATE_PER_HOUR),
+])
+_BREAKER = CircuitBreaker(
+    failure_threshold=settings.JOLPICA_BREAKER_THRESHOLD,
+    reset_timeout=settings.JOLPICA_BREAKER_RESET,
+)
+_STATS = Counters()
+_FLIGHTS = SingleFlight()
+
+# Background refreshes (stale-while-revalidate / refresh-ahead), one per key at a time
+_REFRESHER = ThreadPoolExecutor(max_workers=2, thread_name_prefix="jolpica-refresh")
+_REFRESHING: set = set()
+_REFRESHING_LOCK = threading.Lock()
+
+
+def _count(event: str, amount: float = 1) -> None:
+    _STATS.incr(event, amount)
+    metrics.incr("jolpica_events_total", amount, event=event)
 
 
 @dataclass
@@ -13,40 +59,286 @@ class JolpicaService:
     cache: CacheService
     timeout: int = 20
     max_retries: int = 3
+    page_size: int = 100
+    policy: CachePolicy = field(default_factory=CachePolicy)
+    # Serve expired entries immediately and refresh them in the background
+    stale_while_revalidate: bool = settings.JOLPICA_STALE_WHILE_REVALIDATE
+    # Refresh fresh entries in the background once less than this share of their TTL is left
+    refresh_ahead: float = settings.JOLPICA_REFRESH_AHEAD
+    _session: requests.Session = field(init=False, repr=False)
 
-    def _request_json(self, url: str, params: Optional[dict] = None) -> Dict[str, Any]:
+    def __post_init__(self):
+        # Keep-alive pool sized to the in-flight limit
+        pool = settings.JOLPICA_MAX_IN_FLIGHT
+        adapter = HTTPAdapter(pool_connections=pool, pool_maxsize=pool)
+        self._session = requests.Session()
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+
+    def close(self) -> None:
+        self._session.close()
+
+    @staticmethod
+    def stats() -> Dict[str, Any]:
+        """
+        Process-wide request counters plus the circuit breaker state.
+        """
+        return {**_STATS.snapshot(), "breaker": _BREAKER.state}
+
+    def _request(
+        self, url: str, params: Optional[dict] = None, headers: Optional[dict] = None
+    ) -> Tuple[int, Optional[Dict[str, Any]], Mapping[str, str]]:
+        """
+        GET with rate limiting and retries. Returns (status, json, headers);
+        json is None on a 304 answer to a conditional request.
+        """
+        if not _BREAKER.allow():
+            _count("rejected")
+            raise CircuitOpenError("Jolpica circuit open: upstream recently unhealthy")
+
+        try:
+            return self._attempts(url, params, headers)
+        finally:
+            _BREAKER.release()
+
+    def _attempts(
+        self, url: str, params: Optional[dict], headers: Optional[dict]
+    ) -> Tuple[int, Optional[Dict[str, Any]], Mapping[str, str]]:
+        """
+        The retry loop of _request; records the outcome on the breaker.
+        """
         last_err = None
 
         for attempt in range(1, self.max_retries + 1):
+            if attempt > 1:
+                _count("retries")
+
+            _count("rate_wait_s", _RATE.acquire())
+            _count("requests")
+
             try:
-                response = requests.get(url, params=params, timeout=self.timeout)
+                with _IN_FLIGHT, metrics.timed(
+                    "jolpica_request_seconds", span="jolpica.request", attrs={"url": url}
+                ):
+                    response = self._session.get(
+                        url, params=params, headers=headers, timeout=self.timeout
+                    )
+            except requests.RequestException as e:
+                last_err = e
+                metrics.incr("jolpica_responses_total", status="error")
+                time.sleep(backoff_delay(attempt))
+                continue
+
+            metrics.incr("jolpica_responses_total", status=response.status_code)
 
+            if response.status_code == 429 or response.status_code >= 500:
                 if response.status_code == 429:
-                    time.sleep(0.6 * attempt)
-                    continue
+                    _count("throttled")
+                last_err = requests.HTTPError(f"HTTP {response.status_code} for {url}")
 
-                response.raise_for_status()
-                return response.json()
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                if retry_after is None:
+                    time.sleep(backoff_delay(attempt))
+                elif retry_after > settings.JOLPICA_MAX_RETRY_AFTER:
+                    # Blocking a request thread that long is worse than failing
+                    break
+                else:
+                    # Pause every caller, not just this one
+                    _RATE.pause(retry_after)
+                continue
+
+            if response.status_code == 304:
+                _BREAKER.record_success()
+                _count("not_modified")
+                return 304, None, response.headers
 
-            except Exception as e:
+            try:
+                response.raise_for_status()
+                data = response.json()
+            except requests.HTTPError as e:
+                # Other 4xx are our fault, retrying will not help
+                _BREAKER.record_success()
+                _count("failures")
+                raise RuntimeError(f"Jolpica request failed: {e}") from e
+            except ValueError as e:
                 last_err = e
-                time.sleep(0.4 * attempt)
+                time.sleep(backoff_delay(attempt))
+                continue
 
+            _BREAKER.record_success()
+            return response.status_code, data, response.headers
+
+        _BREAKER.record_failure()
+        _count("failures")
         raise RuntimeError(f"Jolpica request failed: {last_err}")
 
+    def _request_json(self, url: str, params: Optional[dict] = None) -> Dict[str, Any]:
+        return self._request(url, params=params)[1]
+
+    def _url(self, path: str) -> str:
+        path = path if path.startswith("/") else f"/{path}"
+        return f"{settings.JOLPICA_BASE}{path}"
+
+    def _store(
+        self,
+        path: str,
+        params: Optional[dict],
+        data: Any,
+        ttl: int,
+        headers: Optional[Mapping[str, str]] = None,
+    ) -> None:
+        ttl = self.policy.ttl(path, data, ttl)
+        self.cache.set(cache_key(path, params), make_entry(data, ttl, headers), ttl=disk_ttl(ttl))
+
+    def _refresh_due(self, entry: Dict[str, Any]) -> bool:
+        if not self.refresh_ahead or entry["expires_at"] is None:
+            return False
+        lifetime = entry["expires_at"] - entry["fetched_at"]
+        return entry["expires_at"] - time.time() < self.refresh_ahead * lifetime
+
+    def _refresh_in_background(self, key: str, fetch: Callable[[], Any]) -> None:
+        with _REFRESHING_LOCK:
+            if key in _REFRESHING:
+                return
+            _REFRESHING.add(key)
+
+        def task():
+            try:
+                fetch()
+                _count("background_refreshes")
+            except Exception:
+                _count("background_refresh_failures")
+            finally:
+                with _REFRESHING_LOCK:
+                    _REFRESHING.discard(key)
+
+        _REFRESHER.submit(task)
+
+    def _read_through(
+        self,
+        path: str,
+        params: Optional[dict],
+        fetch: Callable[[Optional[Dict[str, Any]]], Any],
+    ) -> Any:
+        """
+        Cache lookup shared by every endpoint. `fetch(entry)` downloads and
+        stores the payload; `entry` is the expired envelope, if any.
+        """
+        key = cache_key(path, params)
+        entry = self.cache.get(key)
+
+        def coalesced() -> Any:
+            return _FLIGHTS.do(key, lambda: self._fetch_locked(key, entry, fetch))
+
+        if entry is not None:
+            if is_fresh(entry):
+                if self._refresh_due(entry):
+                    self._refresh_in_background(key, coalesced)
+                return entry["data"]
+
+            if self.stale_while_revalidate:
+                _count("stale_served")
+                self._refresh_in_background(key, coalesced)
+                return entry["data"]
+
+        try:
+            return coalesced()
+        except RuntimeError:
+            # Upstream down or circuit open: an expired copy beats an error
+            if entry is None:
+                raise
+            _count("stale_served")
+            return entry["data"]
+
+    def _fetch_locked(
+        self,
+        key: str,
+        entry: Optional[Dict[str, Any]],
+        fetch: Callable[[Optional[Dict[str, Any]]], Any],
+    ) -> Any:
+        """
+        Runs `fetch` under a lock in the cache directory so other worker
+        processes wait for this download instead of repeating it.
+        """
+        with self.cache.lock(key, expire=self.timeout * (self.max_retries + 1)):
+            latest = self.cache.get(key, skip_memory=True)
+            seen_at = entry["fetched_at"] if entry is not None else 0
+            if latest is not None and latest["fetched_at"] > seen_at and is_fresh(latest):
+                _count("coalesced")
+                return latest["data"]
+            return fetch(entry)
+
     def get(self, path: str, params: Optional[dict] = None, ttl: int = None) -> Dict[str, Any]:
         ttl = settings.TTL_MED if ttl is None else ttl
-        path = path if path.startswith("/") else f"/{path}"
-        url = f"{settings.JOLPICA_BASE}{path}"
 
-        cache_key = f"jolpica::{url}::{params}"
-        cached = self.cache.get(cache_key)
-        if cached is not None:
-            return cached
+        def fetch(entry: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+            # Expired entries are revalidated rather than blindly refetched
+            status, data, headers = self._request(
+                self._url(path), params=params, headers=conditional_headers(entry)
+            )
+            if status == 304 and entry is not None:
+                data = entry["data"]
+
+            self._store(path, params, data, ttl, headers)
+            return data
+
+        return self._read_through(path, params, fetch)
+
+    @staticmethod
+    def _fetch_all(fn: Callable[[Any], Any], items: Iterable[Any]) -> List[Any]:
+        """
+        Runs fn over items on a thread pool, preserving order.
+        The global in-flight semaphore bounds the actual HTTP concurrency.
+        """
+        items = list(items)
+        if len(items) <= 1:
+            return [fn(item) for item in items]
+
+        workers = min(len(items), settings.JOLPICA_MAX_IN_FLIGHT)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="jolpica") as pool:
+            return list(pool.map(fn, items))
 
-        data = self._request_json(url, params=params)
-        self.cache.set(cache_key, data, ttl=ttl)
-        return data
+    def _get_paginated(self, path: str) -> List[Dict[str, Any]]:
+        """
+        Fetches the first page to learn MRData.total, then the remaining
+        offset/limit pages concurrently.
+        """
+        url = self._url(path)
+        first = self._request_json(url, params={"limit": self.page_size, "offset": 0})
+
+        total = int(first["MRData"].get("total", 0))
+        offsets = range(self.page_size, total, self.page_size)
+        rest = self._fetch_all(
+            lambda offset: self._request_json(url, params={"limit": self.page_size, "offset": offset}),
+            offsets,
+        )
+        return [first, *rest]
+
+    @staticmethod
+    def _merge_races(pages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # A race can straddle two pages; its Results continue on the next one
+        races: Dict[int, Dict[str, Any]] = {}
+        for page in pages:
+            for race in page["MRData"]["RaceTable"]["Races"]:
+                round_no = int(race["round"])
+                if round_no in races:
+                    races[round_no]["Results"].extend(race.get("Results", []))
+                else:
+                    races[round_no] = {**race, "Results": list(race.get("Results", []))}
+        return [races[r] for r in sorted(races)]
+
+    @staticmethod
+    def _round_payload(race: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "MRData": {
+                "total": str(len(race.get("Results", []))),
+                "RaceTable": {
+                    "season": race["season"],
+                    "round": race["round"],
+                    "Races": [race],
+                },
+            }
+        }
 
     # -------- Convenience endpoints -------- #
 
@@ -63,6 +355,66 @@ class JolpicaService:
             ttl=settings.TTL_LONG,
         )
 
+    def circuit_races(self, circuit_id: str, limit: int = 100) -> Dict[str, Any]:
+        """
+        Every race held at a circuit, all seasons (scheduled ones included).
+        """
+        return self.get(f"/circuits/{circuit_id}/races.json", params={"limit": limit}, ttl=settings.TTL_LONG)
+
+    def season_results(self, season: int) -> Dict[int, Dict[str, Any]]:
+        """
+        Bulk-fetches a whole season of results and splits it by round.
+        Returns {round: payload} where each payload has the same shape as
+        `results(season, round)`, and fills those per-round cache entries too.
+        """
+        path = f"/{season}/results.json"
+
+        def fetch(entry: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+            races = self._merge_races(self._get_paginated(path))
+            # The season keeps growing until it ends, completed rounds do not
+            self._store(path, None, races, settings.TTL_MED)
+
+            for race in races:
+                self._store(
+                    f"/{season}/{race['round']}/results.json",
+                    {"limit": 100},
+                    self._round_payload(race),
+                    settings.TTL_LONG,
+                )
+            return races
+
+        races = self._read_through(path, None, fetch)
+        return {int(race["round"]): self._round_payload(race) for race in races}
+
+    @staticmethod
+    def frame_entry(season: int) -> Tuple[str, Dict[str, Any]]:
+        """
+        (path, params) under which season_frame caches the compact encoding.
+        The encoding version is part of the params, so entries of an older
+        layout (past seasons never expire) are missed instead of misread.
+        """
+        return f"/{season}/results.json", {"format": "compact", "version": COMPACT_VERSION}
+
+    def season_frame(self, season: int) -> ResultsFrame:
+        """
+        A season's results as a ResultsFrame. The cache holds the compact
+        record encoding (only the fields the agents read), so warm loads skip
+        JSON entirely.
+        """
+        path, params = self.frame_entry(season)
+
+        def fetch(entry: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+            season_results = self.season_results(season)
+            frame = ResultsFrame.from_races(
+                payload["MRData"]["RaceTable"]["Races"][0]
+                for _, payload in sorted(season_results.items())
+            )
+            compact = frame.to_compact()
+            self._store(path, params, compact, settings.TTL_MED)
+            return compact
+
+        return ResultsFrame.from_compact(self._read_through(path, params, fetch))
+
     def driver_standings(self, season: int) -> Dict[str, Any]:
         return self.get(f"/{season}/driverstandings.json", ttl=settings.TTL_MED)
 
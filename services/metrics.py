@@ -0,0 +1,347 @@
+from __future__ import annotations
+from bisect import bisect_left
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Tuple
+import threading
+import time
+
+from config.settings import settings
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+# Module flags rather than a registry attribute: the disabled path is one global read
+_METRICS = settings.METRICS_ENABLED
+_TRACING = settings.TRACING_ENABLED
+
+
+def enable(metrics: bool = True, tracing: Optional[bool] = None) -> None:
+    """
+    Switches collection on or off at runtime (both default to off).
+    """
+    global _METRICS, _TRACING
+    _METRICS = metrics
+    if tracing is not None:
+        _TRACING = tracing
+
+
+def enabled() -> bool:
+    return _METRICS
+
+
+def tracing_enabled() -> bool:
+    return _TRACING
+
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(labels: Labels, extra: Labels = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+# -------- Metrics -------- #
+
+@dataclass
+class Histogram:
+    buckets: Tuple[float, ...] = LATENCY_BUCKETS
+    counts: List[int] = field(default_factory=list)
+    total: float = 0.0
+    count: int = 0
+
+    def __post_init__(self):
+        # One slot per bucket plus the +Inf overflow
+        self.counts = [0] * (len(self.buckets) + 1)
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def cumulative(self) -> List[int]:
+        out, running = [], 0
+        for c in self.counts:
+            running += c
+            out.append(running)
+        return out
+
+
+@dataclass
+class MetricsRegistry:
+    """
+    Process-wide counters and latency histograms, keyed by name and labels.
+    """
+
+    _counters: Dict[str, Dict[Labels, float]] = field(init=False, default_factory=dict)
+    _histograms: Dict[str, Dict[Labels, Histogram]] = field(init=False, default_factory=dict)
+    _lock: threading.Lock = field(init=False, repr=False, default_factory=threading.Lock)
+
+    def incr(self, name: str, amount: float, labels: Labels) -> None:
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[labels] = series.get(labels, 0) + amount
+
+    def observe(self, name: str, value: float, labels: Labels) -> None:
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(labels)
+            if histogram is None:
+                histogram = series[labels] = Histogram()
+            histogram.observe(value)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def drain(self) -> Dict[str, Any]:
+        """
+        Everything recorded since the last drain, as a picklable delta for
+        `merge`, and resets the registry.
+        """
+        with self._lock:
+            delta = {
+                "counters": [
+                    (name, labels, value)
+                    for name, series in self._counters.items()
+                    for labels, value in series.items()
+                ],
+                "histograms": [
+                    (name, labels, h.buckets, h.counts, h.total, h.count)
+                    for name, series in self._histograms.items()
+                    for labels, h in series.items()
+                ],
+            }
+            self._counters.clear()
+            self._histograms.clear()
+        return delta
+
+    def merge(self, delta: Dict[str, Any]) -> None:
+        """
+        Adds a `drain` delta, e.g. from a worker process, to this registry.
+        """
+        with self._lock:
+            for name, labels, value in delta["counters"]:
+                series = self._counters.setdefault(name, {})
+                series[labels] = series.get(labels, 0) + value
+            for name, labels, buckets, counts, total, count in delta["histograms"]:
+                series = self._histograms.setdefault(name, {})
+                histogram = series.get(labels)
+                if histogram is None:
+                    histogram = series[labels] = Histogram(buckets)
+                histogram.counts = [a + b for a, b in zip(histogram.counts, counts)]
+                histogram.total += total
+                histogram.count += count
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        JSON-serializable view: counters as values, histograms as
+        count / sum / cumulative bucket counts.
+        """
+        with self._lock:
+            return {
+                "counters": {
+                    name: [{"labels": dict(labels), "value": value} for labels, value in series.items()]
+                    for name, series in self._counters.items()
+                },
+                "histograms": {
+                    name: [
+                        {
+                            "labels": dict(labels),
+                            "count": h.count,
+                            "sum": h.total,
+                            "buckets": dict(zip([*map(str, h.buckets), "+Inf"], h.cumulative())),
+                        }
+                        for labels, h in series.items()
+                    ]
+                    for name, series in self._histograms.items()
+                },
+            }
+
+    def prometheus_text(self) -> str:
+        """
+        Prometheus text exposition format (version 0.0.4).
+        """
+        lines: List[str] = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines.append(f"# TYPE {name} counter")
+                for labels, value in series.items():
+                    lines.append(f"{name}{_format_labels(labels)} {value:g}")
+
+            for name, series in sorted(self._histograms.items()):
+                lines.append(f"# TYPE {name} histogram")
+                for labels, h in series.items():
+                    bounds = [f"{b:g}" for b in h.buckets] + ["+Inf"]
+                    for bound, count in zip(bounds, h.cumulative()):
+                        lines.append(f"{name}_bucket{_format_labels(labels, (('le', bound),))} {count}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {h.total:g}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+def incr(name: str, amount: float = 1, **labels: Any) -> None:
+    if _METRICS:
+        REGISTRY.incr(name, amount, _labels(labels))
+
+
+def observe(name: str, value: float, **labels: Any) -> None:
+    if _METRICS:
+        REGISTRY.observe(name, value, _labels(labels))
+
+
+def snapshot() -> Dict[str, Any]:
+    return REGISTRY.snapshot()
+
+
+def prometheus_text() -> str:
+    return REGISTRY.prometheus_text()
+
+
+def drain() -> Dict[str, Any]:
+    return REGISTRY.drain()
+
+
+def merge(delta: Dict[str, Any]) -> None:
+    REGISTRY.merge(delta)
+
+
+# -------- Tracing -------- #
+
+@dataclass
+class Span:
+    name: str
+    attrs: Dict[str, Any]
+    start: float = field(default_factory=time.perf_counter)
+    end: Optional[float] = None
+    children: List["Span"] = field(default_factory=list)
+
+    def to_dict(self, origin: Optional[float] = None) -> Dict[str, Any]:
+        origin = self.start if origin is None else origin
+        end = self.end if self.end is not None else time.perf_counter()
+        return {
+            "name": self.name,
+            "attrs": self.attrs,
+            "start_ms": round((self.start - origin) * 1000, 3),
+            "duration_ms": round((end - self.start) * 1000, 3),
+            "children": [c.to_dict(origin) for c in self.children],
+        }
+
+
+_CURRENT: ContextVar[Optional[Span]] = ContextVar("metrics_current_span", default=None)
+_TRACES: Deque[Dict[str, Any]] = deque(maxlen=settings.TRACE_BUFFER)
+
+
+def recent_traces() -> List[Dict[str, Any]]:
+    """
+    The most recent finished root spans (see `trace`), oldest first.
+    """
+    return list(_TRACES)
+
+
+# -------- Context managers -------- #
+
+class _Noop:
+    __slots__ = ()
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _Noop()
+
+
+class _Timed:
+    """
+    Records the block's wall time into a histogram and/or a child span.
+    """
+
+    __slots__ = ("metric", "labels", "span_name", "attrs", "root", "span", "token", "start")
+
+    def __init__(
+        self,
+        metric: Optional[str],
+        labels: Dict[str, Any],
+        span_name: Optional[str],
+        attrs: Dict[str, Any],
+        root: bool,
+    ):
+        self.metric = metric
+        self.labels = labels
+        self.span_name = span_name
+        self.attrs = attrs
+        self.root = root
+        self.span = None
+
+    def __enter__(self) -> Optional[Span]:
+        if self.span_name is not None:
+            parent = _CURRENT.get()
+            if parent is not None or self.root:
+                self.span = Span(self.span_name, self.attrs)
+                if parent is not None:
+                    parent.children.append(self.span)
+                self.token = _CURRENT.set(self.span)
+        self.start = time.perf_counter()
+        return self.span
+
+    def __exit__(self, *exc) -> bool:
+        end = time.perf_counter()
+        if self.metric is not None:
+            REGISTRY.observe(self.metric, end - self.start, _labels(self.labels))
+        if self.span is not None:
+            self.span.end = end
+            _CURRENT.reset(self.token)
+            if self.root and _CURRENT.get() is None:
+                _TRACES.append(self.span.to_dict())
+        return False
+
+
+def timed(
+    metric: str,
+    span: Optional[str] = None,
+    attrs: Optional[Dict[str, Any]] = None,
+    **labels: Any,
+):
+    """
+    `with timed("x_seconds", span="x", k=v):` observes the block's duration
+    into the `metric` histogram (when metrics are on) and records it as a
+    child span of the current trace (when tracing is on and one is active).
+    Span attributes are the labels plus `attrs` (kept off the metric to bound
+    its cardinality). A shared no-op when both are off.
+    """
+    record = metric if _METRICS else None
+    span = span if _TRACING else None
+    if record is None and span is None:
+        return _NOOP
+    return _Timed(record, labels, span, {**labels, **(attrs or {})}, root=False)
+
+
+def trace(name: str, **attrs: Any):
+    """
+    Root span for one prediction / request; kept in `recent_traces()` once
+    finished. Nested `timed(..., span=...)` blocks become its children,
+    including those run on threads started with contextvars.copy_context().
+    """
+    if not _TRACING:
+        return _NOOP
+    return _Timed(None, {}, name, attrs, root=True)
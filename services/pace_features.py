@@ -0,0 +1,281 @@
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+import argparse
+import os
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from config.settings import settings
+
+# FastF1 itself is only imported by extraction: reading stored features needs neither it nor network
+
+# -------- Per-driver weekend table -------- #
+
+PACE_DTYPE = np.dtype([
+    ("driver", "U32"),          # Jolpica / Ergast driverId
+    ("quali_gap", "<f4"),       # % off pole, best of Q1-Q3
+    ("long_run_pace", "<f4"),   # median green-flag long-run lap, seconds
+    ("long_run_gap", "<f4"),    # % off the quickest long-run pace of the session
+    ("tyre_deg", "<f4"),        # seconds lost per lap of tyre life on long runs
+    ("long_run_laps", "<i2"),
+])
+_FIELDS = ("quali_gap", "long_run_pace", "long_run_gap", "tyre_deg", "long_run_laps")
+
+# A stint counts as a long run from this many clean laps
+LONG_RUN_MIN_LAPS = 5
+# Laps slower than the stint median by more than this factor are traffic / cool-down laps
+LONG_RUN_CUTOFF = 1.07
+
+# FP2 is the usual long-run session; sprint weekends only have FP1
+PRACTICE_SESSIONS = ("FP2", "FP1")
+
+
+# -------- Reductions -------- #
+
+def qualifying_gaps(results: pd.DataFrame) -> Dict[str, float]:
+    """
+    driverId -> best Q1/Q2/Q3 time as % off pole (NaN without a time).
+    Needs the session results only, no laps.
+    """
+    columns = [c for c in ("Q1", "Q2", "Q3") if c in results]
+    if results.empty or not columns:
+        return {}
+    best = results[columns].min(axis=1).dt.total_seconds().to_numpy(dtype=float)
+    if np.isnan(best).all():
+        return {}
+    pole = np.nanmin(best)
+    return dict(zip(results["DriverId"], (best - pole) / pole * 100))
+
+
+def long_runs(laps: pd.DataFrame) -> Dict[str, Tuple[float, float, int]]:
+    """
+    Driver abbreviation -> (median long-run lap in s, tyre degradation in
+    s/lap, laps used). Long runs are stints of green-flag, accurate,
+    non-pit laps; degradation is the lap-weighted mean of per-stint lap time
+    vs tyre life slopes (fuel burn-off is not corrected for).
+    """
+    clean = (
+        laps["LapTime"].notna()
+        & laps["PitInTime"].isna()
+        & laps["PitOutTime"].isna()
+        & laps["IsAccurate"].fillna(False).astype(bool)
+        & ~laps["Deleted"].fillna(False).astype(bool)
+        & (laps["TrackStatus"].astype(str) == "1")
+    )
+    frame = pd.DataFrame({
+        "driver": laps["Driver"][clean],
+        "stint": laps["Stint"][clean],
+        "life": laps["TyreLife"][clean].astype(float),
+        "time": laps["LapTime"][clean].dt.total_seconds(),
+    })
+
+    runs: Dict[str, Tuple[float, float, int]] = {}
+    for driver, driver_laps in frame.groupby("driver"):
+        times: List[np.ndarray] = []
+        slopes: List[float] = []
+        weights: List[int] = []
+        for _, stint in driver_laps.groupby("stint"):
+            if len(stint) < LONG_RUN_MIN_LAPS:
+                continue
+            stint = stint[stint["time"] <= stint["time"].median() * LONG_RUN_CUTOFF]
+            if len(stint) < LONG_RUN_MIN_LAPS:
+                continue
+            times.append(stint["time"].to_numpy())
+            life = stint["life"].to_numpy()
+            if np.isfinite(life).all() and np.ptp(life) > 0:
+                slopes.append(float(np.polyfit(life, stint["time"].to_numpy(), 1)[0]))
+                weights.append(len(stint))
+
+        if times:
+            all_times = np.concatenate(times)
+            deg = float(np.average(slopes, weights=weights)) if slopes else float("nan")
+            runs[driver] = (float(np.median(all_times)), deg, len(all_times))
+    return runs
+
+
+def reduce_weekend(
+    qualifying: Optional[pd.DataFrame],
+    practice_laps: Optional[pd.DataFrame],
+    practice_results: Optional[pd.DataFrame],
+) -> np.ndarray:
+    """
+    One PACE_DTYPE row per driver seen in qualifying or practice.
+    Missing values are NaN (laps: 0).
+    """
+    gaps = qualifying_gaps(qualifying) if qualifying is not None else {}
+
+    runs: Dict[str, Tuple[float, float, int]] = {}
+    if practice_laps is not None and practice_results is not None and not practice_laps.empty:
+        ids = dict(zip(practice_results["Abbreviation"], practice_results["DriverId"]))
+        runs = {ids[a]: r for a, r in long_runs(practice_laps).items() if a in ids}
+
+    best = min((pace for pace, _, _ in runs.values()), default=float("nan"))
+    drivers = sorted(set(gaps) | set(runs))
+    table = np.zeros(len(drivers), dtype=PACE_DTYPE)
+    for i, driver in enumerate(drivers):
+        pace, deg, n = runs.get(driver, (float("nan"), float("nan"), 0))
+        table[i] = (driver, gaps.get(driver, float("nan")), pace, (pace - best) / best * 100, deg, n)
+    return table
+
+
+# -------- Store -------- #
+
+@dataclass
+class PaceStore:
+    """
+    Per-weekend FastF1 pace tables: {root}/{version}/{season}/{round}.npy,
+    one small record file per weekend, written atomically. `version` is the
+    hash of this module so a reduction change starts a fresh namespace.
+    """
+
+    root: Path = settings.FEATURE_DIR / "pace"
+    version: str = "dev"
+    # file -> (mtime_ns, decoded features)
+    _decoded: Dict[Path, Tuple[int, Dict[str, Dict]]] = field(init=False, repr=False, default_factory=dict)
+
+    def path(self, season: int, round_no: int) -> Path:
+        return Path(self.root) / self.version / str(season) / f"{round_no:02d}.npy"
+
+    def has(self, season: int, round_no: int) -> bool:
+        return self.path(season, round_no).exists()
+
+    def write(self, season: int, round_no: int, table: np.ndarray) -> None:
+        target = self.path(season, round_no)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(f".{target.stem}.{uuid.uuid4().hex}.npy")
+        try:
+            np.save(tmp, table.astype(PACE_DTYPE, copy=False))
+            os.replace(tmp, target)
+        finally:
+            tmp.unlink(missing_ok=True)
+
+    def read(self, season: int, round_no: int) -> Optional[Dict[str, Dict]]:
+        """
+        driverId -> {quali_gap, long_run_pace, long_run_gap, tyre_deg,
+        long_run_laps} with None for missing values; None if not extracted.
+        """
+        path = self.path(season, round_no)
+        try:
+            mtime = path.stat().st_mtime_ns
+        except OSError:
+            return None
+
+        cached = self._decoded.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        table = np.load(path)
+        features = {}
+        for driver, *values in table.tolist():
+            features[driver] = {
+                name: (None if value != value else round(value, 3) if isinstance(value, float) else value)
+                for name, value in zip(_FIELDS, values)
+            }
+        self._decoded[path] = (mtime, features)
+        return features
+
+
+# -------- Extraction -------- #
+
+def _init_worker() -> None:
+    import fastf1
+    fastf1.set_log_level("WARNING")
+
+
+def _unavailable() -> Tuple[type, ...]:
+    """
+    What FastF1 raises for a session the weekend does not have (ValueError
+    from the event schedule, e.g. FP2 on sprint weekends), cannot find, or
+    loaded without data. Anything else (network, rate limits) propagates.
+    """
+    from fastf1.exceptions import DataNotLoadedError, InvalidSessionError, NoLapDataError
+    return (ValueError, DataNotLoadedError, InvalidSessionError, NoLapDataError)
+
+
+def extract_weekend(season: int, round_no: int) -> np.ndarray:
+    """
+    Loads only what the features need: qualifying results (no laps) and
+    the laps of one practice session (no telemetry, weather or messages).
+    Raises LookupError when neither has data. A session the weekend does
+    not have or FastF1 has no data for is skipped; other errors propagate.
+    """
+    from services.fastf1_service import FastF1Service
+
+    unavailable = _unavailable()
+    ff1 = FastF1Service()
+    qualifying = None
+    try:
+        qualifying = ff1.get_results(season, round_no, "Q").results
+    except unavailable:
+        pass
+
+    practice_laps = practice_results = None
+    for name in PRACTICE_SESSIONS:
+        try:
+            session = ff1.get_laps(season, round_no, name)
+            practice_laps, practice_results = session.laps, session.results
+            break
+        except unavailable:
+            continue
+
+    table = reduce_weekend(qualifying, practice_laps, practice_results)
+    if len(table) == 0:
+        raise LookupError(f"No FastF1 data for {season} round {round_no}")
+    return table
+
+
+def extract(
+    store: PaceStore,
+    races: Iterable[Tuple[int, int]],
+    workers: Optional[int] = None,
+    force: bool = False,
+) -> Tuple[List[Tuple[int, int]], Dict[Tuple[int, int], str]]:
+    """
+    Extracts and stores the (season, round) weekends not yet in the store
+    (all of them with `force`), one weekend per task on a process pool.
+    Returns (extracted, {race: error}).
+    """
+    todo = [race for race in races if force or not store.has(*race)]
+    extracted: List[Tuple[int, int]] = []
+    errors: Dict[Tuple[int, int], str] = {}
+    if not todo:
+        return extracted, errors
+
+    with ProcessPoolExecutor(
+        max_workers=min(len(todo), workers or os.cpu_count() or 1), initializer=_init_worker
+    ) as pool:
+        futures = {pool.submit(extract_weekend, *race): race for race in todo}
+        for future in as_completed(futures):
+            race = futures[future]
+            try:
+                store.write(*race, future.result())
+                extracted.append(race)
+            except Exception as e:
+                errors[race] = repr(e)
+    return sorted(extracted), errors
+
+
+def main():
+    from agents.model_version import PACE_VERSION
+
+    parser = argparse.ArgumentParser(description="Extract FastF1 pace features into the pace store")
+    parser.add_argument("season", type=int)
+    parser.add_argument("--rounds", type=int, nargs="+", required=True)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--force", action="store_true", help="re-extract weekends already stored")
+    args = parser.parse_args()
+
+    store = PaceStore(version=PACE_VERSION)
+    extracted, errors = extract(store, [(args.season, r) for r in args.rounds], args.workers, args.force)
+    for (season, round_no), error in sorted(errors.items()):
+        print(f"failed: {season} round {round_no}: {error}")
+    print(f"{len(extracted)} weekends extracted to {store.root / store.version}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+from typing import List
+
+
+def int_range(spec: str) -> List[int]:
+    """
+    '2024', '2021-2024' or '1,3,5-7' -> sorted list of distinct integers.
+    Raises ValueError on anything else.
+    """
+    values = set()
+    for part in spec.split(","):
+        lo, _, hi = part.strip().partition("-")
+        values.update(range(int(lo), int(hi or lo) + 1))
+    return sorted(values)
@@ -0,0 +1,182 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional, Sequence
+import random
+import threading
+import time
+
+
+class CircuitOpenError(RuntimeError):
+    """
+    Raised instead of calling an upstream the breaker has marked unhealthy.
+    """
+
+
+@dataclass
+class TokenBucket:
+    """
+    Thread-safe token bucket. `acquire` blocks until a token is available
+    and also honours any server-imposed pause set through `pause`.
+    """
+
+    rate: float          # tokens per second
+    capacity: float
+    _tokens: float = field(init=False)
+    _updated: float = field(init=False)
+    _blocked_until: float = field(init=False, default=0.0)
+    _lock: threading.Lock = field(init=False, repr=False, default_factory=threading.Lock)
+
+    def __post_init__(self):
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def try_acquire(self) -> bool:
+        """
+        Takes one token if one is available right now, without waiting.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if now >= self._blocked_until and self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return True
+            return False
+
+    def acquire(self) -> float:
+        """
+        Takes one token, returning how long the caller had to wait.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._blocked_until and self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return waited
+                delay = max(
+                    self._blocked_until - now,
+                    (1.0 - self._tokens) / self.rate,
+                )
+            time.sleep(delay)
+            waited += delay
+
+
+@dataclass
+class RateLimiter:
+    """
+    All buckets must grant a token (e.g. a burst limit plus an hourly quota).
+    """
+
+    buckets: Sequence[TokenBucket]
+
+    def acquire(self) -> float:
+        return sum(b.acquire() for b in self.buckets)
+
+    def pause(self, seconds: float) -> None:
+        for b in self.buckets:
+            b.pause(seconds)
+
+
+@dataclass
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and rejects calls
+    for `reset_timeout` seconds, then lets a single trial call through.
+    """
+
+    failure_threshold: int = 5
+    reset_timeout: float = 30.0
+    _failures: int = field(init=False, default=0)
+    _opened_at: Optional[float] = field(init=False, default=None)
+    _trial_running: bool = field(init=False, default=False)
+    _lock: threading.Lock = field(init=False, repr=False, default_factory=threading.Lock)
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return "half_open"
+            return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._trial_running:
+                return False
+            self._trial_running = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+    def release(self) -> None:
+        """
+        Ends a call that recorded neither success nor failure (it raised
+        something unexpected), so the half-open trial slot is not held forever.
+        """
+        with self._lock:
+            self._trial_running = False
+
+
+@dataclass
+class Counters:
+    """
+    Thread-safe named counters.
+    """
+
+    _values: Dict[str, float] = field(init=False, default_factory=dict)
+    _lock: threading.Lock = field(init=False, repr=False, default_factory=threading.Lock)
+
+    def incr(self, name: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[name] = self._values.get(name, 0) + amount
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._values)
+
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 8.0) -> float:
+    """
+    Full-jitter exponential backoff for the given 1-based attempt.
+    """
+    return random.uniform(0, min(cap, base * (2 ** (attempt - 1))))
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Retry-After as seconds; accepts delta-seconds or an HTTP date.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,221 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Sequence
+import hashlib
+import numpy as np
+
+FINISHED = "Finished"
+
+# Fixed-width row layout used by to_compact/from_compact (20 bytes per entry)
+_RECORD = np.dtype([
+    ("season", "<i2"),
+    ("round", "<i2"),
+    ("driver", "<u2"),
+    ("constructor", "<u2"),
+    ("grid", "<i2"),
+    ("position", "<i2"),
+    ("points", "<f4"),
+    ("laps", "<i2"),
+    ("status", "<u2"),
+])
+COMPACT_VERSION = 1
+
+
+def _intern(table: Dict[str, int], value: str) -> int:
+    code = table.get(value)
+    if code is None:
+        code = table[value] = len(table)
+    return code
+
+
+@dataclass
+class ResultsFrame:
+    """
+    Columnar view of Jolpica race results, one row per race entry.
+
+    Driver, constructor and status are int codes into the id tables.
+    Missing grid / position / laps are stored as -1, missing points as NaN.
+    Rows keep the API order: seasons and rounds ascending, then finishing order.
+    """
+
+    drivers: List[str]
+    constructors: List[str]
+    statuses: List[str]
+    season: np.ndarray
+    round: np.ndarray
+    driver: np.ndarray
+    constructor: np.ndarray
+    grid: np.ndarray
+    position: np.ndarray
+    points: np.ndarray
+    laps: np.ndarray
+    status: np.ndarray
+
+    # -------- Construction -------- #
+
+    @classmethod
+    def from_races(cls, races: Iterable[Dict[str, Any]]) -> "ResultsFrame":
+        """
+        Parses Jolpica `Races` entries (each with a `Results` list) in one pass.
+        """
+        drivers: Dict[str, int] = {}
+        constructors: Dict[str, int] = {}
+        statuses: Dict[str, int] = {}
+        rows = []
+
+        for race in races:
+            season = int(race["season"])
+            round_no = int(race["round"])
+            for res in race.get("Results", []):
+                rows.append((
+                    season,
+                    round_no,
+                    _intern(drivers, res["Driver"]["driverId"]),
+                    _intern(constructors, res["Constructor"]["constructorId"]),
+                    int(res["grid"]) if res.get("grid") else -1,
+                    int(res["position"]) if res.get("position") else -1,
+                    float(res["points"]) if res.get("points") else np.nan,
+                    int(res["laps"]) if res.get("laps") else -1,
+                    _intern(statuses, res["status"]),
+                ))
+
+        cols = list(zip(*rows)) if rows else [()] * 9
+        return cls(
+            drivers=list(drivers),
+            constructors=list(constructors),
+            statuses=list(statuses),
+            season=np.array(cols[0], dtype=np.int16),
+            round=np.array(cols[1], dtype=np.int16),
+            driver=np.array(cols[2], dtype=np.int32),
+            constructor=np.array(cols[3], dtype=np.int32),
+            grid=np.array(cols[4], dtype=np.int16),
+            position=np.array(cols[5], dtype=np.int16),
+            points=np.array(cols[6], dtype=np.float64),
+            laps=np.array(cols[7], dtype=np.int16),
+            status=np.array(cols[8], dtype=np.int32),
+        )
+
+    @classmethod
+    def from_jolpica(cls, jol, season: int) -> "ResultsFrame":
+        return jol.season_frame(season)
+
+    # -------- Compact encoding -------- #
+
+    def to_compact(self) -> Dict[str, Any]:
+        """
+        Packs the frame into one fixed-dtype record buffer plus the id tables,
+        the form JolpicaService caches instead of re-reading raw JSON.
+        """
+        rows = np.empty(len(self), dtype=_RECORD)
+        for name in _RECORD.names:
+            rows[name] = getattr(self, name)
+        return {
+            "version": COMPACT_VERSION,
+            "drivers": self.drivers,
+            "constructors": self.constructors,
+            "statuses": self.statuses,
+            "rows": rows.tobytes(),
+        }
+
+    @classmethod
+    def from_compact(cls, data: Dict[str, Any]) -> "ResultsFrame":
+        if data.get("version") != COMPACT_VERSION:
+            raise ValueError(f"Unsupported compact results version: {data.get('version')}")
+
+        rows = np.frombuffer(data["rows"], dtype=_RECORD)
+        return cls(
+            drivers=list(data["drivers"]),
+            constructors=list(data["constructors"]),
+            statuses=list(data["statuses"]),
+            season=rows["season"].astype(np.int16),
+            round=rows["round"].astype(np.int16),
+            driver=rows["driver"].astype(np.int32),
+            constructor=rows["constructor"].astype(np.int32),
+            grid=rows["grid"].astype(np.int16),
+            position=rows["position"].astype(np.int16),
+            points=rows["points"].astype(np.float64),
+            laps=rows["laps"].astype(np.int16),
+            status=rows["status"].astype(np.int32),
+        )
+
+    @classmethod
+    def concat(cls, frames: Sequence["ResultsFrame"]) -> "ResultsFrame":
+        """
+        Stacks frames (e.g. several seasons) onto shared id tables.
+        """
+        tables = {"drivers": {}, "constructors": {}, "statuses": {}}
+        remapped = {"driver": [], "constructor": [], "status": []}
+
+        for f in frames:
+            for table, col in (("drivers", "driver"), ("constructors", "constructor"), ("statuses", "status")):
+                lookup = np.array(
+                    [_intern(tables[table], v) for v in getattr(f, table)], dtype=np.int32
+                )
+                remapped[col].append(lookup[getattr(f, col)])
+
+        def stack(name: str) -> np.ndarray:
+            return np.concatenate([getattr(f, name) for f in frames])
+
+        return cls(
+            drivers=list(tables["drivers"]),
+            constructors=list(tables["constructors"]),
+            statuses=list(tables["statuses"]),
+            season=stack("season"),
+            round=stack("round"),
+            driver=np.concatenate(remapped["driver"]).astype(np.int32),
+            constructor=np.concatenate(remapped["constructor"]).astype(np.int32),
+            grid=stack("grid"),
+            position=stack("position"),
+            points=stack("points"),
+            laps=stack("laps"),
+            status=np.concatenate(remapped["status"]).astype(np.int32),
+        )
+
+    # -------- Queries -------- #
+
+    def __len__(self) -> int:
+        return len(self.round)
+
+    @property
+    def finished(self) -> np.ndarray:
+        if FINISHED not in self.statuses:
+            return np.zeros(len(self), dtype=bool)
+        return self.status == self.statuses.index(FINISHED)
+
+    def fingerprint(self) -> str:
+        """
+        Digest of every row and id table: changes when any result is
+        added or amended.
+        """
+        compact = self.to_compact()
+        digest = hashlib.sha1(compact["rows"])
+        for table in ("drivers", "constructors", "statuses"):
+            digest.update("\0".join(compact[table]).encode())
+        return digest.hexdigest()
+
+    def has_season(self, season: int) -> bool:
+        return bool(np.any(self.season == season))
+
+    def mask(self, season: int, rounds: Iterable[int]) -> np.ndarray:
+        return (self.season == season) & np.isin(self.round, list(rounds))
+
+    @staticmethod
+    def first_seen(codes: np.ndarray) -> np.ndarray:
+        """
+        Unique codes ordered by first appearance (matches dict insertion order).
+        """
+        uniq, first = np.unique(codes, return_index=True)
+        return uniq[np.argsort(first, kind="stable")]
+
+
+def context_frame(context: dict, jol) -> ResultsFrame:
+    """
+    Returns the ResultsFrame shared through the agent context, building it on
+    first use so every agent run on the same context parses results once.
+    """
+    season = context["season"]
+    frame = context.get("results_frame")
+    if frame is None or not frame.has_season(season):
+        frame = ResultsFrame.from_jolpica(jol, season)
+        context["results_frame"] = frame
+    return frame
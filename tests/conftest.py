@@ -0,0 +1,142 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import copy
+import os
+import tempfile
+
+# Before any project import: keeps feature stores built by tests out of data/
+os.environ.setdefault("FEATURE_DIR", tempfile.mkdtemp(prefix="f1-features-"))
+
+import pytest
+import requests
+
+from services.cache_service import CacheService
+
+
+class FakeResponse:
+    def __init__(self, status_code: int = 200, payload: Any = None, headers: Optional[Dict[str, str]] = None):
+        self.status_code = status_code
+        self._payload = payload
+        self.headers = headers or {}
+
+    def json(self) -> Any:
+        if self._payload is None:
+            raise ValueError("no JSON body")
+        return self._payload
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"HTTP {self.status_code}")
+
+
+class FakeSession:
+    """
+    Stands in for JolpicaService's requests.Session: answers each GET with
+    handler(url, params, headers) and records the calls.
+    """
+
+    def __init__(self, handler: Callable[[str, Dict, Dict], FakeResponse]):
+        self.handler = handler
+        self.calls: List[Tuple[str, Dict, Dict]] = []
+
+    def get(self, url: str, params: Optional[dict] = None, headers: Optional[dict] = None, timeout: Any = None):
+        self.calls.append((url, dict(params or {}), dict(headers or {})))
+        return self.handler(url, dict(params or {}), dict(headers or {}))
+
+    def close(self) -> None:
+        pass
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = CacheService(str(tmp_path / "cache"))
+    yield cache
+    cache.close()
+
+
+def race(season: int, round_no: int, drivers: List[str], date: str = "2020-01-01") -> Dict[str, Any]:
+    """
+    A Jolpica `Races` entry with one classified result per driver, in order.
+    """
+    return {
+        "season": str(season),
+        "round": str(round_no),
+        "raceName": f"Race {round_no}",
+        "date": date,
+        "Circuit": {
+            "circuitId": f"circuit_{round_no}",
+            "circuitName": f"Circuit {round_no}",
+            "Location": {"locality": "Town", "country": "Country"},
+        },
+        "Results": [
+            {
+                "position": str(i + 1),
+                "grid": str(i + 1),
+                "points": str(max(0, 25 - 5 * i)),
+                "laps": "50",
+                "status": "Finished",
+                "Driver": {"driverId": driver},
+                "Constructor": {"constructorId": f"team_{i // 2}"},
+            }
+            for i, driver in enumerate(drivers)
+        ],
+    }
+
+
+def amend(races: List[Dict[str, Any]], round_no: int) -> List[Dict[str, Any]]:
+    """
+    Copy of `races` with the winner and runner-up of `round_no` swapped.
+    """
+    amended = copy.deepcopy(races)
+    first, second = amended[round_no - 1]["Results"][:2]
+    first["Driver"], second["Driver"] = second["Driver"], first["Driver"]
+    first["Constructor"], second["Constructor"] = second["Constructor"], first["Constructor"]
+    return amended
+
+
+def _offline(cache, **synthetic):
+    from benchmarks.synthetic import SyntheticJolpica
+    from services.jolpica_service import JolpicaService
+
+    SyntheticJolpica(seasons=(2023, 2024), rounds=12, drivers=20, seed=7, **synthetic).seed_cache(cache)
+    jol = JolpicaService(cache)
+    jol._session = FakeSession(lambda url, params, headers: pytest.fail(f"unexpected request: {url}"))
+    return jol
+
+
+@pytest.fixture
+def synthetic_jol(cache):
+    """
+    JolpicaService answering from a cache seeded with two synthetic seasons
+    (2023, 2024) of 12 rounds and 20 drivers; no network access.
+    """
+    jol = _offline(cache)
+    yield jol
+    jol.close()
+
+
+@pytest.fixture
+def partial_jol(cache):
+    """
+    synthetic_jol with 2024 in progress: rounds 1-6 have results, 7-12
+    are on the calendar only.
+    """
+    jol = _offline(cache, raced=6)
+    yield jol
+    jol.close()
+
+
+@pytest.fixture
+def qualifying():
+    """
+    FastF1-style qualifying results: driver_0000 on pole (80.0 s in Q3),
+    driver_0001 out in Q2, driver_0002 without a time.
+    """
+    import pandas as pd
+
+    seconds = lambda *values: pd.to_timedelta(list(values), unit="s")
+    return pd.DataFrame({
+        "DriverId": ["driver_0000", "driver_0001", "driver_0002"],
+        "Q1": seconds(81.0, 81.2, float("nan")),
+        "Q2": seconds(80.5, 80.8, float("nan")),
+        "Q3": seconds(80.0, float("nan"), float("nan")),
+    })
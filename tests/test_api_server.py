@@ -0,0 +1,42 @@
+import pytest
+
+from api import server
+from services.feature_store import FeatureStore
+from services.pace_features import PaceStore, reduce_weekend
+
+
+@pytest.fixture
+def worker(partial_jol, tmp_path, monkeypatch):
+    """
+    The API worker state of one process, over the in-progress 2024 season.
+    """
+    monkeypatch.setattr(server, "_WORKER", {
+        "jol": partial_jol,
+        "store": FeatureStore(root=tmp_path / "features", version="test"),
+        "pace": PaceStore(root=tmp_path / "pace", version="test"),
+        "window": 5,
+    })
+
+
+def test_next_race_is_predicted_and_later_rounds_are_refused(worker):
+    record = server._predict(2024, 7)
+    assert record["round"] == 7
+    assert record["prediction"]["winner"] is not None
+
+    with pytest.raises(server.NotPredictable):
+        server._predict(2024, 8)
+
+
+def test_sweep_and_single_records_share_one_shape(worker, qualifying):
+    server._WORKER["pace"].write(2024, 3, reduce_weekend(qualifying, None, None))
+    swept = {r["round"]: r for r in server._sweep(2024, None)}
+    assert sorted(swept) == list(range(1, 8))
+
+    for round_no in (3, 7):
+        single = server._predict(2024, round_no)
+        assert single.keys() == swept[round_no].keys()
+        assert single["prediction"] == swept[round_no]["prediction"]
+        assert single["pace"] == swept[round_no]["pace"]
+
+    assert swept[3]["pace"]["driver_0000"]["quali_gap"] == 0.0
+    assert swept[7]["pace"] == {}
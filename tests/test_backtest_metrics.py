@@ -0,0 +1,109 @@
+import math
+
+import pytest
+
+from conftest import amend
+from agents.pipeline import build_context, stored_contexts
+from backtest.engine import BacktestEngine
+from backtest.metrics import (
+    LOG_LOSS_FLOOR,
+    brier_score,
+    log_loss,
+    podium_overlap,
+    reliability_curve,
+    summarize,
+    winner_hit_rate,
+)
+from benchmarks.synthetic import SyntheticJolpica
+from services.feature_store import FeatureStore
+from services.results_frame import ResultsFrame
+
+
+def record(probabilities, actual_winner, podium=(), actual_podium=()):
+    winner = max(probabilities, key=probabilities.get) if probabilities else None
+    return {
+        "winner": winner,
+        "podium": list(podium),
+        "probabilities": probabilities,
+        "actual_winner": actual_winner,
+        "actual_podium": list(actual_podium),
+    }
+
+
+def test_winner_hit_rate_and_podium_overlap():
+    records = [
+        record({"a": 0.6, "b": 0.4}, "a", ["a", "b", "c"], ["c", "a", "d"]),
+        record({"a": 0.3, "b": 0.7}, "a", ["b", "a", "c"], ["a", "b", "c"]),
+    ]
+    assert winner_hit_rate(records) == 0.5
+    assert podium_overlap(records) == pytest.approx((2 / 3 + 1) / 2)
+
+
+def test_log_loss_floors_an_unscored_winner():
+    records = [record({"a": 0.5, "b": 0.5}, "a"), record({"a": 1.0}, "z")]
+    assert log_loss(records) == pytest.approx((-math.log(0.5) - math.log(LOG_LOSS_FLOOR)) / 2)
+
+
+def test_brier_counts_a_missed_winner_as_probability_zero():
+    assert brier_score([record({"a": 0.75, "b": 0.25}, "a")]) == pytest.approx(0.25 ** 2 * 2)
+    assert brier_score([record({"a": 0.75, "b": 0.25}, "z")]) == pytest.approx(0.75 ** 2 + 0.25 ** 2 + 1)
+
+
+def test_reliability_bins_mean_prediction_against_frequency():
+    records = [record({"a": 0.95, "b": 0.05}, "a"), record({"a": 0.91, "b": 0.09}, "b")]
+    curve = {row["bin"]: row for row in reliability_curve(records)}
+
+    assert set(curve) == {"0.0-0.1", "0.9-1.0"}
+    assert curve["0.9-1.0"] == {"bin": "0.9-1.0", "count": 2, "mean_predicted": 0.93, "observed": 0.5}
+    assert curve["0.0-0.1"]["observed"] == 0.5
+
+
+def test_summarize_skips_unscorable_races():
+    records = [record({"a": 1.0}, "a", ["a"], ["a"]), record({}, "a"), record({"a": 1.0}, None)]
+    summary = summarize(records)
+    assert (summary["races"], summary["skipped"]) == (1, 2)
+    assert summarize(records[1:]) == {"races": 0, "skipped": 2}
+
+
+# ---- Out-of-sample features ----
+
+def test_context_ignores_the_target_race_results(synthetic_jol):
+    races = SyntheticJolpica(seasons=(2024,), rounds=12, drivers=20, seed=7).races(2024)
+    amended = amend(races, 5)
+
+    before = build_context(synthetic_jol, 2024, 5, frame=ResultsFrame.from_races(races))
+    after = build_context(synthetic_jol, 2024, 5, frame=ResultsFrame.from_races(amended))
+    assert before == after
+
+    later = build_context(synthetic_jol, 2024, 6, frame=ResultsFrame.from_races(amended))
+    assert later != build_context(synthetic_jol, 2024, 6, frame=ResultsFrame.from_races(races))
+
+
+def test_stored_contexts_revalidate_picks_up_amended_results(synthetic_jol, tmp_path, monkeypatch):
+    store = FeatureStore(root=tmp_path / "features", version="test")
+    stored = stored_contexts(store, synthetic_jol, 2024, [6])
+    source = store.index(2024)["source"]
+
+    races = amend(SyntheticJolpica(seasons=(2024,), rounds=12, drivers=20, seed=7).races(2024), 5)
+    monkeypatch.setattr(ResultsFrame, "from_jolpica", classmethod(lambda cls, jol, season: cls.from_races(races)))
+
+    # The fast path serves stored rounds as they are; revalidating rebuilds them
+    assert stored_contexts(store, synthetic_jol, 2024, [6]) == stored
+    assert stored_contexts(store, synthetic_jol, 2024, [6], revalidate=True) != stored
+    assert store.index(2024)["source"] != source
+
+
+def test_only_current_season_records_expire(cache):
+    engine = BacktestEngine(cache)
+    assert engine._ttl(2020) is None
+    assert engine._ttl(2999) is not None
+
+
+def test_chunked_replay_matches_per_race_predictions(synthetic_jol, cache):
+    from agents.fusion_agent import FusionAgent
+
+    records = BacktestEngine(cache, workers=3).replay([2023, 2024])
+    assert [(r["season"], r["round"]) for r in records] == [(s, r) for s in (2023, 2024) for r in range(1, 13)]
+    for r in records:
+        expected = FusionAgent().run(build_context(synthetic_jol, r["season"], r["round"]))
+        assert (r["winner"], r["probabilities"]) == (expected["winner"], expected["probabilities"])
@@ -0,0 +1,207 @@
+import threading
+import time
+
+import pytest
+
+from conftest import FakeResponse, FakeSession, race
+from config.settings import settings
+from services import jolpica_service
+from services.cache_policy import CachePolicy, cache_key, conditional_headers, disk_ttl, make_entry
+from services.jolpica_service import JolpicaService
+from services.rate_limit import CircuitBreaker
+
+POLICY = CachePolicy(current_season=2024)
+
+
+def _round(race_entry=None):
+    return {"MRData": {"RaceTable": {"Races": [race_entry] if race_entry else []}}}
+
+
+# -------- CachePolicy -------- #
+
+def test_past_seasons_never_expire():
+    assert POLICY.ttl("/2023/5/results.json", _round(), 60) is None
+    assert POLICY.ttl("/2023/driverstandings.json", {}, 60) is None
+
+
+def test_current_season_keeps_the_endpoint_ttl():
+    assert POLICY.ttl("/2024/driverstandings.json", {}, 60) == 60
+    assert POLICY.ttl("/2024/races.json", {}, 60) == 60
+
+
+def test_round_without_results_is_rechecked_soon():
+    assert POLICY.ttl("/2024/5/results.json", _round(), 60) == settings.TTL_SHORT
+
+
+def test_settled_round_never_expires():
+    assert POLICY.ttl("/2024/5/results.json", _round(race(2024, 5, ["ver"], date="2024-03-02")), 60) is None
+
+
+def test_fresh_round_can_still_be_amended():
+    today = time.strftime("%Y-%m-%d", time.gmtime())
+    assert POLICY.ttl("/2024/5/results.json", _round(race(2024, 5, ["ver"], date=today)), 60) == 60
+
+
+def test_paths_are_canonicalised():
+    assert POLICY.ttl("2023//5/Results.json/", _round(), 60) is None
+    assert POLICY.ttl("/seasons.json", {}, 60) == 60
+
+
+# -------- Entries and validators -------- #
+
+def test_conditional_headers_from_validators():
+    entry = make_entry({}, 60, {"ETag": '"abc"', "Last-Modified": "Wed, 21 Oct 2015 07:28:00 GMT"})
+    assert conditional_headers(entry) == {
+        "If-None-Match": '"abc"',
+        "If-Modified-Since": "Wed, 21 Oct 2015 07:28:00 GMT",
+    }
+    assert conditional_headers(make_entry({}, 60)) == {}
+    assert conditional_headers(None) == {}
+
+
+def test_disk_ttl_keeps_mutable_entries_for_revalidation():
+    assert disk_ttl(None) is None
+    assert disk_ttl(60) == 60 + settings.TTL_STALE
+
+
+# -------- Revalidation through JolpicaService -------- #
+
+PATH = "/2024/driverstandings.json"
+
+
+def _expire(cache):
+    key = cache_key(PATH)
+    entry = cache.get(key)
+    cache.set(key, {**entry, "expires_at": time.time() - 1}, ttl=None)
+
+
+@pytest.fixture
+def jol(cache):
+    return JolpicaService(cache, policy=POLICY, stale_while_revalidate=False, refresh_ahead=0)
+
+
+def test_not_modified_keeps_the_payload_and_renews_it(jol, cache):
+    answers = [
+        FakeResponse(payload={"v": 1}, headers={"ETag": '"v1"'}),
+        FakeResponse(status_code=304, headers={"ETag": '"v1"'}),
+    ]
+    jol._session = FakeSession(lambda url, params, headers: answers.pop(0))
+
+    assert jol.get(PATH) == {"v": 1}
+    _expire(cache)
+    assert jol.get(PATH) == {"v": 1}
+
+    _, _, headers = jol._session.calls[1]
+    assert headers["If-None-Match"] == '"v1"'
+    entry = cache.get(cache_key(PATH))
+    assert entry["data"] == {"v": 1} and entry["expires_at"] > time.time()
+
+
+def test_changed_payload_replaces_the_entry(jol, cache):
+    answers = [
+        FakeResponse(payload={"v": 1}, headers={"ETag": '"v1"'}),
+        FakeResponse(payload={"v": 2}, headers={"ETag": '"v2"'}),
+    ]
+    jol._session = FakeSession(lambda url, params, headers: answers.pop(0))
+
+    jol.get(PATH)
+    _expire(cache)
+    assert jol.get(PATH) == {"v": 2}
+    assert cache.get(cache_key(PATH))["etag"] == '"v2"'
+
+
+def test_fresh_entry_is_served_without_a_request(jol):
+    jol._session = FakeSession(lambda url, params, headers: FakeResponse(payload={"v": 1}))
+    jol.get(PATH)
+    jol.get(PATH)
+    assert len(jol._session.calls) == 1
+
+
+# -------- Stale-while-revalidate and refresh-ahead -------- #
+
+def _wait_for(predicate, timeout: float = 2.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "background refresh did not finish"
+        time.sleep(0.01)
+
+
+def _counter(name: str) -> float:
+    return JolpicaService.stats().get(name, 0)
+
+
+def _blocked(release: threading.Event, payload):
+    """
+    Handler whose answers wait for `release`, like a slow upstream.
+    """
+    def handler(url, params, headers):
+        release.wait(2)
+        return FakeResponse(payload=payload)
+
+    return handler
+
+
+def test_stale_entry_is_served_at_once_and_refreshed_once(cache):
+    jol = JolpicaService(cache, policy=POLICY, stale_while_revalidate=True, refresh_ahead=0)
+    jol._session = FakeSession(lambda url, params, headers: FakeResponse(payload={"v": 1}))
+    jol.get(PATH)
+    _expire(cache)
+
+    release = threading.Event()
+    jol._session = FakeSession(_blocked(release, {"v": 2}))
+    refreshes = _counter("background_refreshes")
+
+    start = time.monotonic()
+    assert [jol.get(PATH) for _ in range(5)] == [{"v": 1}] * 5
+    assert time.monotonic() - start < 1
+
+    release.set()
+    _wait_for(lambda: _counter("background_refreshes") > refreshes)
+    time.sleep(0.05)
+    assert _counter("background_refreshes") == refreshes + 1
+    assert len(jol._session.calls) == 1
+    assert jol.get(PATH) == {"v": 2}
+
+
+def test_refresh_ahead_renews_an_entry_before_it_expires(cache):
+    jol = JolpicaService(cache, policy=POLICY, stale_while_revalidate=False, refresh_ahead=0.5)
+    now = time.time()
+    # 10 s left of a 60 s lifetime: under half, so a renewal is due
+    entry = {**make_entry({"v": 1}, 60), "fetched_at": now - 50, "expires_at": now + 10}
+    cache.set(cache_key(PATH), entry, ttl=None)
+
+    release = threading.Event()
+    jol._session = FakeSession(_blocked(release, {"v": 2}))
+    refreshes = _counter("background_refreshes")
+
+    assert jol.get(PATH) == {"v": 1}
+    assert jol.get(PATH) == {"v": 1}
+    release.set()
+    _wait_for(lambda: _counter("background_refreshes") > refreshes)
+
+    assert len(jol._session.calls) == 1
+    assert cache.get(cache_key(PATH))["expires_at"] > now + 10
+    assert jol.get(PATH) == {"v": 2}
+
+
+@pytest.mark.parametrize("swr", [False, True])
+def test_stale_entry_is_served_while_the_breaker_is_open(cache, monkeypatch, swr):
+    jol = JolpicaService(cache, policy=POLICY, stale_while_revalidate=swr, refresh_ahead=0)
+    jol._session = FakeSession(lambda url, params, headers: FakeResponse(payload={"v": 1}))
+    jol.get(PATH)
+    _expire(cache)
+
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    breaker.record_failure()
+    monkeypatch.setattr(jolpica_service, "_BREAKER", breaker)
+    served, failures = _counter("stale_served"), _counter("background_refresh_failures")
+
+    assert jol.get(PATH) == {"v": 1}
+    assert _counter("stale_served") == served + 1
+    if swr:
+        _wait_for(lambda: _counter("background_refresh_failures") > failures)
+    assert len(jol._session.calls) == 1
+
+    # Nothing to fall back on: the breaker's error reaches the caller
+    with pytest.raises(RuntimeError):
+        jol.get("/2024/constructorstandings.json")
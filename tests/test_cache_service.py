@@ -0,0 +1,118 @@
+import pickle
+import time
+
+import pytest
+
+from services.cache_service import CacheService
+
+
+@pytest.fixture
+def bounded(tmp_path):
+    """
+    CacheService factory with custom memory bounds, closed after the test.
+    """
+    opened = []
+
+    def make(**bounds) -> CacheService:
+        cache = CacheService(str(tmp_path / "bounded"), **bounds)
+        opened.append(cache)
+        return cache
+
+    yield make
+    for cache in opened:
+        cache.close()
+
+
+def pickled(value) -> int:
+    return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def test_delete_clears_both_tiers(cache):
+    cache.set("a", {"x": 1}, ttl=None)
+    cache.set("b", {"x": 2}, ttl=None)
+    assert cache.get("a") == {"x": 1}
+
+    assert cache.delete("a") is True
+    assert cache.get("a") is None
+    assert cache.delete("a") is False
+    assert cache.stats()["memory_entries"] == 1
+
+
+def test_iterkeys_lists_the_disk_tier(cache):
+    for key in ("a", "b", "c"):
+        cache.set(key, key, ttl=None)
+    assert sorted(cache.iterkeys()) == ["a", "b", "c"]
+
+
+def test_memory_tier_evicts_least_recently_used_entries(bounded):
+    cache = bounded(memory_entries=2)
+    cache.set("a", 1, ttl=None)
+    cache.set("b", 2, ttl=None)
+    assert cache.get("a") == 1
+    cache.set("c", 3, ttl=None)
+
+    # "b" was the least recently used: evicted from memory, still on disk
+    before = cache.stats()
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.get("b") == 2
+    after = cache.stats()
+    assert after["memory_hits"] - before["memory_hits"] == 2
+    assert after["disk_hits"] - before["disk_hits"] == 1
+    assert after["memory_entries"] == 2
+
+
+def test_memory_tier_is_bounded_by_pickled_bytes(bounded):
+    value = {"payload": "x" * 1000}
+    cache = bounded(memory_bytes=2 * pickled(value) + 10)
+    for key in ("a", "b", "c"):
+        cache.set(key, value, ttl=None)
+    stats = cache.stats()
+    assert (stats["memory_entries"], stats["memory_bytes"]) == (2, 2 * pickled(value))
+
+    # A value larger than the whole tier is only kept on disk
+    cache.set("big", {"payload": "x" * 5000}, ttl=None)
+    assert cache.stats()["memory_bytes"] == 2 * pickled(value)
+    assert cache.get("big", skip_memory=True) == {"payload": "x" * 5000}
+    assert cache.stats()["memory_entries"] == 2
+
+
+def test_memory_copy_expires_with_the_disk_entry(bounded, tmp_path, monkeypatch):
+    cache = bounded()
+    cache.set("a", "fresh", ttl=60)
+
+    # Written by another process: the memory copy takes the disk entry's expiry
+    other = CacheService(str(tmp_path / "bounded"))
+    other.set("b", "fresh", ttl=30)
+    other.close()
+    assert cache.get("b") == "fresh"
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 45)
+    assert cache.get("b") is None
+    assert cache.get("a") == "fresh"
+    monkeypatch.setattr(time, "time", lambda: now + 90)
+    assert cache.get("a") is None
+    assert cache.stats()["memory_entries"] == 0
+
+
+def test_stats_count_each_tier(cache):
+    cache.set("a", 1, ttl=None)
+    assert cache.get("a") == 1
+    assert cache.get("a", skip_memory=True) == 1
+    assert cache.get("missing") is None
+
+    stats = cache.stats()
+    assert {k: stats[k] for k in ("memory_hits", "memory_misses", "disk_hits", "disk_misses")} == {
+        "memory_hits": 1,
+        "memory_misses": 2,
+        "disk_hits": 1,
+        "disk_misses": 1,
+    }
+    assert stats["memory_bytes"] == pickled(1)
+
+
+def test_reads_entries_stored_as_objects(cache):
+    # Disk entries written before CacheService pickled values itself
+    cache._cache.set("old", {"x": 1})
+    assert cache.get("old") == {"x": 1}
+    assert cache.stats()["memory_bytes"] == pickled({"x": 1})
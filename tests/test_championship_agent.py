@@ -0,0 +1,97 @@
+import math
+import tracemalloc
+
+import pytest
+
+from conftest import FakeResponse, FakeSession
+from agents.championship_agent import ChampionshipAgent
+from services.jolpica_service import JolpicaService
+
+KEYS = {"season", "after_round", "remaining_rounds", "completed", "n_sims", "drivers", "constructors"}
+
+
+def titles(table: dict) -> float:
+    return sum(entry["title"] for entry in table.values())
+
+
+def test_title_and_position_probabilities_are_distributions(synthetic_jol):
+    result = ChampionshipAgent(synthetic_jol, n_sims=5_000, seed=1).run({"season": 2024})
+
+    assert set(result) == KEYS
+    # Synthetic standings are taken after round 6 of 12
+    assert (result["after_round"], result["remaining_rounds"]) == (6, list(range(7, 13)))
+    assert len(result["drivers"]) == 20 and len(result["constructors"]) == 10
+    for table in (result["drivers"], result["constructors"]):
+        assert titles(table) == pytest.approx(1.0, abs=1e-3)
+        for entry in table.values():
+            assert sum(entry["positions"]) == pytest.approx(1.0, abs=1e-3)
+            assert entry["title"] == entry["positions"][0]
+
+
+def test_a_fixed_seed_repeats(synthetic_jol):
+    agent = ChampionshipAgent(synthetic_jol, n_sims=3_000, seed=2)
+    assert agent.run({"season": 2024}) == agent.run({"season": 2024})
+    assert ChampionshipAgent(synthetic_jol, n_sims=3_000, seed=3).run({"season": 2024}) != agent.run({"season": 2024})
+
+
+def test_streamed_estimates_converge_to_the_final_result(synthetic_jol):
+    # About 260 simulations per chunk: 20 drivers x 6 rounds x 32 bytes each
+    agent = ChampionshipAgent(synthetic_jol, n_sims=4_000, seed=4, memory_budget=1_000_000)
+    estimates = list(agent.iter_run({"season": 2024}))
+
+    chunk = 1_000_000 // (32 * 6 * 20)
+    assert len(estimates) == math.ceil(4_000 / chunk)
+    assert [e["completed"] for e in estimates] == [min(4_000, chunk * i) for i in range(1, len(estimates) + 1)]
+    assert all(set(e) == KEYS and e["n_sims"] == 4_000 for e in estimates)
+    assert estimates[-1] == agent.run({"season": 2024})
+
+    # Chunking changes the random streams, not the answer
+    one_chunk = ChampionshipAgent(synthetic_jol, n_sims=4_000, seed=4).run({"season": 2024})
+    for driver, entry in one_chunk["drivers"].items():
+        assert estimates[-1]["drivers"][driver]["title"] == pytest.approx(entry["title"], abs=0.03)
+
+
+def test_memory_budget_bounds_the_chunks(synthetic_jol):
+    agent = ChampionshipAgent(synthetic_jol, n_sims=20_000, seed=5)
+
+    def peak(budget: int) -> int:
+        agent.memory_budget = budget
+        tracemalloc.start()
+        try:
+            agent.run({"season": 2024})
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    # The peak follows the budget, not n_sims (20,000 seasons at once take ~40 MB)
+    small, large = peak(500_000), peak(50_000_000)
+    assert small < 2 * 500_000
+    assert large > 4 * small
+
+
+def test_a_season_without_standings_has_the_same_shape(cache):
+    calendar = {"MRData": {"RaceTable": {"Races": [{"round": str(r)} for r in (1, 2, 3)]}}}
+    empty = {"MRData": {"StandingsTable": {"StandingsLists": []}}}
+
+    def handler(url, params, headers):
+        return FakeResponse(payload=calendar if url.endswith("/races.json") else empty)
+
+    jol = JolpicaService(cache)
+    jol._session = FakeSession(handler)
+    estimates = list(ChampionshipAgent(jol, n_sims=100).iter_run({"season": 2099}))
+
+    assert estimates == [{
+        "season": 2099,
+        "after_round": 0,
+        "remaining_rounds": [1, 2, 3],
+        "completed": 0,
+        "n_sims": 100,
+        "drivers": {},
+        "constructors": {},
+    }]
+
+
+@pytest.mark.parametrize("n_sims", [0, -5])
+def test_at_least_one_simulation(synthetic_jol, n_sims):
+    with pytest.raises(ValueError):
+        ChampionshipAgent(synthetic_jol, n_sims=n_sims)
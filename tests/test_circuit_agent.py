@@ -0,0 +1,58 @@
+import numpy as np
+
+from conftest import amend
+from agents.circuit_agent import PRIOR, CircuitAgent
+from benchmarks.synthetic import SyntheticJolpica
+from services.results_frame import ResultsFrame
+
+
+def run(jol, season, round_no, frame=None):
+    context = {"season": season, "round": round_no}
+    if frame is not None:
+        context["results_frame"] = frame
+    return CircuitAgent(jol).run(context)
+
+
+def test_circuit_without_earlier_editions_gets_the_prior(synthetic_jol):
+    # 2023 is the first synthetic season: no circuit has been raced before
+    circuit = run(synthetic_jol, 2023, 5)
+    assert {k: circuit[k] for k in PRIOR} == PRIOR
+    assert circuit["lap_count"] is None
+
+
+def test_features_come_from_the_previous_edition_at_the_circuit(synthetic_jol):
+    frame = ResultsFrame.from_jolpica(synthetic_jol, 2023)
+    for round_no in (1, 5, 12):
+        rows = frame.mask(2023, [round_no])
+        stats = CircuitAgent.race_stats(frame.grid[rows], frame.position[rows], frame.finished[rows])
+
+        circuit = run(synthetic_jol, 2024, round_no)
+        assert [circuit[k] for k in PRIOR] == [round(v, 3) for v in stats]
+        assert circuit["lap_count"] == int(frame.laps[rows].max())
+
+
+def test_rounds_keep_their_own_circuit_features(synthetic_jol):
+    features = {tuple(run(synthetic_jol, 2024, r)[k] for k in PRIOR) for r in range(1, 13)}
+    assert len(features) > 6
+
+
+def test_circuit_ignores_the_season_results_up_to_the_target(synthetic_jol):
+    races = SyntheticJolpica(seasons=(2024,), rounds=12, drivers=20, seed=7).races(2024)
+    amended = ResultsFrame.from_races(amend(amend(races, 5), 4))
+
+    # Stored or fresh, with or without the race's own results: the same context
+    assert run(synthetic_jol, 2024, 5, amended) == run(synthetic_jol, 2024, 5)
+    assert run(synthetic_jol, 2024, 5, ResultsFrame.from_races(races[:4])) == run(synthetic_jol, 2024, 5)
+
+
+def test_latest_editions_are_averaged(synthetic_jol):
+    agent = CircuitAgent(synthetic_jol)
+    frame = ResultsFrame.from_jolpica(synthetic_jol, 2023)
+    editions = [agent.edition(frame, 2023, r) for r in (2, 3)]
+
+    stats = np.array([CircuitAgent.race_stats(*e[:3]) for e in editions]).mean(axis=0)
+    assert list(CircuitAgent.features(editions).values()) == [round(float(v), 3) for v in stats]
+    assert CircuitAgent.features([]) == PRIOR
+    assert agent.previous_editions("circuit_03", 2024, 3) == [(2023, 3)]
+    assert agent.previous_editions("circuit_03", 2024, 4) == [(2023, 3), (2024, 3)]
+    assert CircuitAgent(synthetic_jol, editions=1).previous_editions("circuit_03", 2025, 1) == [(2024, 3)]
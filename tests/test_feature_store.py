@@ -0,0 +1,29 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from agents.pipeline import season_contexts
+from services.feature_store import FeatureStore
+
+
+def test_write_read_round_trip(synthetic_jol, tmp_path):
+    store = FeatureStore(root=tmp_path, version="test")
+    contexts = list(season_contexts(synthetic_jol, 2024))
+    store.write(2024, contexts, source_rounds=range(1, 13), source="abc")
+
+    assert store.read(2024) == contexts
+    assert store.read(2024, [3, 7]) == [contexts[2], contexts[6]]
+    assert store.index(2024)["source"] == "abc"
+
+
+def test_concurrent_writers_publish_a_complete_season(synthetic_jol, tmp_path):
+    contexts = list(season_contexts(synthetic_jol, 2024))
+
+    def write(_):
+        FeatureStore(root=tmp_path, version="test").write(2024, contexts)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(write, range(32)))
+
+    store = FeatureStore(root=tmp_path, version="test")
+    assert store.read(2024) == contexts
+    # No temporary or set-aside directories are left behind
+    assert [p.name for p in store.path(2024).parent.iterdir()] == ["2024"]
@@ -0,0 +1,79 @@
+from typing import Dict
+
+from conftest import FakeResponse, FakeSession, race
+from services import jolpica_service, results_frame
+from services.cache_policy import cache_key
+from services.jolpica_service import JolpicaService
+
+DRIVERS = ["ham", "ver", "lec", "nor"]
+
+
+def _paged(races):
+    """
+    Handler serving `races` the way Jolpica pages /{season}/results.json:
+    `limit` result rows per page, a race split across pages when it straddles one.
+    """
+    rows = [(r, res) for r in races for res in r["Results"]]
+
+    def handler(url: str, params: Dict, headers: Dict) -> FakeResponse:
+        offset, limit = int(params["offset"]), int(params["limit"])
+        page = {}
+        for r, res in rows[offset:offset + limit]:
+            page.setdefault(r["round"], {**r, "Results": []})["Results"].append(res)
+        return FakeResponse(payload={
+            "MRData": {"total": str(len(rows)), "RaceTable": {"Races": list(page.values())}}
+        })
+
+    return handler
+
+
+def test_season_results_merges_pages_and_splits_by_round(cache):
+    races = [race(2020, r, DRIVERS) for r in (1, 2, 3)]
+    jol = JolpicaService(cache, page_size=3)
+    jol._session = FakeSession(_paged(races))
+
+    by_round = jol.season_results(2020)
+
+    assert sorted(by_round) == [1, 2, 3]
+    for round_no, payload in by_round.items():
+        results = payload["MRData"]["RaceTable"]["Races"][0]["Results"]
+        assert [r["Driver"]["driverId"] for r in results] == DRIVERS
+        assert payload["MRData"]["RaceTable"]["round"] == str(round_no)
+    # 12 rows at 3 per page
+    assert len(jol._session.calls) == 4
+
+
+def test_season_results_fills_per_round_entries(cache):
+    jol = JolpicaService(cache, page_size=100)
+    jol._session = FakeSession(_paged([race(2020, 1, DRIVERS), race(2020, 2, DRIVERS)]))
+
+    bulk = jol.season_results(2020)
+    calls = len(jol._session.calls)
+
+    assert jol.results(2020, 2) == bulk[2]
+    assert len(jol._session.calls) == calls
+
+
+def test_season_frame_matches_results(cache):
+    jol = JolpicaService(cache)
+    jol._session = FakeSession(_paged([race(2020, 1, DRIVERS), race(2020, 2, DRIVERS[::-1])]))
+
+    frame = jol.season_frame(2020)
+
+    assert len(frame) == 8
+    winners = frame.driver[frame.position == 1]
+    assert [frame.drivers[d] for d in winners] == ["ham", "nor"]
+
+
+def test_season_frame_misses_entries_of_another_compact_version(cache, monkeypatch):
+    jol = JolpicaService(cache)
+    jol._session = FakeSession(_paged([race(2020, 1, DRIVERS), race(2020, 2, DRIVERS)]))
+    before = jol.season_frame(2020)
+
+    # A layout bump: the old entry stays in the cache, but is not read back
+    for module in (jolpica_service, results_frame):
+        monkeypatch.setattr(module, "COMPACT_VERSION", results_frame.COMPACT_VERSION + 1)
+    after = jol.season_frame(2020)
+
+    assert after.fingerprint() == before.fingerprint()
+    assert cache.get(cache_key(*JolpicaService.frame_entry(2020)))["data"]["version"] == results_frame.COMPACT_VERSION
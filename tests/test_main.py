@@ -0,0 +1,40 @@
+import json
+
+import main
+
+
+def test_batch_predicts_raced_rounds_and_the_next_race(partial_jol, tmp_path, capsys):
+    output = tmp_path / "predictions.jsonl"
+    failures = main.run_batch(
+        [2023, 2024], None, 5, 1, "jsonl", output, False, cache_dir=partial_jol.cache.cache_dir
+    )
+
+    records = [json.loads(line) for line in output.read_text().splitlines()]
+    assert failures == 0
+    assert sorted((r["season"], r["round"]) for r in records) == (
+        [(2023, r) for r in range(1, 13)] + [(2024, r) for r in range(1, 8)]
+    )
+    assert "skipped: 2024 rounds 8, 9, 10, 11, 12" in capsys.readouterr().err
+
+
+def test_resume_skips_races_already_written(partial_jol, tmp_path):
+    output = tmp_path / "predictions.csv"
+    main.run_batch([2024], [1, 2], 5, 1, "csv", output, False, cache_dir=partial_jol.cache.cache_dir)
+    main.run_batch([2024], [1, 2, 3], 5, 1, "csv", output, True, cache_dir=partial_jol.cache.cache_dir)
+
+    lines = output.read_text().splitlines()
+    assert lines[0].startswith("season,round")
+    assert [line.split(",")[1] for line in lines[1:]] == ["1", "2", "3"]
+
+
+def test_sequential_batch_closes_its_worker_services(partial_jol, tmp_path, monkeypatch):
+    closed = []
+    for cls in (main.CacheService, main.JolpicaService):
+        close = cls.close
+        monkeypatch.setattr(cls, "close", lambda self, close=close: (closed.append(type(self)), close(self))[1])
+
+    main.run_batch([2024], [1], 5, 1, "csv", tmp_path / "p.csv", False, cache_dir=partial_jol.cache.cache_dir)
+
+    # The calendar pass and the in-process worker each close theirs
+    assert closed.count(main.CacheService) == closed.count(main.JolpicaService) == 2
+    assert main._WORKER == {}
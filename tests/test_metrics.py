@@ -0,0 +1,20 @@
+from services.metrics import MetricsRegistry
+
+
+def test_drain_and_merge_move_every_series():
+    worker, parent = MetricsRegistry(), MetricsRegistry()
+    parent.incr("hits", 1, (("kind", "a"),))
+    worker.incr("hits", 2, (("kind", "a"),))
+    worker.incr("hits", 5, (("kind", "b"),))
+    parent.observe("seconds", 0.002, ())
+    for value in (0.002, 0.3, 20.0):
+        worker.observe("seconds", value, ())
+
+    parent.merge(worker.drain())
+
+    assert worker.snapshot() == {"counters": {}, "histograms": {}}
+    snap = parent.snapshot()
+    assert {c["labels"]["kind"]: c["value"] for c in snap["counters"]["hits"]} == {"a": 3, "b": 5}
+    (h,) = snap["histograms"]["seconds"]
+    assert (h["count"], h["sum"]) == (4, 0.002 * 2 + 0.3 + 20.0)
+    assert (h["buckets"]["0.0025"], h["buckets"]["0.5"], h["buckets"]["+Inf"]) == (2, 3, 4)
@@ -0,0 +1,174 @@
+import threading
+import time
+from typing import Callable, List, Sequence
+
+import pytest
+
+from agents.base_agent import BaseAgent
+from agents.orchestrator import FetchMemo, Orchestrator
+
+
+class StepAgent(BaseAgent):
+    """
+    Test agent: records when it starts and ends in `log`, then returns
+    fn(context) (default: its own name).
+    """
+
+    def __init__(self, name: str, inputs: Sequence[str], output: str, log: List, fn: Callable = None):
+        super().__init__(name)
+        self.inputs = tuple(inputs)
+        self.output = output
+        self.log = log
+        self.fn = fn or (lambda context: name)
+
+    def run(self, context: dict):
+        self.log.append(("start", self.name))
+        try:
+            return self.fn(context)
+        finally:
+            self.log.append(("end", self.name))
+
+
+def test_agents_run_after_their_inputs():
+    log: List = []
+    # Declared in reverse: the order comes from inputs and outputs
+    agents = [
+        StepAgent("c", ["b_out"], "c_out", log, lambda ctx: ctx["b_out"] + "c"),
+        StepAgent("b", ["a_out"], "b_out", log, lambda ctx: ctx["a_out"] + "b"),
+        StepAgent("a", ["season"], "a_out", log, lambda ctx: str(ctx["season"])),
+    ]
+    context = Orchestrator(agents).run({"season": 2024})
+
+    assert context["c_out"] == "2024bc"
+    assert log == [(e, n) for n in "abc" for e in ("start", "end")]
+    assert context["season"] == 2024
+
+
+def test_agents_with_a_precomputed_output_are_skipped():
+    log: List = []
+    agents = [
+        StepAgent("a", [], "a_out", log),
+        StepAgent("b", ["a_out"], "b_out", log, lambda ctx: ctx["a_out"] + "!"),
+    ]
+    context = Orchestrator(agents).run({"a_out": "stored"})
+
+    assert context["b_out"] == "stored!"
+    assert [n for e, n in log if e == "start"] == ["b"]
+    assert set(context["timings"]) == {"b", "total"}
+
+
+def test_cycles_and_ambiguous_graphs_are_rejected():
+    log: List = []
+    with pytest.raises(ValueError, match="cycle"):
+        Orchestrator([StepAgent("a", ["b_out"], "a_out", log), StepAgent("b", ["a_out"], "b_out", log)])
+    with pytest.raises(ValueError, match="both produce"):
+        Orchestrator([StepAgent("a", [], "out", log), StepAgent("b", [], "out", log)])
+    with pytest.raises(ValueError, match="output"):
+        Orchestrator([StepAgent("a", [], None, log)])
+
+    # An agent reading its own output is not a cycle
+    assert Orchestrator([StepAgent("a", ["a_out"], "a_out", log)]).run({})["a_out"] == "a"
+
+
+def test_independent_agents_run_concurrently():
+    # Each agent only finishes once all three are running at the same time
+    together = threading.Barrier(3, timeout=2)
+    log: List = []
+
+    def meet(context):
+        together.wait()
+        return True
+
+    agents = [StepAgent(n, ["season"], f"{n}_out", log, meet) for n in ("circuit", "driver", "constructor")]
+    agents.append(StepAgent("fusion", ["circuit_out", "driver_out", "constructor_out"], "fusion_out", log))
+
+    context = Orchestrator(agents, max_workers=3).run({"season": 2024})
+    assert context["fusion_out"] == "fusion"
+    assert log[-2:] == [("start", "fusion"), ("end", "fusion")]
+
+
+def test_timings_are_recorded_per_agent():
+    log: List = []
+
+    def sleep(seconds):
+        return lambda context: time.sleep(seconds)
+
+    agents = [StepAgent("slow", [], "slow_out", log, sleep(0.05)), StepAgent("fast", [], "fast_out", log)]
+    timings = Orchestrator(agents).run({})["timings"]
+
+    assert set(timings) == {"slow", "fast", "total"}
+    assert timings["slow"] >= 0.05
+    assert timings["fast"] < timings["slow"] <= timings["total"]
+
+
+def test_agent_errors_reach_the_caller():
+    def fail(context):
+        raise RuntimeError("upstream down")
+
+    with pytest.raises(RuntimeError, match="upstream down"):
+        Orchestrator([StepAgent("a", [], "a_out", [], fail)]).run({})
+
+
+# ---- FetchMemo ----
+
+class CountingJolpica:
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.calls: List = []
+        self.lock = threading.Lock()
+        self.timeout = 20
+
+    def results(self, season, round_no, limit=100):
+        with self.lock:
+            self.calls.append(("results", season, round_no, limit))
+        time.sleep(self.delay)
+        return {"season": season, "round": round_no}
+
+    def races(self, season):
+        with self.lock:
+            self.calls.append(("races", season))
+        raise RuntimeError("upstream down")
+
+
+def _concurrently(n: int, fn: Callable) -> List:
+    start = threading.Barrier(n)
+    out = [None] * n
+
+    def run(i):
+        start.wait()
+        try:
+            out[i] = fn()
+        except Exception as e:
+            out[i] = e
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return out
+
+
+def test_memo_fetches_once_for_concurrent_callers():
+    jol = CountingJolpica()
+    memo = FetchMemo(jol)
+
+    results = _concurrently(8, lambda: memo.results(2024, 5))
+    assert all(r is results[0] for r in results)
+    assert jol.calls == [("results", 2024, 5, 100)]
+
+    # Other arguments are other payloads; keyword arguments are part of the key
+    memo.results(2024, 6)
+    memo.results(2024, 5, limit=30)
+    memo.results(2024, 5)
+    assert len(jol.calls) == 3
+
+
+def test_memo_shares_errors_and_passes_other_attributes_through():
+    jol = CountingJolpica()
+    memo = FetchMemo(jol)
+
+    results = _concurrently(4, lambda: memo.races(2024))
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert jol.calls == [("races", 2024)]
+    assert memo.timeout == 20
@@ -0,0 +1,145 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from services import fastf1_service, pace_features
+from services.pace_features import PaceStore, extract_weekend, long_runs, reduce_weekend
+
+
+def stint_laps(driver, stint, times, start_life=1):
+    n = len(times)
+    return pd.DataFrame({
+        "Driver": [driver] * n,
+        "Stint": [stint] * n,
+        "TyreLife": np.arange(start_life, start_life + n, dtype=float),
+        "LapTime": pd.to_timedelta(times, unit="s"),
+        "PitInTime": pd.NaT,
+        "PitOutTime": pd.NaT,
+        "IsAccurate": True,
+        "Deleted": False,
+        "TrackStatus": "1",
+    })
+
+
+@pytest.fixture
+def practice():
+    laps = pd.concat([
+        # VER: a clean long run losing 0.1 s per lap, plus a short qualifying-sim stint
+        stint_laps("VER", 1, [90.0, 90.1, 90.2, 90.3, 90.4, 90.5]),
+        stint_laps("VER", 2, [88.0, 88.1]),
+        # LEC: 0.5 s slower per lap, with one traffic lap cut off by LONG_RUN_CUTOFF
+        stint_laps("LEC", 1, [90.5, 90.6, 99.0, 90.7, 90.8, 90.9, 91.0]),
+    ], ignore_index=True)
+    results = pd.DataFrame({"Abbreviation": ["VER", "LEC"], "DriverId": ["max_verstappen", "leclerc"]})
+    return laps, results
+
+
+def test_long_runs_keep_clean_stints_only(practice):
+    laps, _ = practice
+    runs = long_runs(laps)
+
+    pace, deg, n = runs["VER"]
+    assert (pace, n) == (pytest.approx(90.25), 6)
+    assert deg == pytest.approx(0.1)
+
+    pace, deg, n = runs["LEC"]
+    assert (pace, n) == (pytest.approx(90.75), 6)
+
+
+def test_reduce_weekend_joins_qualifying_and_practice(qualifying, practice):
+    qualifying = pd.concat([qualifying, pd.DataFrame({
+        "DriverId": ["max_verstappen"],
+        "Q1": pd.to_timedelta([80.4], unit="s"),
+        "Q2": pd.to_timedelta([float("nan")], unit="s"),
+        "Q3": pd.to_timedelta([float("nan")], unit="s"),
+    })], ignore_index=True)
+    table = {row["driver"]: row for row in reduce_weekend(qualifying, *practice)}
+
+    assert sorted(table) == ["driver_0000", "driver_0001", "driver_0002", "leclerc", "max_verstappen"]
+    assert table["driver_0000"]["quali_gap"] == 0.0
+    assert table["driver_0001"]["quali_gap"] == pytest.approx(1.0, abs=1e-5)
+    assert math.isnan(table["driver_0002"]["quali_gap"])
+
+    ver, lec = table["max_verstappen"], table["leclerc"]
+    assert ver["quali_gap"] == pytest.approx(0.5, abs=1e-5)
+    assert (ver["long_run_gap"], ver["long_run_laps"]) == (0.0, 6)
+    assert lec["long_run_gap"] == pytest.approx(0.5 / 90.25 * 100, abs=1e-4)
+    assert math.isnan(lec["quali_gap"])
+    assert table["driver_0000"]["long_run_laps"] == 0
+
+
+def test_reduce_weekend_without_sessions_is_empty():
+    assert len(reduce_weekend(None, None, None)) == 0
+
+
+def test_store_round_trip(tmp_path, qualifying):
+    store = PaceStore(root=tmp_path, version="test")
+    assert store.read(2024, 1) is None
+
+    store.write(2024, 1, reduce_weekend(qualifying, None, None))
+    features = store.read(2024, 1)
+    assert features["driver_0000"] == {
+        "quali_gap": 0.0, "long_run_pace": None, "long_run_gap": None, "tyre_deg": None, "long_run_laps": 0,
+    }
+    assert features["driver_0002"]["quali_gap"] is None
+
+
+# ---- Extraction: only "session not available" is skipped ----
+
+class FakeSession:
+    def __init__(self, laps=None, results=None):
+        self.laps, self.results = laps, results
+
+
+def fake_service(sessions):
+    """
+    FastF1Service stand-in: `sessions` maps a session name to a FakeSession
+    or to the exception loading it raises.
+    """
+    def load(name):
+        outcome = sessions[name]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    class Service:
+        def get_results(self, season, round_no, name):
+            return load(name)
+
+        def get_laps(self, season, round_no, name):
+            return load(name)
+
+    return Service
+
+
+def test_missing_sessions_are_skipped(monkeypatch, qualifying, practice):
+    pytest.importorskip("fastf1")
+    from fastf1.exceptions import DataNotLoadedError
+
+    laps, results = practice
+    monkeypatch.setattr(fastf1_service, "FastF1Service", fake_service({
+        "Q": DataNotLoadedError("no results"),
+        "FP2": ValueError("Session type 'FP2' does not exist for this event"),
+        "FP1": FakeSession(laps, results),
+    }))
+    table = extract_weekend(2024, 6)
+    assert sorted(table["driver"]) == ["leclerc", "max_verstappen"]
+
+
+def test_other_failures_propagate(monkeypatch, qualifying):
+    pytest.importorskip("fastf1")
+
+    monkeypatch.setattr(fastf1_service, "FastF1Service", fake_service({
+        "Q": FakeSession(results=qualifying),
+        "FP2": ConnectionError("livetiming unreachable"),
+    }))
+    with pytest.raises(ConnectionError):
+        extract_weekend(2024, 6)
+
+    monkeypatch.setattr(fastf1_service, "FastF1Service", fake_service({
+        "Q": ValueError("Invalid round: 30"), "FP2": ValueError("x"), "FP1": ValueError("x"),
+    }))
+    with pytest.raises(LookupError):
+        extract_weekend(2024, 30)
@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+from agents.race_simulator import (
+    POINTS,
+    WEIGHT_FLOOR,
+    RaceSimulatorAgent,
+    position_counts,
+    sample_finishing_orders,
+    simulate_positions,
+)
+
+WIN = np.array([0.5, 0.3, 0.15, 0.05])
+
+
+def test_win_frequencies_match_the_input_probabilities():
+    positions = simulate_positions(np.log(WIN), np.zeros(4), n_sims=200_000, seed=1)
+    assert positions[:, 0] == pytest.approx(WIN, abs=0.005)
+
+
+def test_second_place_follows_plackett_luce():
+    positions = simulate_positions(np.log(WIN), np.zeros(4), n_sims=200_000, seed=2)
+    # P(j second) = sum over winners i != j of p_i * p_j / (1 - p_i)
+    second = [sum(WIN[i] * WIN[j] / (1 - WIN[i]) for i in range(4) if i != j) for j in range(4)]
+    assert positions[:, 1] == pytest.approx(second, abs=0.005)
+
+
+def test_positions_are_a_distribution_per_driver_and_per_place():
+    positions = simulate_positions(np.log(WIN), np.full(4, 0.1), n_sims=10_000, seed=3)
+    assert positions.shape == (4, 4)
+    assert positions.sum(axis=1) == pytest.approx(np.ones(4))
+    assert positions.sum(axis=0) == pytest.approx(np.ones(4))
+
+
+def test_retired_cars_are_classified_last():
+    rng = np.random.default_rng(4)
+    orders = sample_finishing_orders(np.log(WIN), np.array([1.0, 0.0, 0.0, 0.0]), 1.0, 1000, rng)
+    assert orders.shape == (1000, 4)
+    assert (orders[:, -1] == 0).all()
+
+    # A 50% DNF risk: half the races end last, the other half run as without it
+    clean = simulate_positions(np.log(WIN), np.zeros(4), n_sims=100_000, seed=5)
+    risky = simulate_positions(np.log(WIN), np.array([0.5, 0.0, 0.0, 0.0]), n_sims=100_000, seed=5)
+    assert risky[0, -1] == pytest.approx(0.5 + 0.5 * clean[0, -1], abs=0.01)
+    assert risky[0, 0] == pytest.approx(0.5 * WIN[0], abs=0.01)
+
+
+def test_a_fixed_seed_repeats_whatever_the_threads():
+    args = (np.log(WIN), np.full(4, 0.05), 1.2)
+    one = simulate_positions(*args, n_sims=50_000, seed=6, chunk_size=8192, workers=1)
+    four = simulate_positions(*args, n_sims=50_000, seed=6, chunk_size=8192, workers=4)
+    assert np.array_equal(one, four)
+    assert not np.array_equal(one, simulate_positions(*args, n_sims=50_000, seed=7, chunk_size=8192))
+
+
+def test_position_counts():
+    orders = np.array([[2, 0, 1], [2, 1, 0]])
+    assert position_counts(orders).tolist() == [[0, 1, 1], [0, 1, 1], [2, 0, 0]]
+
+
+# ---- RaceSimulatorAgent ----
+
+def context(probabilities, safety_car_risk=0.0, dnf_risk=None):
+    return {
+        "prediction": {"probabilities": probabilities},
+        "drivers": {d: {"dnf_risk": (dnf_risk or {}).get(d, 0.0)} for d in probabilities},
+        "circuit": {"safety_car_risk": safety_car_risk},
+    }
+
+
+def test_agent_reports_odds_points_and_podium():
+    probabilities = dict(zip("abcd", WIN))
+    out = RaceSimulatorAgent(n_sims=100_000, seed=8).run(context(probabilities))
+
+    assert out["n_sims"] == 100_000
+    assert out["podium"] == ["a", "b", "c"]
+    assert set(out["drivers"]) == set(probabilities)
+    a = out["drivers"]["a"]
+    assert a["win"] == pytest.approx(0.5, abs=0.01)
+    assert a["expected_points"] == pytest.approx(np.dot(a["positions"], POINTS[:4]), abs=0.01)
+    assert sum(d["podium"] for d in out["drivers"].values()) == pytest.approx(3.0, abs=0.01)
+
+
+def test_agent_chaos_flattens_the_field_and_zero_is_still_possible():
+    probabilities = {"a": 0.9, "b": 0.1, "c": 0.0}
+    calm = RaceSimulatorAgent(n_sims=100_000, seed=9).run(context(probabilities))
+    chaotic = RaceSimulatorAgent(n_sims=100_000, seed=9).run(context(probabilities, safety_car_risk=1.0))
+
+    assert chaotic["drivers"]["a"]["win"] < calm["drivers"]["a"]["win"]
+    assert 0 < calm["drivers"]["c"]["win"] < 0.001
+    assert calm["drivers"]["c"]["win"] == pytest.approx(WEIGHT_FLOOR, abs=1e-4)
+
+
+def test_agent_without_probabilities():
+    assert RaceSimulatorAgent(seed=0).run({"prediction": {}}) == {"n_sims": 0, "podium": [], "drivers": {}}
@@ -0,0 +1,19 @@
+import pytest
+
+from services.ranges import int_range
+
+
+@pytest.mark.parametrize("spec, expected", [
+    ("2024", [2024]),
+    ("2021-2024", [2021, 2022, 2023, 2024]),
+    ("1,3,5-7", [1, 3, 5, 6, 7]),
+    (" 7, 1-2 ,2", [1, 2, 7]),
+])
+def test_int_range(spec, expected):
+    assert int_range(spec) == expected
+
+
+@pytest.mark.parametrize("spec", ["", "a", "1-b", "1,,2"])
+def test_int_range_rejects_garbage(spec):
+    with pytest.raises(ValueError):
+        int_range(spec)
@@ -0,0 +1,139 @@
+import time
+
+import pytest
+
+from conftest import FakeResponse, FakeSession
+from services import jolpica_service
+from services.jolpica_service import JolpicaService
+from services.rate_limit import CircuitBreaker, CircuitOpenError, TokenBucket, parse_retry_after
+
+
+# -------- TokenBucket -------- #
+
+def test_bucket_grants_its_capacity_then_refuses():
+    bucket = TokenBucket(rate=0.001, capacity=3)
+    assert [bucket.try_acquire() for _ in range(4)] == [True, True, True, False]
+
+
+def test_bucket_acquire_waits_for_a_refill():
+    bucket = TokenBucket(rate=50, capacity=1)
+    assert bucket.acquire() == 0.0
+    start = time.monotonic()
+    waited = bucket.acquire()
+    assert waited > 0
+    assert time.monotonic() - start >= 0.015
+
+
+def test_bucket_pause_blocks_even_with_tokens():
+    bucket = TokenBucket(rate=1000, capacity=5)
+    bucket.pause(0.05)
+    assert not bucket.try_acquire()
+    time.sleep(0.06)
+    assert bucket.try_acquire()
+
+
+@pytest.mark.parametrize("value, expected", [("3", 3.0), ("-1", 0.0), (None, None), ("soon", None)])
+def test_parse_retry_after(value, expected):
+    assert parse_retry_after(value) == expected
+
+
+def test_parse_retry_after_http_date():
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+
+# -------- CircuitBreaker -------- #
+
+def test_breaker_opens_after_threshold_and_rejects():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    assert breaker.allow() and breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+
+def test_breaker_half_open_lets_one_trial_through():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+    breaker.record_failure()
+    time.sleep(0.02)
+
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow()
+
+
+def test_breaker_failed_trial_reopens():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+    breaker.record_failure()
+    time.sleep(0.02)
+    assert breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+
+def test_breaker_release_frees_the_trial_slot():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+    breaker.record_failure()
+    time.sleep(0.02)
+    assert breaker.allow()
+
+    breaker.release()
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+
+
+# -------- JolpicaService against the breaker -------- #
+
+@pytest.fixture
+def breaker(monkeypatch):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+    monkeypatch.setattr(jolpica_service, "_BREAKER", breaker)
+    return breaker
+
+
+def test_unexpected_error_does_not_wedge_the_breaker(cache, breaker):
+    breaker.record_failure()
+    time.sleep(0.02)
+
+    def explode(url, params, headers):
+        raise KeyError("not a RequestException")
+
+    jol = JolpicaService(cache, max_retries=1)
+    jol._session = FakeSession(explode)
+    with pytest.raises(KeyError):
+        jol._request("http://jolpica.test/2020.json")
+
+    # The trial slot is free again: the next call goes through and closes the breaker
+    jol._session = FakeSession(lambda url, params, headers: FakeResponse(payload={"ok": True}))
+    assert jol._request("http://jolpica.test/2020.json")[1] == {"ok": True}
+    assert breaker.state == "closed"
+
+
+def test_open_breaker_rejects_without_a_request(cache, breaker):
+    breaker.record_failure()
+    breaker.reset_timeout = 60
+
+    jol = JolpicaService(cache)
+    jol._session = FakeSession(lambda url, params, headers: FakeResponse(payload={}))
+    with pytest.raises(CircuitOpenError):
+        jol._request("http://jolpica.test/2020.json")
+    assert jol._session.calls == []
+
+
+def test_server_errors_trip_the_breaker(cache, breaker, monkeypatch):
+    monkeypatch.setattr(jolpica_service, "backoff_delay", lambda attempt: 0.0)
+    breaker.reset_timeout = 60
+
+    jol = JolpicaService(cache, max_retries=2)
+    jol._session = FakeSession(lambda url, params, headers: FakeResponse(status_code=503))
+    with pytest.raises(RuntimeError):
+        jol._request("http://jolpica.test/2020.json")
+
+    assert len(jol._session.calls) == 2
+    assert breaker.state == "open"
@@ -0,0 +1,54 @@
+import pytest
+
+from agents.constructor_agent import ConstructorAgent
+from agents.driver_agent import DriverAgent
+from agents.pipeline import build_context, run_prediction, season_contexts
+from agents.rolling import sweep
+from benchmarks.synthetic import SyntheticJolpica
+from services.results_frame import ResultsFrame
+
+
+@pytest.mark.parametrize("window", [1, 3, 5, 8])
+def test_sweep_matches_per_round_agents(synthetic_jol, window):
+    frame = ResultsFrame.from_jolpica(synthetic_jol, 2024)
+    drivers, constructors = DriverAgent(synthetic_jol, window), ConstructorAgent(synthetic_jol, window)
+
+    swept = list(sweep(frame, window))
+    assert [r for _, r, _, _ in swept] == list(range(1, 13))
+    for season, round_no, driver_features, constructor_features in swept:
+        context = {"season": season, "round": round_no, "results_frame": frame}
+        assert driver_features == drivers.run(context)
+        assert constructor_features == constructors.run(context)
+
+
+def test_cross_season_window_spans_the_boundary(synthetic_jol):
+    frame = ResultsFrame.concat([
+        ResultsFrame.from_jolpica(synthetic_jol, 2023),
+        ResultsFrame.from_jolpica(synthetic_jol, 2024),
+    ])
+    swept = {(s, r): d for s, r, d, _ in sweep(frame, window=3, cross_season=True)}
+    in_season = {(s, r): d for s, r, d, _ in sweep(frame, window=3)}
+
+    # Round 1 sees the end of the previous season only across the boundary
+    assert in_season[(2024, 1)] == {}
+    assert swept[(2024, 1)]
+
+    # The window is the three races before, whatever their season
+    rows = frame.mask(2023, [11, 12]) | frame.mask(2024, [1])
+    assert swept[(2024, 2)] == DriverAgent.features(frame, rows, 3)
+
+
+def test_swept_contexts_match_the_agent_graph(synthetic_jol):
+    for swept in season_contexts(synthetic_jol, 2024):
+        assert swept == build_context(synthetic_jol, 2024, swept["round"])
+
+
+def test_rounds_without_results_are_predicted_from_earlier_races(partial_jol):
+    # Round 7 is the next race; its context only needs rounds 1-6
+    context = run_prediction(partial_jol, 2024, 7)
+    assert context["prediction"]["winner"] is not None
+    assert context["circuit"]["circuit_name"] == "Synthetic Circuit 7"
+    # Race distance from the circuit's previous edition
+    previous = SyntheticJolpica(seasons=(2023,), rounds=12, drivers=20, seed=7).races(2023)[6]
+    assert context["circuit"]["lap_count"] == max(int(r["laps"]) for r in previous["Results"])
+    assert len(context["driver_to_constructor"]) == 20
@@ -0,0 +1,88 @@
+import threading
+
+from conftest import FakeResponse, FakeSession
+from services.jolpica_service import JolpicaService
+from services.singleflight import SingleFlight
+
+
+def _concurrently(n: int, fn):
+    """
+    Runs fn() on n threads released together; returns their results or errors.
+    """
+    start = threading.Barrier(n)
+    out = [None] * n
+
+    def run(i):
+        start.wait()
+        try:
+            out[i] = fn()
+        except Exception as e:
+            out[i] = e
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return out
+
+
+def test_concurrent_callers_share_one_execution():
+    flights = SingleFlight()
+    calls = []
+    release = threading.Event()
+
+    def slow():
+        calls.append(1)
+        release.wait(1)
+        return "payload"
+
+    threading.Timer(0.1, release.set).start()
+    results = _concurrently(8, lambda: flights.do("k", slow))
+
+    assert results == ["payload"] * 8
+    assert len(calls) == 1
+
+
+def test_error_is_shared_and_not_remembered():
+    flights = SingleFlight()
+    release = threading.Event()
+
+    def failing():
+        release.wait(1)
+        raise RuntimeError("upstream down")
+
+    threading.Timer(0.1, release.set).start()
+    results = _concurrently(4, lambda: flights.do("k", failing))
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+    # Finished calls are forgotten: the next caller runs again
+    assert flights.do("k", lambda: "recovered") == "recovered"
+
+
+def test_different_keys_do_not_wait_for_each_other():
+    flights = SingleFlight()
+    blocked = threading.Event()
+    thread = threading.Thread(target=lambda: flights.do("a", lambda: blocked.wait(1)))
+    thread.start()
+    try:
+        assert flights.do("b", lambda: "b") == "b"
+    finally:
+        blocked.set()
+        thread.join()
+
+
+def test_service_coalesces_identical_misses(cache):
+    release = threading.Event()
+
+    def handler(url, params, headers):
+        release.wait(1)
+        return FakeResponse(payload={"MRData": {}})
+
+    jol = JolpicaService(cache)
+    jol._session = FakeSession(handler)
+    threading.Timer(0.1, release.set).start()
+    results = _concurrently(6, lambda: jol.get("/2020/driverstandings.json"))
+
+    assert results == [{"MRData": {}}] * 6
+    assert len(jol._session.calls) == 1
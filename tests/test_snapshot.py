@@ -0,0 +1,21 @@
+from benchmarks.synthetic import SyntheticJolpica
+from services.results_frame import ResultsFrame
+from tools.snapshot import cache_entries
+
+
+def test_cache_entries_export_every_payload_of_the_seasons(synthetic_jol):
+    # Derived compact frames live in the same cache and are not exported
+    ResultsFrame.from_jolpica(synthetic_jol, 2024)
+
+    entries = list(cache_entries(synthetic_jol.cache, [2024]))
+    paths = sorted(e["path"] for e in entries)
+    assert paths == sorted(
+        ["/2024/races.json", "/2024/results.json", "/2024/driverstandings.json", "/2024/constructorstandings.json"]
+        + [f"/2024/{r}/results.json" for r in range(1, 13)]
+        # Season-less: every season's races at each circuit
+        + [f"/circuits/circuit_{r:02d}/races.json" for r in range(1, 13)]
+    )
+
+    season = next(e for e in entries if e["path"] == "/2024/results.json")
+    races = SyntheticJolpica(seasons=(2024,), rounds=12, drivers=20, seed=7).races(2024)
+    assert season["payload"]["MRData"]["RaceTable"]["Races"] == races
@@ -0,0 +1,129 @@
+import gc
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("fastf1")
+
+from services.fastf1_service import FastF1Service, TELEMETRY_DTYPE, per_driver, reduce_lap
+
+T0 = pd.Timestamp("2024-03-02 14:00:00")
+HZ = 4
+LAP_SECONDS = 90.0
+FIRST_LAP = 60.0
+
+
+# ---- reduce_lap ----
+
+def test_reduce_lap_counts_braking_zones_and_speed_drops():
+    speed = np.array([300, 310, 250, 150, 140, 200, 290, 300, 200, 180, 250], dtype=np.float32)
+    throttle = np.array([100, 100, 0, 0, 0, 60, 100, 99, 0, 10, 100], dtype=np.uint8)
+    # Zones: samples 2-4 and 8-9; sample 6 alone is too short to count
+    brake = np.array([0, 0, 1, 1, 1, 0, 1, 0, 1, 1, 0], dtype=bool)
+
+    samples, top, full, ratio, zones, drop = reduce_lap(speed, throttle, brake)
+    assert (samples, top, zones) == (11, 310.0, 2)
+    assert full == pytest.approx(5 / 11)
+    assert ratio == pytest.approx(6 / 11)
+    # 250 -> 140 in the first zone, 200 -> 180 in the second
+    assert drop == 110.0
+
+
+def test_reduce_lap_edges():
+    empty = np.empty(0, dtype=np.float32)
+    assert reduce_lap(empty, empty.astype(np.uint8), empty.astype(bool))[0] == 0
+
+    # Braking up to the last sample still closes the zone
+    speed = np.array([200, 150, 100], dtype=np.float32)
+    result = reduce_lap(speed, np.zeros(3, dtype=np.uint8), np.array([0, 1, 1], dtype=bool))
+    assert result[4:] == (1, 50.0)
+
+
+# ---- Synthetic sessions ----
+
+class FakeSession:
+    def __init__(self, laps, api_path):
+        self.laps = laps
+        self.api_path = api_path
+
+
+def session_laps(drivers: int, laps: int) -> pd.DataFrame:
+    starts = FIRST_LAP + LAP_SECONDS * np.arange(laps)
+    return pd.DataFrame({
+        "DriverNumber": np.repeat([str(n) for n in range(1, drivers + 1)], laps),
+        "Driver": np.repeat([f"D{n:02d}" for n in range(1, drivers + 1)], laps),
+        "LapNumber": np.tile(np.arange(1, laps + 1), drivers),
+        "LapStartTime": pd.to_timedelta(np.tile(starts, drivers), unit="s"),
+        "Time": pd.to_timedelta(np.tile(starts + LAP_SECONDS, drivers), unit="s"),
+    })
+
+
+def car_stream(drivers: int, laps: int, seed: int = 0) -> dict:
+    """
+    Raw car data as FastF1's API returns it: exact Date, and a Time column
+    running up to 0.9 s ahead of it (exact on the first sample of driver 1,
+    which pins t0_date), so laps cut on Time would lose boundary samples.
+    """
+    rng = np.random.default_rng(seed)
+    seconds = np.arange(FIRST_LAP, FIRST_LAP + LAP_SECONDS * laps + 1e-9, 1 / HZ)
+    n = len(seconds)
+    stream = {}
+    for number in range(1, drivers + 1):
+        lag = rng.uniform(0.0, 0.9, n)
+        if number == 1:
+            lag[0] = 0.0
+        phase = (seconds - FIRST_LAP) % LAP_SECONDS
+        stream[str(number)] = pd.DataFrame({
+            "Date": T0 + pd.to_timedelta(seconds, unit="s"),
+            "Time": pd.to_timedelta(seconds + lag, unit="s"),
+            "Speed": 200 + 100 * np.sin(phase / LAP_SECONDS * 2 * np.pi),
+            "Throttle": np.where(phase < 60, 100, 0),
+            "Brake": phase >= 80,
+        })
+    return stream
+
+
+@pytest.fixture
+def fake_ff1(tmp_path, monkeypatch):
+    """
+    FastF1Service whose sessions are synthetic: api_path (drivers, laps, seed)
+    builds the raw car stream only when it is requested, like a download.
+    """
+    service = FastF1Service(cache_dir=tmp_path / "fastf1")
+    monkeypatch.setattr(
+        service, "get_laps",
+        lambda year, gp, name, drivers=10, laps=12: FakeSession(session_laps(drivers, laps), (drivers, laps, gp)),
+    )
+    monkeypatch.setattr(FastF1Service, "_raw_car_data", staticmethod(lambda session: car_stream(*session.api_path)))
+    return service
+
+
+def test_laps_are_cut_on_date_based_session_time(fake_ff1):
+    session = fake_ff1.get_laps(2024, 1, "FP2", 3, 4)
+    table = fake_ff1.reduce_telemetry(session)
+
+    assert table.dtype == TELEMETRY_DTYPE
+    assert len(table) == 3 * 4
+    # Both lap boundaries are included: LAP_SECONDS * HZ + 1 samples per lap
+    assert set(table["samples"]) == {LAP_SECONDS * HZ + 1}
+    assert set(per_driver(table)) == {"D01", "D02", "D03"}
+
+    only = fake_ff1.reduce_telemetry(session, drivers=["D02"])
+    assert set(only["driver"]) == {"D02"}
+
+
+def test_peak_memory_does_not_grow_with_sessions(fake_ff1):
+    def peak(sessions: int) -> int:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            for _, table in fake_ff1.telemetry_stats([(2024, gp, "FP2") for gp in range(sessions)]):
+                assert len(table) == 10 * 12
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    # One raw session stream is a few MB; holding a second would double the peak
+    assert peak(4) < peak(1) * 1.25
@@ -0,0 +1,270 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlparse
+import argparse
+import ast
+import json
+import re
+import time
+import zipfile
+
+from config.settings import settings
+from services.cache_service import CacheService
+from services.ranges import int_range
+
+# Archive layout: index.json plus one deflated JSON document per payload
+_ARCHIVE_FORMAT = 1
+_INDEX = "index.json"
+
+# Pagination is the server's job; these never identify a payload
+_PAGING = ("limit", "offset")
+
+_SEASON = re.compile(r"^/(\d{4})(?:/|\.json)")
+
+
+def _query(params: Optional[Dict[str, Any]]) -> str:
+    return "&".join(
+        f"{k}={v}" for k, v in sorted((str(k), str(v)) for k, v in (params or {}).items())
+        if k not in _PAGING and v is not None
+    )
+
+
+def _season(path: str) -> Optional[int]:
+    match = _SEASON.match(path)
+    return int(match.group(1)) if match else None
+
+
+def parse_seasons(spec: Optional[str]) -> Optional[List[int]]:
+    """
+    '2023', '2021-2024' or '2019,2021-2022' -> list of seasons; None = all.
+    """
+    return int_range(spec) if spec else None
+
+
+# -------- Reading the cache -------- #
+
+def _parse_key(key: str) -> Optional[Tuple[str, Dict[str, str]]]:
+    """
+    (path, params) for a Jolpica cache key: the canonical
+    'jolpica::{base}{path}?{query}' form or the older
+    'jolpica::{url}::{params repr}' one. None for anything else.
+    """
+    if not isinstance(key, str) or not key.startswith("jolpica::"):
+        return None
+    rest = key[len("jolpica::"):]
+
+    url, sep, legacy = rest.partition("::")
+    if sep:
+        try:
+            params = ast.literal_eval(legacy) or {}
+        except (ValueError, SyntaxError):
+            return None
+    else:
+        url, _, query = rest.partition("?")
+        params = dict(parse_qsl(query))
+
+    path = urlparse(url).path
+    prefix = urlparse(settings.JOLPICA_BASE).path.rstrip("/")
+    for base in (prefix, "/ergast/f1"):
+        if base and path.startswith(base + "/"):
+            path = path[len(base):]
+            break
+    return path, {str(k): str(v) for k, v in params.items()}
+
+
+def _season_results_payload(season: str, races: List[Dict[str, Any]]) -> Dict[str, Any]:
+    total = sum(len(r.get("Results", [])) for r in races)
+    return {"MRData": {"total": str(total), "RaceTable": {"season": season, "Races": races}}}
+
+
+def cache_entries(
+    cache: CacheService, seasons: Optional[Iterable[int]] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Every Jolpica payload in the cache (optionally only some seasons, plus
+    the season-less ones) as Ergast-shaped JSON. Derived entries (compact
+    frames) and locks are skipped; bulk season results, cached as merged
+    race lists, are re-wrapped in MRData.
+    """
+    wanted = None if seasons is None else set(seasons)
+
+    for key in cache.iterkeys():
+        parsed = _parse_key(key)
+        if parsed is None:
+            continue
+        path, params = parsed
+        if "format" in params:
+            continue
+        season = _season(path)
+        # Season-less payloads (e.g. a circuit's races) serve every season
+        if wanted is not None and season is not None and season not in wanted:
+            continue
+
+        value = cache.get(key, skip_memory=True)
+        if value is None:
+            continue
+
+        meta: Dict[str, Any] = {}
+        if isinstance(value, dict) and "fetched_at" in value and "data" in value:
+            meta = {k: value.get(k) for k in ("fetched_at", "etag", "last_modified")}
+            value = value["data"]
+        if isinstance(value, list):
+            value = _season_results_payload(str(season), value)
+        if not isinstance(value, dict) or "MRData" not in value:
+            continue
+
+        yield {"path": path, "query": _query(params), "season": season, "payload": value, **meta}
+
+
+def synthetic_entries(
+    seasons: Iterable[int], rounds: int = 24, drivers: int = 20, seed: int = 0
+) -> Iterator[Dict[str, Any]]:
+    """
+    The same endpoints generated by benchmarks.synthetic, for load tests
+    beyond real grid sizes.
+    """
+    from benchmarks.synthetic import SyntheticJolpica
+
+    synthetic = SyntheticJolpica(seasons=seasons, rounds=rounds, drivers=drivers, seed=seed)
+    for season in synthetic.seasons:
+        payloads = {
+            f"/{season}/races.json": synthetic.races_payload(season),
+            f"/{season}/results.json": synthetic.season_results_payload(season),
+            f"/{season}/driverstandings.json": synthetic.driver_standings_payload(season, rounds // 2),
+            f"/{season}/constructorstandings.json": synthetic.constructor_standings_payload(
+                season, rounds // 2
+            ),
+        }
+        for round_no in range(1, rounds + 1):
+            payloads[f"/{season}/{round_no}/results.json"] = synthetic.results_payload(season, round_no)
+        for path, payload in payloads.items():
+            yield {"path": path, "query": "", "season": season, "payload": payload}
+
+    for round_no in range(1, rounds + 1):
+        payload = synthetic.circuit_races_payload(round_no)
+        path = f"/circuits/{payload['MRData']['RaceTable']['circuitId']}/races.json"
+        yield {"path": path, "query": "", "season": None, "payload": payload}
+
+
+# -------- Archive -------- #
+
+def write_archive(target: Path, entries: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Writes the entries into one zip (deflated JSON per payload) with an
+    index.json describing them. Later duplicates of a (path, query) win.
+    Returns the index.
+    """
+    by_key: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    for entry in entries:
+        by_key[(entry["path"], entry["query"])] = entry
+
+    index = {
+        "format": _ARCHIVE_FORMAT,
+        "created_at": time.time(),
+        "source_base": settings.JOLPICA_BASE,
+        "entries": [],
+    }
+    target = Path(target)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(f".{target.name}.tmp")
+
+    with zipfile.ZipFile(tmp, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for n, ((path, query), entry) in enumerate(sorted(by_key.items())):
+            name = f"payloads/{n:06d}.json"
+            archive.writestr(name, json.dumps(entry["payload"], separators=(",", ":")))
+            index["entries"].append({
+                "path": path,
+                "query": query,
+                "season": entry.get("season"),
+                "file": name,
+                "fetched_at": entry.get("fetched_at"),
+                "etag": entry.get("etag"),
+                "last_modified": entry.get("last_modified"),
+            })
+        archive.writestr(_INDEX, json.dumps(index, indent=1))
+
+    tmp.replace(target)
+    return index
+
+
+@dataclass
+class Snapshot:
+    """
+    Read side of a snapshot archive: payloads by (path, query), loaded
+    lazily and kept once read.
+    """
+
+    path: Path
+    index: Dict[str, Any] = field(init=False)
+    _files: Dict[Tuple[str, str], str] = field(init=False, repr=False)
+    _payloads: Dict[Tuple[str, str], Dict[str, Any]] = field(init=False, repr=False, default_factory=dict)
+
+    def __post_init__(self):
+        self._zip = zipfile.ZipFile(self.path)
+        self.index = json.loads(self._zip.read(_INDEX))
+        if self.index.get("format") != _ARCHIVE_FORMAT:
+            raise ValueError(f"Unsupported snapshot format: {self.index.get('format')}")
+        self._files = {(e["path"], e["query"]): e["file"] for e in self.index["entries"]}
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    def paths(self) -> List[Tuple[str, str]]:
+        return sorted(self._files)
+
+    def get(self, path: str, params: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        key = (path, _query(params))
+        if key not in self._payloads:
+            name = self._files.get(key)
+            if name is None:
+                return None
+            self._payloads[key] = json.loads(self._zip.read(name))
+        return self._payloads[key]
+
+    def close(self) -> None:
+        self._zip.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export / inspect Jolpica snapshot archives")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export = sub.add_parser("export", help="write cached (or synthetic) payloads to an archive")
+    export.add_argument("archive", type=Path)
+    export.add_argument("--seasons", default=None, help="e.g. 2023 or 2021-2024 (default: all cached)")
+    export.add_argument("--cache-dir", default=str(settings.CACHE_DIR))
+    export.add_argument("--synthetic", action="store_true", help="generate payloads instead of reading the cache")
+    export.add_argument("--rounds", type=int, default=24)
+    export.add_argument("--drivers", type=int, default=20)
+    export.add_argument("--seed", type=int, default=0)
+
+    show = sub.add_parser("list", help="print an archive's index")
+    show.add_argument("archive", type=Path)
+
+    args = parser.parse_args()
+
+    if args.command == "list":
+        snapshot = Snapshot(args.archive)
+        for path, query in snapshot.paths():
+            print(f"{path}?{query}" if query else path)
+        print(f"{len(snapshot)} payloads")
+        snapshot.close()
+        return
+
+    seasons = parse_seasons(args.seasons)
+    if args.synthetic:
+        entries = synthetic_entries(seasons or [2030], args.rounds, args.drivers, args.seed)
+        index = write_archive(args.archive, entries)
+    else:
+        cache = CacheService(args.cache_dir)
+        try:
+            index = write_archive(args.archive, cache_entries(cache, seasons))
+        finally:
+            cache.close()
+    print(f"Wrote {len(index['entries'])} payloads to {args.archive}")
+
+
+if __name__ == "__main__":
+    main()
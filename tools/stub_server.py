@@ -0,0 +1,238 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlparse
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+
+from services.rate_limit import Counters, TokenBucket
+from tools.snapshot import Snapshot
+
+# Jolpica's own paging limits
+DEFAULT_LIMIT = 30
+MAX_LIMIT = 100
+
+_SEASON_RESULTS = re.compile(r"^/(\d{4})/results\.json$")
+
+
+@dataclass
+class StubConfig:
+    # Added to every response: latency + uniform(0, jitter), in seconds
+    latency: float = 0.0
+    jitter: float = 0.0
+    # Share of requests answered 429 at random (seeded, so runs repeat)
+    throttle_rate: float = 0.0
+    # Sustained requests per second before answering 429 (0 = unlimited)
+    max_rps: float = 0.0
+    retry_after: float = 1.0
+    max_limit: int = MAX_LIMIT
+    seed: int = 0
+
+
+@dataclass
+class StubJolpica:
+    """
+    Ergast-compatible responses from a snapshot archive, with
+    limit/offset pagination, ETag revalidation and injected latency / 429s.
+    """
+
+    snapshot: Snapshot
+    config: StubConfig = field(default_factory=StubConfig)
+    stats: Counters = field(default_factory=Counters)
+
+    def __post_init__(self):
+        self._random = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self._bucket = (
+            TokenBucket(rate=self.config.max_rps, capacity=max(1.0, self.config.max_rps))
+            if self.config.max_rps > 0 else None
+        )
+
+    # -------- Payloads -------- #
+
+    def _payload(self, path: str, params: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        payload = self.snapshot.get(path, params)
+        if payload is not None:
+            return payload
+
+        # Bulk season results missing from the archive: assemble them from rounds
+        match = _SEASON_RESULTS.match(path)
+        if not match:
+            return None
+        season = match.group(1)
+        races = []
+        for round_no in range(1, 41):
+            single = self.snapshot.get(f"/{season}/{round_no}/results.json")
+            if single is not None:
+                races += single["MRData"]["RaceTable"]["Races"]
+        if not races:
+            return None
+        return {"MRData": {"RaceTable": {"season": season, "Races": races}}}
+
+    @staticmethod
+    def paginate(payload: Dict[str, Any], limit: int, offset: int) -> Dict[str, Any]:
+        """
+        One page the way Ergast pages: by result rows for results tables
+        (a race split across pages repeats its header), by races for race
+        tables, by standings entries for standings.
+        """
+        mr = payload["MRData"]
+        page = {k: v for k, v in mr.items() if k not in ("limit", "offset", "total")}
+        races = mr.get("RaceTable", {}).get("Races")
+
+        if races is not None and any("Results" in r for r in races):
+            rows = [(race, result) for race in races for result in race.get("Results", [])]
+            grouped: List[Dict[str, Any]] = []
+            for race, result in rows[offset:offset + limit]:
+                if grouped and grouped[-1]["round"] == race["round"]:
+                    grouped[-1]["Results"].append(result)
+                else:
+                    grouped.append({**race, "Results": [result]})
+            page["RaceTable"] = {**mr["RaceTable"], "Races": grouped}
+            total = len(rows)
+        elif races is not None:
+            page["RaceTable"] = {**mr["RaceTable"], "Races": races[offset:offset + limit]}
+            total = len(races)
+        else:
+            total = int(mr.get("total", 0))
+
+        return {"MRData": {**page, "limit": str(limit), "offset": str(offset), "total": str(total)}}
+
+    # -------- Request handling -------- #
+
+    def _throttled(self) -> bool:
+        if self._bucket is not None and not self._bucket.try_acquire():
+            return True
+        if self.config.throttle_rate > 0:
+            with self._lock:
+                return self._random.random() < self.config.throttle_rate
+        return False
+
+    def _delay(self) -> float:
+        if self.config.jitter <= 0:
+            return self.config.latency
+        with self._lock:
+            return self.config.latency + self._random.uniform(0, self.config.jitter)
+
+    def handle(self, url: str, headers: Dict[str, str]) -> Tuple[int, Dict[str, str], bytes]:
+        """
+        (status, headers, body) for a GET of `url`.
+        """
+        parsed = urlparse(url)
+        path = parsed.path
+        if path == "/_stats":
+            return 200, {"Content-Type": "application/json"}, json.dumps(self.stats.snapshot()).encode()
+
+        self.stats.incr("requests")
+        delay = self._delay()
+        if delay > 0:
+            time.sleep(delay)
+
+        if self._throttled():
+            self.stats.incr("throttled")
+            return 429, {"Retry-After": f"{self.config.retry_after:g}"}, b'{"detail": "throttled"}'
+
+        # Served both under the Jolpica prefix and bare
+        if path.startswith("/ergast/f1/"):
+            path = path[len("/ergast/f1"):]
+        params = dict(parse_qsl(parsed.query))
+
+        payload = self._payload(path, params)
+        if payload is None:
+            self.stats.incr("not_found")
+            return 404, {"Content-Type": "application/json"}, b'{"detail": "not found"}'
+
+        try:
+            limit = min(int(params.get("limit", DEFAULT_LIMIT)), self.config.max_limit)
+            offset = max(int(params.get("offset", 0)), 0)
+        except ValueError:
+            return 400, {"Content-Type": "application/json"}, b'{"detail": "bad limit/offset"}'
+
+        body = json.dumps(self.paginate(payload, limit, offset), separators=(",", ":")).encode()
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        if headers.get("If-None-Match") == etag:
+            self.stats.incr("not_modified")
+            return 304, {"ETag": etag}, b""
+
+        self.stats.incr("ok")
+        return 200, {"Content-Type": "application/json", "ETag": etag}, body
+
+
+def make_server(stub: StubJolpica, host: str = "127.0.0.1", port: int = 8765) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            status, headers, body = stub.handle(self.path, dict(self.headers))
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    return server
+
+
+def serve_in_thread(
+    stub: StubJolpica, host: str = "127.0.0.1", port: int = 0
+) -> Tuple[ThreadingHTTPServer, str]:
+    """
+    Starts the server on a background thread (port 0 picks a free one) and
+    returns it with the JOLPICA_BASE to point clients at.
+    """
+    server = make_server(stub, host, port)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}/ergast/f1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Ergast-compatible server over a snapshot archive")
+    parser.add_argument("archive", type=Path)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra uniform random seconds")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="share of requests answered 429")
+    parser.add_argument("--max-rps", type=float, default=0.0, help="429 above this request rate")
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--max-limit", type=int, default=MAX_LIMIT)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    config = StubConfig(
+        latency=args.latency,
+        jitter=args.jitter,
+        throttle_rate=args.throttle_rate,
+        max_rps=args.max_rps,
+        retry_after=args.retry_after,
+        max_limit=args.max_limit,
+        seed=args.seed,
+    )
+    stub = StubJolpica(Snapshot(args.archive), config)
+    server = make_server(stub, args.host, args.port)
+    print(f"Serving {len(stub.snapshot)} payloads: JOLPICA_BASE=http://{args.host}:{args.port}/ergast/f1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(stub.stats.snapshot()))
+
+
+if __name__ == "__main__":
+    main()
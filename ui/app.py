@@ -5,29 +5,30 @@ from pathlib import Path
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 sys.path.append(str(PROJECT_ROOT))
 
+import logging
+import threading
+import time
+from typing import List, Tuple
+
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx
 
+from config.settings import settings
 from services.cache_service import CacheService
+from services.feature_store import FeatureStore
 from services.jolpica_service import JolpicaService
+from services.pace_features import PaceStore
 
-from agents.circuit_agent import CircuitAgent
-from agents.driver_agent import DriverAgent
-from agents.constructor_agent import ConstructorAgent
-from agents.fusion_agent import FusionAgent
-from agents.explanation_agent import ExplainabilityAgent
+from agents.championship_agent import ChampionshipAgent
+from agents.model_version import FEATURE_VERSION, MODEL_VERSION, PACE_VERSION
+from agents.pipeline import run_prediction
 
+SEASONS = [2025, 2024, 2023, 2022]
 
-def build_driver_constructor_map(season: int, round_no: int, jol: JolpicaService) -> dict:
-    """
-    Map driverId -> constructorId from the selected race.
-    Returns {} if results are unavailable.
-    """
-    data = jol.results(season, round_no)
-    races = data.get("MRData", {}).get("RaceTable", {}).get("Races", [])
-    if not races:
-        return {}
-    results = races[0].get("Results", [])
-    return {r["Driver"]["driverId"]: r["Constructor"]["constructorId"] for r in results}
+logger = logging.getLogger(__name__)
+
+# Context keys the page renders; everything else (results frame, ...) stays out of the cache
+_RESULT_KEYS = ("circuit", "drivers", "driver_to_constructor", "prediction", "explanation", "pace", "timings")
 
 
 def safe_title_driver(driver_id: str | None) -> str:
@@ -36,6 +37,77 @@ def safe_title_driver(driver_id: str | None) -> str:
     return driver_id.replace("_", " ").title()
 
 
+# -------------------- SHARED SERVICES --------------------
+@st.cache_resource(show_spinner=False)
+def get_services() -> Tuple[CacheService, JolpicaService, FeatureStore, PaceStore]:
+    """
+    One cache, Jolpica client, feature store and pace store for every
+    session of the process.
+    """
+    cache = CacheService()
+    return cache, JolpicaService(cache), FeatureStore(version=FEATURE_VERSION), PaceStore(version=PACE_VERSION)
+
+
+@st.cache_data(
+    ttl=settings.UI_PREDICTION_TTL,
+    max_entries=settings.UI_PREDICTION_ENTRIES,
+    show_spinner=False,
+)
+def predict(season: int, round_no: int, model_version: str) -> dict:
+    """
+    The rendered part of run_prediction's context. `model_version` is only
+    part of the cache key: a model change never serves older predictions.
+    Failures raise and are not cached.
+    """
+    _, jol, store, pace = get_services()
+    context = run_prediction(jol, season, round_no, store=store, pace=pace)
+    return {key: context.get(key) for key in _RESULT_KEYS}
+
+
+def warm_rounds(jol: JolpicaService, season: int) -> List[int]:
+    """
+    The latest round of `season` with results and the next race (predicted
+    from the rounds before it), where it is on the calendar. None while
+    the season has no results.
+    """
+    latest = max(jol.season_results(season), default=0)
+    if not latest:
+        return []
+    calendar = {int(r["round"]) for r in jol.races(season)["MRData"]["RaceTable"]["Races"]}
+    return [r for r in (latest, latest + 1) if r in calendar]
+
+
+@st.cache_resource(show_spinner=False)
+def start_warmup() -> threading.Thread:
+    """
+    Once per process: predicts the latest and next rounds of the newest
+    season with results in the background, so the likeliest queries are
+    cached before anyone asks. Best effort: failures are logged and leave
+    those rounds cold.
+    """
+    def warm():
+        _, jol, _, _ = get_services()
+        for season in SEASONS:
+            try:
+                rounds = warm_rounds(jol, season)
+            except Exception:
+                logger.warning("warmup: cannot list rounds of %s", season, exc_info=True)
+                continue
+            if not rounds:
+                continue
+            for round_no in rounds:
+                try:
+                    predict(season, round_no, MODEL_VERSION)
+                except Exception:
+                    logger.warning("warmup: prediction of %s round %s failed", season, round_no, exc_info=True)
+            return
+
+    thread = threading.Thread(target=warm, name="prediction-warmup", daemon=True)
+    add_script_run_ctx(thread)
+    thread.start()
+    return thread
+
+
 # -------------------- PAGE SETUP --------------------
 st.set_page_config(page_title="F1 Multi-Agent Predictor", layout="wide")
 st.title("🏎️ Formula 1 Race Predictor")
@@ -103,59 +175,51 @@ st.markdown(
 )
 
 
+if settings.UI_WARM_CACHE:
+    start_warmup()
+
+
 # -------------------- INPUT FORM --------------------
 with st.form("predict_form"):
-    season = st.selectbox("Season", [2025, 2024, 2023, 2022], index=0)
+    season = st.selectbox("Season", SEASONS, index=0)
     round_no = st.number_input("Race Round", min_value=1, max_value=24, value=5, step=1)
+    project = st.checkbox("Project the championship from this prediction", value=False)
     submitted = st.form_submit_button("🔮 Predict Race")
 
 
 # -------------------- RUN PREDICTION --------------------
 if submitted:
     with st.spinner("Running AI agents..."):
-        cache = CacheService()
-        jol = JolpicaService(cache)
-
         try:
-            base = {"season": int(season), "round": int(round_no)}
+            # Shared across sessions; repeated queries are served from the cache
+            started = time.perf_counter()
+            context = predict(int(season), int(round_no), MODEL_VERSION)
+            elapsed = time.perf_counter() - started
+        except Exception as e:
+            st.error(f"App error while generating prediction: {e}")
+            st.stop()
 
-            circuit = CircuitAgent(jol).run(base)
-            drivers = DriverAgent(jol).run(base)
-            constructors = ConstructorAgent(jol).run(base)
-            mapping = build_driver_constructor_map(int(season), int(round_no), jol)
+    circuit = context["circuit"]
+    drivers = context["drivers"]
+    mapping = context["driver_to_constructor"]
 
-            if not drivers or not mapping:
-                st.error(
-                    "No data available for this season/round yet "
-                    "(or the API returned empty results)."
-                )
-                st.stop()
-
-            prediction = FusionAgent().run(
-                {
-                    "circuit": circuit,
-                    "drivers": drivers,
-                    "constructors": constructors,
-                    "driver_to_constructor": mapping,
-                }
-            )
+    if not drivers or not mapping:
+        st.error(
+            "No data available for this season/round yet "
+            "(or the API returned empty results)."
+        )
+        st.stop()
 
-            if not prediction or prediction.get("winner") is None:
-                st.error(
-                    "Prediction could not be generated (insufficient data). "
-                    "Try a different season or round."
-                )
-                st.stop()
+    prediction = context["prediction"]
 
-            explanation = ExplainabilityAgent().run(
-                {"circuit": circuit, "drivers": drivers, "prediction": prediction}
-            )
+    if not prediction or prediction.get("winner") is None:
+        st.error(
+            "Prediction could not be generated (insufficient data). "
+            "Try a different season or round."
+        )
+        st.stop()
 
-        except Exception as e:
-            st.error(f"App error while generating prediction: {e}")
-            st.stop()
-        finally:
-            cache.close()
+    explanation = context["explanation"]
 
     # -------------------- OUTPUT --------------------
     st.subheader("🏁 Race Prediction")
@@ -195,3 +259,48 @@ if submitted:
     st.subheader("🧠 Explanation")
     for e in (explanation or {}).get("explanations", []):
         st.write("•", e)
+
+    pace = context.get("pace") or {}
+    if pace:
+        with st.expander("🏎️ FastF1 weekend pace"):
+            by_gap = sorted(
+                pace.items(), key=lambda x: float("inf") if x[1]["quali_gap"] is None else x[1]["quali_gap"]
+            )
+            for d, p in by_gap[:10]:
+                st.write(
+                    f"**{safe_title_driver(d)}** — quali gap {p['quali_gap']}% | "
+                    f"long run {p['long_run_gap']}% off ({p['long_run_laps']} laps) | "
+                    f"tyre deg {p['tyre_deg']} s/lap"
+                )
+
+    # -------------------- CHAMPIONSHIP --------------------
+    if project:
+        st.subheader("🏆 Championship Projection")
+        _, jol, _, _ = get_services()
+        progress = st.progress(0.0, text="Simulating the remaining rounds...")
+        standings = st.empty()
+        agent = ChampionshipAgent(jol, n_sims=settings.UI_CHAMPIONSHIP_SIMS)
+
+        try:
+            # Redrawn after every chunk of simulated seasons
+            for estimate in agent.iter_run({"season": int(season), "prediction": prediction}):
+                progress.progress(
+                    estimate["completed"] / estimate["n_sims"],
+                    text=f"{estimate['completed']:,} / {estimate['n_sims']:,} seasons simulated "
+                    f"over {len(estimate['remaining_rounds'])} remaining rounds",
+                )
+                leaders = sorted(estimate["drivers"].items(), key=lambda x: x[1]["title"], reverse=True)
+                with standings.container():
+                    for d, e in leaders[:5]:
+                        st.write(f"**{safe_title_driver(d)}** — title {e['title']:.1%}")
+        except Exception as e:
+            st.error(f"Championship projection failed: {e}")
+        else:
+            if not estimate["drivers"]:
+                st.info("No championship standings for this season yet.")
+
+    with st.expander("⏱️ Agent timings"):
+        st.write(f"This request: {elapsed * 1000:.1f} ms")
+        st.caption("Agent timings of the run that computed this prediction (cached with it):")
+        for name, seconds in context["timings"].items():
+            st.write(f"{name}: {seconds * 1000:.1f} ms")